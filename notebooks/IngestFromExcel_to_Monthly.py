@@ -3,11 +3,18 @@ import os, sys
 import pandas as pd
 import numpy as np
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.data.excel_cache import load_sheets_cached, sheet_names
+
 THIS_DIR = os.path.dirname(__file__)
 XLSX_PATH = os.path.join(THIS_DIR, "Monthly_combined_analysis.xlsx")
 OUT_DIR = os.path.abspath(os.path.join(THIS_DIR, "..", "data_cache", "Monthly"))
 os.makedirs(OUT_DIR, exist_ok=True)
 OUT_COMBINED = os.path.join(OUT_DIR, "tech_features_combined.csv")
+# parsed sheets are cached as Parquet, keyed by workbook/sheet fingerprints
+EXCEL_CACHE_DIR = os.path.abspath(os.path.join(THIS_DIR, "..", "data_cache", "excel_cache"))
+# bump when build_df_from_raw / to_month_end_index change behaviour
+PARSER_VERSION = "1"
 
 DATE_CANDIDATES = [
     "date",
@@ -20,7 +27,7 @@ def read_workbook(path: str):
     if not os.path.exists(path):
         print(f"[fatal] Excel not found at: {path}")
         sys.exit(1)
-    return pd.ExcelFile(path)
+    return sheet_names(path)
 
 def guess_header_row(raw: pd.DataFrame, max_scan: int = 12) -> int:
     raw = raw.copy()
@@ -109,9 +116,18 @@ def to_month_end_index(df: pd.DataFrame) -> pd.DataFrame:
     df = df[~df.index.duplicated(keep="last")]
     return df
 
+def parse_sheet(raw: pd.DataFrame) -> pd.DataFrame:
+    df = build_df_from_raw(raw)
+    # numeric-cast obvious numeric columns
+    for c in df.columns:
+        if df[c].dtype == object:
+            n = pd.to_numeric(df[c], errors="coerce")
+            if n.notna().sum() >= max(5, int(0.5 * len(df))):
+                df[c] = n
+    return to_month_end_index(df)
+
 def main():
-    x = read_workbook(XLSX_PATH)
-    sheets = x.sheet_names
+    sheets = read_workbook(XLSX_PATH)
     print("Workbook sheets found:", sheets)
     sheet = sheets[0] if len(sheets) == 1 else ( "tech_features_combined" if "tech_features_combined" in sheets else sheets[0] )
     if len(sheets) == 1:
@@ -119,16 +135,11 @@ def main():
     else:
         print(f"[auto] Using sheet: {sheet}")
 
-    raw = pd.read_excel(XLSX_PATH, sheet_name=sheet, header=None, dtype=object)
-    df = build_df_from_raw(raw)
-    # numeric-cast obvious numeric columns
-    for c in df.columns:
-        if df[c].dtype == object:
-            n = pd.to_numeric(df[c], errors="coerce")
-            if n.notna().sum() >= max(5, int(0.5 * len(df))):
-                df[c] = n
+    frames, reparsed = load_sheets_cached(XLSX_PATH, [sheet], parse=parse_sheet,
+                                          cache_dir=EXCEL_CACHE_DIR, parser_version=PARSER_VERSION)
+    print(f"[cache] Re-parsed sheet(s): {reparsed}" if reparsed else "[cache] Workbook unchanged → loaded from Parquet cache.")
 
-    df = to_month_end_index(df)
+    df = frames[sheet]
     df.to_csv(OUT_COMBINED)
     print("Saved →", OUT_COMBINED)
     print("\n✅ Done. CSV exported to:", OUT_COMBINED)
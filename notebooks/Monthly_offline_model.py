@@ -1,11 +1,16 @@
 #!/usr/bin/env python3
-import os, sys
+import os, sys, argparse
 import pandas as pd
 import numpy as np
 
 THIS_DIR = os.path.dirname(__file__)
+sys.path.append(os.path.abspath(os.path.join(THIS_DIR, "..")))
+from src.data.feature_store import FeatureStore
+from src.data.quality import hard_mask, summarize, validate_panel
+
 MONTHLY_DIR = os.path.abspath(os.path.join(THIS_DIR, "..", "data_cache", "Monthly"))
 COMBINED_CSV = os.path.join(MONTHLY_DIR, "tech_features_combined.csv")
+STORE_DIR = os.path.join(MONTHLY_DIR, "store")
 
 TICKERS = ["AAPL","MSFT","GOOGL","NVDA","META","AMZN"]
 
@@ -21,6 +26,20 @@ def read_csv_maybe_index(p: str) -> pd.DataFrame:
         df = df[~df.index.duplicated(keep="last")].sort_index()
     return df
 
+def read_snapshot(as_of: str | None = None, version: str | None = None) -> pd.DataFrame:
+    """tech_features_combined as known on `as_of` (or a specific store version), flat columns."""
+    store = FeatureStore(STORE_DIR)
+    try:
+        df = store.get("tech_features_combined", version) if version else store.as_of("tech_features_combined", as_of)
+    except KeyError as e:
+        print(f"[fatal] {e.args[0]}")
+        sys.exit(1)
+    if isinstance(df.columns, pd.MultiIndex):
+        # per-ticker blocks from the TechMonthly scripts; shared columns repeat
+        df.columns = df.columns.get_level_values(-1)
+        df = df.loc[:, ~df.columns.duplicated()]
+    return df
+
 def ensure_returns(df: pd.DataFrame) -> pd.DataFrame:
     have = [c for c in df.columns if c.endswith("_ret")]
     if have:
@@ -42,13 +61,12 @@ def ensure_returns(df: pd.DataFrame) -> pd.DataFrame:
         print("Available columns:", list(df.columns)[:10], "...")
         sys.exit(2)
 
-    out = df.copy()
-    for t, col in price_cols:
-        s = pd.to_numeric(out[col], errors="coerce")
-        if s.notna().sum() < 3:
-            continue
-        ret = s.pct_change(fill_method=None)
-        out[f"{t}_ret"] = ret
+    # all price columns in one frame-wide pct_change instead of one per column
+    prices = df[[col for _, col in price_cols]].apply(pd.to_numeric, errors="coerce")
+    rets = prices.pct_change(fill_method=None)
+    rets.columns = [f"{t}_ret" for t, _ in price_cols]
+    keep = (prices.notna().sum() >= 3).to_numpy()
+    out = pd.concat([df, rets.loc[:, keep]], axis=1)
 
     made = [c for c in out.columns if c.endswith("_ret")]
     if not made:
@@ -59,13 +77,28 @@ def ensure_returns(df: pd.DataFrame) -> pd.DataFrame:
     return out
 
 def main():
-    df = read_csv_maybe_index(COMBINED_CSV)
+    ap = argparse.ArgumentParser(description="Offline correlation model on tech_features_combined")
+    ap.add_argument("--as-of", default=None, help="use the feature-store snapshot known on this date (YYYY-MM-DD)")
+    ap.add_argument("--version", default=None, help="use a specific feature-store version")
+    args = ap.parse_args()
+
+    if args.as_of or args.version:
+        df = read_snapshot(args.as_of, args.version)
+        print(f"Point-in-time features ({args.version or 'as of ' + args.as_of}): {df.shape}")
+    else:
+        df = read_csv_maybe_index(COMBINED_CSV)
     df = ensure_returns(df)
 
     # quick sanity print
     ret_cols = [c for c in df.columns if c.endswith("_ret")]
     print("Return columns detected:", ret_cols)
 
+    # returns guessed from price-like columns can carry unit slips: drop hard-flagged months
+    # (split-sized moves are only reported - with no volume to confirm them they may be real)
+    report, flags = validate_panel(df[ret_cols], kind="return", freq="ME")
+    print("[Quality]", summarize(report))
+    df[ret_cols] = df[ret_cols].mask(hard_mask(flags))
+
     # minimal demo: compute correlation matrix of returns and save
     corr = df[ret_cols].corr(min_periods=6)
     out_corr = os.path.join(MONTHLY_DIR, "ret_corr.csv")
@@ -1,54 +1,202 @@
 #!/usr/bin/env python3
-import os, pandas as pd
+import os, sys, json, argparse
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.data.fingerprint import diff_fingerprints
+from src.features.merge import merge_monthly
 
 HERE = os.path.dirname(__file__)
 MONTHLY = os.path.abspath(os.path.join(HERE, "..", "data_cache", "Monthly"))
+OUT_CSV = os.path.join(MONTHLY, "tech_features_combined.csv")
+
+# incremental state: source fingerprints + one normalized Parquet block per source
+# + the last combined frame, so a run only merges the sources that changed
+STATE_DIR  = os.path.join(MONTHLY, ".rebuild_state")
+STATE_JSON = os.path.join(STATE_DIR, "state.json")
+COMBINED_STATE = os.path.join(STATE_DIR, "combined.parquet")
 
 TICKERS = ["AAPL","MSFT","GOOGL","NVDA","META","AMZN"]
+BASE_FILES = ["ixic_rets.csv", "xlk_rets.csv", "ai_basket_rets.csv", "macro_monthly.csv"]
 
 def read_csv(name):
     p = os.path.join(MONTHLY, name)
     if not os.path.exists(p): return None
     return pd.read_csv(p, index_col=0, parse_dates=True)
 
-def main():
-    frames = []
+def source_paths():
+    """Ordered {file name: path} of every source that exists (benchmarks & macro first)."""
+    names = BASE_FILES + [f"{t}_features_enriched.csv" for t in TICKERS]
+    return {n: os.path.join(MONTHLY, n) for n in names if os.path.exists(os.path.join(MONTHLY, n))}
 
-    # benchmarks & macro
-    for name in ["ixic_rets.csv", "xlk_rets.csv", "ai_basket_rets.csv", "macro_monthly.csv"]:
-        df = read_csv(name)
-        if df is not None:
-            df.index = pd.to_datetime(df.index, errors="coerce").to_period("M").to_timestamp("M")
-            frames.append(df)
+def load_source(name):
+    """Read one source file and return its month-end block of columns (or None)."""
+    df = read_csv(name)
+    if df is None: return None
+    df = merge_monthly([df])  # month-end index, duplicate months resolved (last wins)
+    if name in BASE_FILES:
+        return df
 
     # per-ticker features (we’ll take *_ret if present; otherwise skip)
-    for t in TICKERS:
-        df = read_csv(f"{t}_features_enriched.csv")
-        if df is None: continue
-        df.index = pd.to_datetime(df.index, errors="coerce").to_period("M").to_timestamp("M")
-        keep = [c for c in df.columns if c.endswith("_ret")]  # e.g. AAPL_ret
-        # if no explicit *_ret, try Close -> pct_change
-        if not keep:
-            # try to infer a price column that looks like the ticker
-            price_candidates = [c for c in df.columns if t in c.upper() or c.upper()==t]
-            if price_candidates:
-                s = pd.to_numeric(df[price_candidates[0]], errors="coerce")
-                df[f"{t}_ret"] = s.pct_change()
-                keep = [f"{t}_ret"]
-        frames.append(df[keep]) if keep else None
-
-    if not frames:
+    t = name.split("_")[0]
+    keep = [c for c in df.columns if c.endswith("_ret")]  # e.g. AAPL_ret
+    # if no explicit *_ret, try Close -> pct_change
+    if not keep:
+        # try to infer a price column that looks like the ticker
+        price_candidates = [c for c in df.columns if t in c.upper() or c.upper()==t]
+        if price_candidates:
+            s = pd.to_numeric(df[price_candidates[0]], errors="coerce")
+            df[f"{t}_ret"] = s.pct_change()
+            keep = [f"{t}_ret"]
+    return df[keep] if keep else None
+
+def combine(blocks):
+    # one preallocated outer join; drop all-empty rows
+    return merge_monthly(blocks, dropna_rows=True)
+
+def splice(prev, owners, fresh, order):
+    """
+    `prev` (the last combined frame) with the columns of the sources in `fresh`
+    ({name: new block or None}) swapped for their new blocks. Only the fresh
+    blocks go through `combine`; unchanged sources are never read. Returns
+    (combined, {name: columns}) in source order, as a full rebuild would.
+    """
+    stale = {c for n in fresh for c in owners.get(n, [])}
+    kept = prev.drop(columns=[c for c in prev.columns if c in stale])
+    new = [df for df in fresh.values() if df is not None]
+    if new:
+        part = combine(new)
+        idx = kept.index.union(part.index)
+        kept = pd.concat([kept.reindex(idx), part.reindex(idx)], axis=1)
+    cols = {n: owners[n] if n not in fresh else [] if fresh[n] is None else [str(c) for c in fresh[n].columns]
+            for n in order}
+    out = kept[[c for n in order for c in cols[n]]]
+    return out.loc[out.notna().any(axis=1)], cols
+
+# -------- incremental state --------
+def _block_path(name):
+    return os.path.join(STATE_DIR, name.replace(".csv", ".parquet"))
+
+def load_state():
+    if os.path.exists(STATE_JSON):
+        try:
+            with open(STATE_JSON) as f: return json.load(f)
+        except Exception:
+            pass
+    return {}
+
+def save_state(state):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    tmp = STATE_JSON + ".tmp"
+    with open(tmp, "w") as f: json.dump(state, f, indent=2)
+    os.replace(tmp, STATE_JSON)
+
+def save_block(name, df):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    if df is None:
+        if os.path.exists(_block_path(name)): os.remove(_block_path(name))
+        return
+    df.to_parquet(_block_path(name))
+
+def load_block(name):
+    p = _block_path(name)
+    return pd.read_parquet(p) if os.path.exists(p) else None
+
+def load_combined():
+    return pd.read_parquet(COMBINED_STATE) if os.path.exists(COMBINED_STATE) else None
+
+def save_combined(combined):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    tmp = COMBINED_STATE + ".tmp"
+    combined.to_parquet(tmp)
+    os.replace(tmp, COMBINED_STATE)
+
+def write_output(combined, state, history_changed):
+    """
+    Append rows to the existing CSV when only new months were added on the
+    same columns; otherwise rewrite it.
+    """
+    old_rows, old_cols = state.get("rows"), state.get("columns")
+    idx = [d.isoformat() for d in combined.index]
+    cols = [str(c) for c in combined.columns]
+    appendable = (
+        not history_changed and os.path.exists(OUT_CSV)
+        and old_rows is not None and old_cols == cols
+        and len(idx) >= len(old_rows) and idx[:len(old_rows)] == old_rows
+    )
+    if appendable and len(idx) == len(old_rows):
+        print("Combined rows unchanged; CSV left as is →", OUT_CSV)
+    elif appendable:
+        combined.iloc[len(old_rows):].to_csv(OUT_CSV, mode="a", header=False)
+        print(f"Appended {len(idx) - len(old_rows)} new month(s) →", OUT_CSV)
+    else:
+        combined.to_csv(OUT_CSV)
+        print("Saved →", OUT_CSV)
+    state["rows"], state["columns"] = idx, cols
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Rebuild tech_features_combined.csv from per-source files")
+    ap.add_argument("--full", action="store_true", help="ignore incremental state and rebuild everything")
+    args = ap.parse_args(argv)
+
+    paths = source_paths()
+    state = {} if args.full else load_state()
+    fps, changed = diff_fingerprints(paths, state.get("sources"))
+    removed = [n for n in state.get("sources", {}) if n not in paths]
+
+    if not paths:
         print("[fatal] Found no usable frames. Aborting.")
         return
+    if state and not changed and not removed and os.path.exists(OUT_CSV):
+        print("Up to date: no source changed since last build →", OUT_CSV)
+        return
+    print(f"Sources: {len(paths)} | changed: {len(changed)} | removed: {len(removed)}")
+
+    # changed sources: re-read and re-normalize (removed ones become None)
+    fresh, history_changed = {}, bool(removed)
+    for name in paths:
+        if name in changed:
+            old = load_block(name)
+            df = load_source(name)
+            # values at already-written months changed → the CSV must be rewritten
+            if old is None or df is None or not df.reindex(old.index).equals(old):
+                history_changed = True
+            save_block(name, df)
+            fresh[name] = df
+    for name in removed:
+        save_block(name, None)
+        fresh[name] = None
 
-    combined = pd.concat(frames, axis=1).sort_index()
-    # drop all-empty rows
-    combined = combined.dropna(how="all")
-    out = os.path.join(MONTHLY, "tech_features_combined.csv")
-    combined.to_csv(out)
-    print("Saved →", out)
+    owners = state.get("owners")
+    prev = load_combined() if owners is not None else None
+    if prev is not None and all(n in owners or n in fresh for n in paths):
+        # splice the changed sources' columns into the last combined frame
+        combined, owners = splice(prev, owners, fresh, list(paths))
+    else:
+        # first build (or lost / ambiguous state): every source's block
+        blocks = {}
+        for name in paths:
+            df = fresh[name] if name in fresh else load_block(name)
+            if df is None and name not in fresh:  # block lost → fall back to the source file
+                df = load_source(name)
+                save_block(name, df)
+            blocks[name] = df
+        owners = {n: [] if df is None else [str(c) for c in df.columns] for n, df in blocks.items()}
+        blocks = [df for df in blocks.values() if df is not None]
+        if not blocks:
+            print("[fatal] Found no usable frames. Aborting.")
+            return
+        combined = combine(blocks)
+
+    if combined.columns.has_duplicates:
+        owners = None                        # columns can't be told apart by source: rebuild in full next time
+    else:
+        save_combined(combined)
+    write_output(combined, state, history_changed)
+    state["sources"] = fps
+    state["owners"] = owners
+    save_state(state)
     print("Columns:", list(combined.columns)[:20])
 
 if __name__ == "__main__":
     main()
-
@@ -6,13 +6,21 @@ Tech Monthly — Polygon-Only, Rock-Stable
 - Prices ONLY from Polygon v2 aggregates (requires POLYGON_API_KEY with aggregates access)
 - No yfinance, no news, no earnings → minimal moving parts
 - Month-end alignment for joins with FRED
-- Caches monthly closes per ticker to ../data_cache/raw/*_poly_monthly.parquet
+- Caches monthly closes per ticker in the raw cache (../data_cache/raw, key poly_monthly/<T>);
+  older *_poly_monthly.parquet files there are moved in on first use
 """
 
-import os, time, datetime as dt
+import os, sys, time, json, datetime as dt
 from typing import Dict, Tuple, List
 import pandas as pd, numpy as np, requests
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.features.merge import merge_monthly
+from src.features.baskets import basket_returns
+from src.data.feature_store import FeatureStore
+from src.data.quality import hard_mask, summarize, validate_panel
+from src.data.raw_cache import RawCache
+
 # -------- env loading --------
 def load_env():
     loaded=[]
@@ -42,6 +50,7 @@ OUT_DIR = os.path.join(REPO_ROOT, "data_cache", "Monthly")
 RAW_DIR = os.path.join(REPO_ROOT, "data_cache", "raw")
 os.makedirs(OUT_DIR, exist_ok=True)
 os.makedirs(RAW_DIR, exist_ok=True)
+RAW_CACHE = RawCache(RAW_DIR, budget=os.getenv("RAW_CACHE_BUDGET") or None)
 
 TECH = ["AAPL","MSFT","GOOGL","NVDA","META","AMZN"]
 AI_BASKET = ["NVDA","META","MSFT","GOOGL","AMD","AVGO"]
@@ -51,6 +60,8 @@ XLK_PROXY  = "XLK"
 START = "2018-01-01"
 END   = dt.date.today().isoformat()
 LAGS  = [1,3,6]
+# per-ticker lags chosen by notebooks/select_lags.py (LAGS when absent)
+SELECTED_LAGS_JSON = os.path.join(OUT_DIR, "selected_lags.json")
 
 FRED_BASE = "https://api.stlouisfed.org/fred/series/observations"
 POLY_BASE = "https://api.polygon.io"
@@ -84,6 +95,11 @@ def make_lags(df: pd.DataFrame, cols: List[str], lags=(1,3,6)) -> pd.DataFrame:
                 out[f"{c}_lag{L}"]=out[c].shift(L)
     return out
 
+def lags_for(ticker: str) -> List[int]:
+    try:
+        with open(SELECTED_LAGS_JSON) as f: return json.load(f).get(ticker) or LAGS
+    except (OSError, ValueError): return LAGS
+
 def diag(df: pd.DataFrame, name: str):
     print(f"\n[Diag] {name}: shape={df.shape}, index=({df.index.min()}, {df.index.max()})")
     print("[Diag] Top NaN%:\n", df.isna().mean().sort_values(ascending=False).head(8).to_string())
@@ -133,17 +149,14 @@ def polygon_validate() -> Tuple[bool,str]:
 
 # -------- Polygon prices (daily → month-end) with caching --------
 def polygon_agg_daily_to_monthly(ticker: str, start: str, end: str) -> pd.Series:
-    cache = os.path.join(RAW_DIR, f"{ticker}_poly_monthly.parquet")
-    if os.path.exists(cache):
-        try:
-            s = pd.read_parquet(cache)
-            if isinstance(s, pd.DataFrame) and ticker in s.columns:
-                s = s[ticker]
-            s.index = pd.to_datetime(s.index)
-            # ensure month-end index (already saved as month-end)
-            return pd.Series(s, name=ticker).sort_index()
-        except Exception:
-            pass
+    cached = RAW_CACHE.get(f"poly_monthly/{ticker}")
+    if cached is None:  # a pre-RawCache file: move it in instead of refetching
+        cached = RAW_CACHE.adopt(f"poly_monthly/{ticker}", os.path.join(RAW_DIR, f"{ticker}_poly_monthly.parquet"))
+    if cached is not None:
+        s = cached["close"].rename(ticker)
+        s.index = pd.to_datetime(s.index)
+        # ensure month-end index (already saved as month-end)
+        return s.sort_index()
 
     url = f"{POLY_BASE}/v2/aggs/ticker/{ticker}/range/1/day/{start}/{end}"
     params = {"adjusted":"true", "sort":"asc", "limit":50000, "apiKey": POLY_KEY}
@@ -160,8 +173,8 @@ def polygon_agg_daily_to_monthly(ticker: str, start: str, end: str) -> pd.Series
     # convert to month-end
     s.index = s.index.to_period("M").to_timestamp("M")
     s = s.groupby(level=0).last()
-    # cache
-    try: s.to_frame(name=ticker).to_parquet(cache)
+    # cache (column "close" so every ticker shares one schema and packs together)
+    try: RAW_CACHE.put(f"poly_monthly/{ticker}", s.to_frame(name="close"))
     except Exception: pass
     return s
 
@@ -174,7 +187,7 @@ def monthly_close_frame_polygon(targets: List[str]) -> pd.DataFrame:
         time.sleep(0.15)  # gentle pacing
     if not cols:
         return pd.DataFrame()
-    return pd.concat(cols, axis=1).sort_index()
+    return merge_monthly(cols)
 
 # -------- Features --------
 def build_features(ticker: str, macro: pd.DataFrame,
@@ -187,11 +200,12 @@ def build_features(ticker: str, macro: pd.DataFrame,
         rets = s.pct_change(fill_method=None).to_frame(name=f"{ticker}_ret")
         frame=rets
     # join benchmarks (already month-end & saved)
-    frame=frame.join(ixic_rets, how="left").join(xlk_rets, how="left").join(ai_ret_eqw, how="left")
     # macro & lags
+    lags=lags_for(ticker)
     base=["inflation_yoy","us10y","us10y_chg","fed_funds_rate","fedfunds_chg","unemployment_rate","unrate_chg"]
-    frame=frame.join(make_lags(macro, base, lags=LAGS), how="left")
-    if len(frame)>max(LAGS): frame=frame.iloc[max(LAGS):]
+    # single preallocated left join instead of chained .join() copies
+    frame=merge_monthly([frame, ixic_rets, xlk_rets, ai_ret_eqw, make_lags(macro, base, lags=lags)], how="left")
+    if len(frame)>max(lags): frame=frame.iloc[max(lags):]
     return frame
 
 # -------- OLS (optional) --------
@@ -215,6 +229,19 @@ def fit_ols_safe(df: pd.DataFrame, target_col: str, min_rows=24):
     m=sm.OLS(y,X).fit()
     print(m.summary())
 
+# -------- Quality --------
+def quality_pass(all_feat, bench):
+    """One vectorized check over every return series; hard-flagged months (unit slips, <= -100%) -> NaN;
+    split-sized moves are only reported: without volume or a split list they may be real crashes."""
+    rets=merge_monthly(bench+[ft[[f"{t}_ret"]] for t, ft in all_feat.items() if f"{t}_ret" in ft])
+    report, flags=validate_panel(rets, kind="return", freq="ME")
+    print("[Quality]", summarize(report))
+    _to_csv(report, os.path.join(OUT_DIR,"quality_report.csv"))
+    bad=hard_mask(flags)
+    for ft in all_feat.values():
+        for c in ft.columns.intersection(bad.columns):
+            ft.loc[bad[c].reindex(ft.index, fill_value=False).to_numpy(), c]=np.nan
+
 # -------- main --------
 def main():
     ok,msg = polygon_validate()
@@ -238,7 +265,7 @@ def main():
     if ai_close.empty:
         ai_eqw = pd.DataFrame(index=macro.index, data={"ai_basket_ret": np.nan})
     else:
-        ai_eqw = ai_close.pct_change(fill_method=None).mean(axis=1).to_frame(name="ai_basket_ret")
+        ai_eqw = basket_returns(ai_close.pct_change(fill_method=None), {"ai_basket_ret": AI_BASKET})
 
     _to_csv(qqq, os.path.join(OUT_DIR,"ixic_rets.csv"))
     _to_csv(xlk, os.path.join(OUT_DIR,"xlk_rets.csv"))
@@ -251,11 +278,21 @@ def main():
         ft=build_features(t, macro, qqq, xlk, ai_eqw)
         diag(ft, f"{t} features")
         all_feat[t]=ft
+
+    quality_pass(all_feat, [qqq, xlk, ai_eqw])
+    for t, ft in all_feat.items():
         _to_csv(ft, os.path.join(OUT_DIR, f"{t}_features_enriched.csv"))
 
-    combined=pd.concat(all_feat, axis=1)
+    combined=merge_monthly(list(all_feat.values()), keys=list(all_feat))
     _to_csv(combined, os.path.join(OUT_DIR,"tech_features_combined.csv"))
 
+    # immutable point-in-time snapshot of this run (unchanged years are shared with earlier runs)
+    tables={"macro_monthly": macro, "tech_features_combined": combined,
+            "ixic_rets": qqq, "xlk_rets": xlk, "ai_basket_rets": ai_eqw}
+    tables.update({f"{t}_features_enriched": ft for t, ft in all_feat.items()})
+    version=FeatureStore(os.path.join(OUT_DIR, "store")).commit(tables, note=os.path.basename(__file__))
+    print("Feature store version →", version)
+
     # Optional OLS with safety checks
     for t in TECH:
         print(f"\n=== {t} OLS (enriched) ===")
@@ -266,7 +303,9 @@ def main():
             fit_ols_safe(all_feat[t][[target]+keep], target)
 
     print("\nDone. CSVs in:", OUT_DIR)
-    print("Raw price cache in:", RAW_DIR)
+    RAW_CACHE.compact()
+    tot=RAW_CACHE.stats().loc["total"]
+    print(f"Raw price cache in: {RAW_DIR} ({tot['entries']} entries, {tot['bytes']/2**20:.1f} MB, hit rate {tot['hit_rate']})")
     print("Provider: polygon (only)")
 
 if __name__=="__main__":
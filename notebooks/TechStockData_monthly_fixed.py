@@ -10,10 +10,17 @@ Tech Monthly — STABLE
 - Raw price cache to ../data_cache/raw (Parquet)
 """
 
-import os, time, json, datetime as dt
+import os, sys, time, json, datetime as dt
 from typing import List, Dict, Any, Tuple
 import pandas as pd, numpy as np, requests
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.features.merge import merge_monthly
+from src.features.baskets import basket_returns
+from src.data.feature_store import FeatureStore
+from src.data.quality import hard_mask, summarize, validate_panel
+from src.data.raw_cache import RawCache
+
 # ---------- optional deps ----------
 try:
     import yfinance as yf
@@ -59,6 +66,7 @@ OUT_DIR   = os.path.join(REPO_ROOT, "data_cache", "Monthly")
 RAW_DIR   = os.path.join(REPO_ROOT, "data_cache", "raw")
 os.makedirs(OUT_DIR, exist_ok=True)
 os.makedirs(RAW_DIR, exist_ok=True)
+RAW_CACHE = RawCache(RAW_DIR, budget=os.getenv("RAW_CACHE_BUDGET") or None)
 
 # ---------- config ----------
 TECH = ["AAPL","MSFT","GOOGL","NVDA","META","AMZN"]
@@ -66,6 +74,8 @@ AI_BASKET = ["NVDA","META","MSFT","GOOGL","AMD","AVGO"]
 START = "2018-01-01"
 END   = dt.date.today().isoformat()
 LAGS  = [1,3,6]
+# per-ticker lags chosen by notebooks/select_lags.py (LAGS when absent)
+SELECTED_LAGS_JSON = os.path.join(OUT_DIR, "selected_lags.json")
 
 # ---------- helpers ----------
 FRED_BASE = "https://api.stlouisfed.org/fred/series/observations"
@@ -96,6 +106,11 @@ def make_lags(df, cols, lags=(1,3,6)):
             for L in lags: out[f"{c}_lag{L}"]=out[c].shift(L)
     return out
 
+def lags_for(ticker):
+    try:
+        with open(SELECTED_LAGS_JSON) as f: return json.load(f).get(ticker) or LAGS
+    except (OSError, ValueError): return LAGS
+
 def diag(df, name):
     print(f"\n[Diag] {name}: shape={df.shape}, index=({df.index.min()}, {df.index.max()})")
     print("[Diag] Top NaN%:\n", df.isna().mean().sort_values(ascending=False).head(8).to_string())
@@ -147,19 +162,19 @@ def polygon_agg_daily(ticker, start, end) -> pd.DataFrame:
 
 def load_price_cached(ticker, start, end) -> pd.Series:
     """Return monthly close Series for ticker (Polygon→cache→yfinance)."""
-    cache_path=os.path.join(RAW_DIR, f"{ticker}_daily.parquet")
+    key=f"daily/{ticker}"   # stored with a "close" column so all tickers pack together
     use_poly=bool(POLY_KEY)
 
-    df=None
-    if use_poly and (not os.path.exists(cache_path) or FORCE_REF):
+    df=None if (use_poly and FORCE_REF) else RAW_CACHE.get(key)
+    if df is None and not (use_poly and FORCE_REF):  # a pre-RawCache file: move it in instead of refetching
+        df=RAW_CACHE.adopt(key, os.path.join(RAW_DIR, f"{ticker}_daily.parquet"))
+    if df is not None:
+        df=df.rename(columns={"close": ticker})
+    elif use_poly:
         df=polygon_agg_daily(ticker, start, end)
         if not df.empty:
-            try: df.to_parquet(cache_path)
+            try: RAW_CACHE.put(key, df.rename(columns={ticker: "close"}))
             except Exception: pass
-    if df is None:
-        if os.path.exists(cache_path):
-            try: df=pd.read_parquet(cache_path)
-            except Exception: df=None
     if (df is None or df.empty) and not use_poly:
         # fallback to yfinance (single ticker to reduce limits)
         data=yf.download(ticker, start=start, end=end, auto_adjust=True, progress=False)
@@ -178,7 +193,7 @@ def monthly_returns_for(targets, start, end) -> Tuple[pd.DataFrame, pd.DataFrame
             if not s.empty: cols.append(s.to_frame(name=t))
             time.sleep(0.15)  # gentle
         if not cols: return pd.DataFrame(), pd.DataFrame()
-        close=pd.concat(cols, axis=1).sort_index()
+        close=merge_monthly(cols)
     else:
         s=load_price_cached(targets, start, end)
         if s.empty: return pd.DataFrame(), pd.DataFrame()
@@ -193,11 +208,12 @@ def build_features(ticker, macro, ixic_rets, xlk_rets, ai_ret_eqw) -> pd.DataFra
         frame=pd.DataFrame(index=macro.index, data={f"{ticker}_ret": np.nan})
     else:
         frame=rets.rename(columns={rets.columns[0]: f"{ticker}_ret"})
-    frame=frame.join(ixic_rets, how="left").join(xlk_rets, how="left").join(ai_ret_eqw, how="left")
 
+    lags=lags_for(ticker)
     base=["inflation_yoy","us10y","us10y_chg","fed_funds_rate","fedfunds_chg","unemployment_rate","unrate_chg"]
-    frame=frame.join(make_lags(macro, base, lags=LAGS), how="left")
-    if len(frame)>max(LAGS): frame=frame.iloc[max(LAGS):]
+    # single preallocated left join instead of chained .join() copies
+    frame=merge_monthly([frame, ixic_rets, xlk_rets, ai_ret_eqw, make_lags(macro, base, lags=lags)], how="left")
+    if len(frame)>max(lags): frame=frame.iloc[max(lags):]
     return frame
 
 def fit_ols_safe(df: pd.DataFrame, target_col: str, min_rows=12):
@@ -212,6 +228,19 @@ def fit_ols_safe(df: pd.DataFrame, target_col: str, min_rows=12):
     m=sm.OLS(y,X).fit()
     print(m.summary())
 
+# ---------- quality ----------
+def quality_pass(all_feat, bench):
+    """One vectorized check over every return series; hard-flagged months (unit slips, <= -100%) -> NaN;
+    split-sized moves are only reported: without volume or a split list they may be real crashes."""
+    rets=merge_monthly(bench+[ft[[f"{t}_ret"]] for t, ft in all_feat.items() if f"{t}_ret" in ft])
+    report, flags=validate_panel(rets, kind="return", freq="ME")
+    print("[Quality]", summarize(report))
+    _to_csv(report, os.path.join(OUT_DIR,"quality_report.csv"))
+    bad=hard_mask(flags)
+    for ft in all_feat.values():
+        for c in ft.columns.intersection(bad.columns):
+            ft.loc[bad[c].reindex(ft.index, fill_value=False).to_numpy(), c]=np.nan
+
 # ---------- main ----------
 def main():
     macro=macro_block(START, END)
@@ -220,7 +249,7 @@ def main():
     _, ixic = monthly_returns_for("^IXIC", START, END); ixic = ixic.rename(columns={ixic.columns[0]:"ixic_ret"}) if not ixic.empty else pd.DataFrame(index=macro.index, data={"ixic_ret":np.nan})
     _, xlk  = monthly_returns_for("XLK", START, END);    xlk  = xlk.rename(columns={xlk.columns[0]:"xlk_ret"})    if not xlk.empty  else pd.DataFrame(index=macro.index, data={"xlk_ret":np.nan})
     _, ai   = monthly_returns_for(AI_BASKET, START, END)
-    ai_eqw = ai.mean(axis=1).to_frame(name="ai_basket_ret") if not ai.empty else pd.DataFrame(index=macro.index, data={"ai_basket_ret":np.nan})
+    ai_eqw = basket_returns(ai, {"ai_basket_ret": AI_BASKET}) if not ai.empty else pd.DataFrame(index=macro.index, data={"ai_basket_ret":np.nan})
 
     _to_csv(ixic, os.path.join(OUT_DIR,"ixic_rets.csv"))
     _to_csv(xlk,  os.path.join(OUT_DIR,"xlk_rets.csv"))
@@ -233,11 +262,21 @@ def main():
         ft=build_features(t, macro, ixic, xlk, ai_eqw)
         diag(ft, f"{t} features")
         all_feat[t]=ft
+
+    quality_pass(all_feat, [ixic, xlk, ai_eqw])
+    for t, ft in all_feat.items():
         _to_csv(ft, os.path.join(OUT_DIR, f"{t}_features_enriched.csv"))
 
-    combined=pd.concat(all_feat, axis=1)
+    combined=merge_monthly(list(all_feat.values()), keys=list(all_feat))
     _to_csv(combined, os.path.join(OUT_DIR,"tech_features_combined.csv"))
 
+    # immutable point-in-time snapshot of this run (unchanged years are shared with earlier runs)
+    tables={"macro_monthly": macro, "tech_features_combined": combined,
+            "ixic_rets": qqq, "xlk_rets": xlk, "ai_basket_rets": ai_eqw}
+    tables.update({f"{t}_features_enriched": ft for t, ft in all_feat.items()})
+    version=FeatureStore(os.path.join(OUT_DIR, "store")).commit(tables, note=os.path.basename(__file__))
+    print("Feature store version →", version)
+
     # Optional OLS
     for t in TECH:
         print(f"\n=== {t} OLS (enriched) ===")
@@ -249,7 +288,9 @@ def main():
             fit_ols_safe(all_feat[t][[target]+keep], target)
 
     print("\nDone. CSVs in:", OUT_DIR)
-    print("Raw price cache in:", RAW_DIR)
+    RAW_CACHE.compact()
+    tot=RAW_CACHE.stats().loc["total"]
+    print(f"Raw price cache in: {RAW_DIR} ({tot['entries']} entries, {tot['bytes']/2**20:.1f} MB, hit rate {tot['hit_rate']})")
 
 if __name__=="__main__":
     main()
@@ -0,0 +1,75 @@
+import sys, os, argparse, time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+from src.data.feature_store import FeatureStore
+from src.features.backtest import MacroTilt, run_grid
+
+MONTHLY_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data_cache", "Monthly"))
+COMBINED_CSV = os.path.join(MONTHLY_DIR, "tech_features_combined.csv")
+OUT_CSV = os.path.join(MONTHLY_DIR, "backtest_macro_tilt.csv")
+STORE_DIR = os.path.join(MONTHLY_DIR, "store")
+
+SIGNALS = ["us10y_chg", "fedfunds_chg", "inflation_yoy", "unrate_chg"]
+
+def load_panel(path: str, as_of: str | None = None) -> pd.DataFrame:
+    """
+    Flat combined CSV (Rebuild_combined_from_features.py) or the per-ticker MultiIndex one (TechMonthly_*);
+    with `as_of`, the feature-store snapshot known on that date instead of the CSV.
+    """
+    if as_of:
+        df = FeatureStore(STORE_DIR).as_of("tech_features_combined", as_of)
+    else:
+        df = pd.read_csv(path, index_col=0, parse_dates=True)
+        if "ai_basket_ret" not in df.columns:
+            df = pd.read_csv(path, index_col=0, header=[0, 1], parse_dates=True)
+    if isinstance(df.columns, pd.MultiIndex):
+        df = df[df.columns.get_level_values(0)[0]]   # benchmark / macro columns repeat per ticker
+    df.index = pd.to_datetime(df.index, errors="coerce").to_period("M").to_timestamp("M")
+    return df[~df.index.duplicated(keep="last")].sort_index().apply(pd.to_numeric, errors="coerce")
+
+def main():
+    p = argparse.ArgumentParser(description="Grid-backtest macro-conditioned AI basket vs QQQ tilts")
+    p.add_argument("--risky", default="ai_basket_ret")
+    p.add_argument("--safe", default="ixic_ret", help="QQQ monthly returns")
+    p.add_argument("--signals", default=",".join(SIGNALS))
+    p.add_argument("--costs", default="0,10,25", help="transaction costs in bps of turnover")
+    p.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    p.add_argument("--top", type=int, default=15)
+    p.add_argument("--as-of", default=None, help="backtest on the feature-store snapshot known on this date")
+    args = p.parse_args()
+
+    panel = load_panel(COMBINED_CSV, args.as_of)
+    returns = panel[[args.risky, args.safe]].dropna()
+    signals = [s for s in args.signals.split(",") if s in panel.columns]
+    if returns.empty or not signals:
+        print("[fatal] need", args.risky, args.safe, "and at least one of", args.signals, "in", COMBINED_CSV)
+        sys.exit(1)
+    features = panel.loc[returns.index, signals]
+
+    grid = {
+        "signal": signals,
+        "lookback": [6, 12, 24, 36],
+        "threshold": np.round(np.arange(0.0, 2.01, 0.25), 2),
+        "tilt": [0.1, 0.2, 0.3, 0.4, 0.5],
+        "direction": [-1, 1],
+        "rebalance": [None, "Q", "Y"],
+        "cost_bps": [float(c) for c in args.costs.split(",")],
+    }
+    t0 = time.time()
+    res = run_grid(returns, MacroTilt(features), grid, workers=args.workers)
+    print(f"✅ {len(res)} variants over {len(returns)} months in {time.time() - t0:.1f}s")
+
+    static = run_grid(returns, MacroTilt(features), dict(grid, threshold=[np.inf], tilt=[0.0],
+                                                          direction=[-1], signal=signals[:1], lookback=[12]), workers=1)
+    print("\n50/50 benchmark:")
+    print(static[["rebalance", "cost_bps", "cagr", "ann_vol", "sharpe", "max_drawdown"]].to_string(index=False))
+    print(f"\nTop {args.top} by Sharpe:")
+    print(res.head(args.top).to_string(index=False))
+    res.to_csv(OUT_CSV, index=False)
+    print("Saved →", OUT_CSV)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import sys, os, argparse, time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.viz.reports import build_reports, chart_inputs, DEFAULT_CHARTS
+
+def main():
+    p = argparse.ArgumentParser(description="Render per-ticker charts in parallel and build static HTML reports")
+    p.add_argument("--tickers", type=str, default="AAPL,MSFT,NVDA,META",
+                   help="Comma-separated tickers, e.g. AAPL,MSFT")
+    p.add_argument("--tickers-file", type=str, default=None,
+                   help="optional file with one ticker per line (overrides --tickers)")
+    p.add_argument("--charts", type=str, default=",".join(DEFAULT_CHARTS),
+                   help="e.g. price_history,drawdown,vs_DGS10,vs_CPIAUCSL")
+    p.add_argument("--out", type=str, default="data_cache/reports",
+                   help="output directory (notebooks/reports holds the committed example images)")
+    p.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    p.add_argument("--force", action="store_true", help="re-render everything")
+    args = p.parse_args()
+
+    if args.tickers_file:
+        with open(args.tickers_file) as f:
+            tickers = [ln.strip().upper() for ln in f if ln.strip() and not ln.startswith("#")]
+    else:
+        tickers = [t.strip().upper() for t in args.tickers.split(",") if t.strip()]
+    charts = [c.strip() for c in args.charts.split(",") if c.strip()]
+    for c in charts:
+        try:
+            chart_inputs("", c)
+        except ValueError as e:
+            p.error(str(e))
+
+    t0 = time.time()
+    res = build_reports(tickers, charts, data_dir="data_cache", out_dir=args.out,
+                        workers=args.workers, force=args.force)
+    print(f"✅ rendered={res['rendered']} skipped(unchanged)={res['skipped']} "
+          f"failed={len(res['failed'])} in {time.time() - t0:.1f}s")
+    if res["missing"]:
+        print(f"⚠️ Missing cached inputs for {len(res['missing'])} chart(s), e.g. {res['missing'][:5]}")
+    print(f"Reports → {os.path.join(args.out, 'index.html')}")
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from src.data.yahoo import get_multiple_prices
+from src.viz.downsample import plot_series
 import matplotlib.pyplot as plt
 
 # fetch
@@ -10,8 +11,9 @@ aapl, msft = data["AAPL"], data["MSFT"]
 
 # plot
 plt.figure(figsize=(10,5))
-plt.plot(aapl["date"], aapl["close"], label="AAPL Close")
-plt.plot(msft["date"], msft["close"], label="MSFT Close")
+ax = plt.gca()
+plot_series(ax, aapl["date"], aapl["close"], label="AAPL Close")
+plot_series(ax, msft["date"], msft["close"], label="MSFT Close")
 plt.title("AAPL vs MSFT — Closing Price (1 Year)")
 plt.xlabel("Date")
 plt.ylabel("Price (USD)")
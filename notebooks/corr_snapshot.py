@@ -1,12 +1,22 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
 import pandas as pd
 
+from src.features.corr import cross_corr
+from src.features.ragged import pct_change, segment_offsets, sort_long, to_wide
+
 df = pd.read_csv("data_cache/tech_prices_merged.csv")
-df["date"] = pd.to_datetime(df["date"])
+df["date"] = pd.to_datetime(df["date"], utc=True)
+
+# daily returns per ticker on the long (ticker, date) rows — no price pivot
+df = sort_long(df)
+tickers, offsets = segment_offsets(df["ticker"].to_numpy())
+df["ret"] = pct_change(df["close"], offsets)
 
-# pivot close prices to wide, compute daily pct change, then correlation
-wide = df.pivot(index="date", columns="ticker", values="close").sort_index()
-rets = wide.pct_change().dropna()
-corr = rets.corr()
+# only the finished returns are aligned on dates; each pair uses the days both tickers traded
+rets = to_wide(df["ret"], df["date"], offsets, tickers).dropna(how="all")
+corr = cross_corr(rets, rets, min_obs=20)
 
 corr_path = "data_cache/tech_close_daily_corr.csv"
 corr.to_csv(corr_path)
@@ -0,0 +1,52 @@
+import sys, os, argparse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+
+from src.data.polygon_daily import DEFAULT_DAILY_DIR, DailyBarStore, last_session_date, plan_fetch, refresh_daily
+from src.data.universe import DEFAULT_UNIVERSE, load_universe
+
+def main():
+    p = argparse.ArgumentParser(description="Polygon daily bars for a universe (date-major or ticker-major fetch)")
+    p.add_argument("--tickers", default=None, help="comma-separated tickers (default: the universe file)")
+    p.add_argument("--universe", default=DEFAULT_UNIVERSE)
+    p.add_argument("--groups", default=None, help="comma-separated universe groups (default: all)")
+    p.add_argument("--start", default=(pd.Timestamp.today() - pd.DateOffset(years=5)).strftime("%Y-%m-%d"))
+    p.add_argument("--end", default=None, help="default: last session with published bars")
+    p.add_argument("--strategy", default="auto", choices=["auto", "date", "ticker"])
+    p.add_argument("--store", default=DEFAULT_DAILY_DIR)
+    p.add_argument("--plan", action="store_true", help="print the fetch plan and exit")
+    p.add_argument("--closes", default=None, help="also write the wide close panel to this parquet file")
+    args = p.parse_args()
+
+    if args.tickers:
+        tickers = [t.strip().upper() for t in args.tickers.split(",") if t.strip()]
+    else:
+        tickers = load_universe(args.universe, args.groups.split(",") if args.groups else None)
+    store = DailyBarStore(args.store)
+    end = args.end or last_session_date()
+
+    if args.plan:
+        plan = plan_fetch(tickers, args.start, end, store.through(), args.strategy)
+        print(plan)
+        if plan.dates:
+            print(f"  grouped sessions {plan.dates[0]:%Y-%m-%d} … {plan.dates[-1]:%Y-%m-%d}")
+        for t, (lo, hi) in list(plan.ticker_ranges.items())[:20]:
+            print(f"  {t}: {lo:%Y-%m-%d} … {hi:%Y-%m-%d}")
+        return
+
+    try:
+        out = refresh_daily(store, tickers, args.start, end, strategy=args.strategy)
+    except Exception as e:
+        print(f"⚠️ Refresh failed: {type(e).__name__}: {e}")
+        sys.exit(1)
+    print(f"✅ {len(tickers)} tickers through {pd.Timestamp(end):%Y-%m-%d}: {out['date_calls']} grouped + "
+          f"{out['ticker_calls']} per-ticker calls, {out['rows']} rows → {args.store}")
+    if out["split_refetch"]:
+        print("  refetched after splits:", ", ".join(out["split_refetch"]))
+    if args.closes:
+        store.closes(tickers, args.start, end).to_parquet(args.closes)
+        print("Saved →", args.closes)
+
+if __name__ == "__main__":
+    main()
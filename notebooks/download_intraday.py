@@ -0,0 +1,40 @@
+import sys, os, argparse, functools
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+
+from src.data.intraday import DEFAULT_INTRADAY_DIR, IntradayStore, monthly_bars, polygon_bar_chunks, yahoo_bar_chunks
+
+def main():
+    p = argparse.ArgumentParser(description="Intraday bars → month files + daily/monthly OHLC, VWAP, realized vol")
+    p.add_argument("--tickers", default="AAPL,MSFT,NVDA,META")
+    p.add_argument("--interval", default="1m", help="1m, 5m, 15m, 30m, 60m")
+    p.add_argument("--source", default="polygon", choices=["polygon", "yahoo"],
+                   help="yahoo only serves ~30 days of 1m / 730 days of 60m bars")
+    p.add_argument("--start", default=(pd.Timestamp.today() - pd.DateOffset(months=3)).strftime("%Y-%m-01"))
+    p.add_argument("--end", default=pd.Timestamp.today().strftime("%Y-%m-%d"))
+    p.add_argument("--session", default="regular", choices=["regular", "extended"])
+    args = p.parse_args()
+
+    fetch = polygon_bar_chunks if args.source == "polygon" else yahoo_bar_chunks
+    fetch = functools.partial(fetch, interval=args.interval)
+    store = IntradayStore(DEFAULT_INTRADAY_DIR, args.interval)
+    tickers = [t.strip().upper() for t in args.tickers.split(",") if t.strip()]
+
+    for t in tickers:
+        try:
+            written = store.ingest(t, fetch, args.start, args.end)
+        except Exception as e:
+            print(f"⚠️ Failed to fetch {t}: {type(e).__name__}: {e}")
+            continue
+        daily = store.daily(t, session=args.session, start=args.start, end=args.end)
+        if daily.empty:
+            print(f"⚠️ No {args.interval} bars for {t}")
+            continue
+        base = os.path.join(DEFAULT_INTRADAY_DIR, f"{t}_{args.interval}_{args.session}")
+        daily.to_csv(f"{base}_daily.csv")
+        monthly_bars(daily).to_csv(f"{base}_monthly.csv")
+        print(f"✅ {t}: {len(written)} month(s) fetched, {len(daily)} sessions -> {base}_daily.csv / _monthly.csv")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import sys, os, argparse, glob, time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+
+from src.features.leadlag import lead_lag
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data_cache"))
+OUT_CSV = os.path.join(DATA_DIR, "lead_lag_peaks.csv")
+PCT_CHANGE = {"CPIAUCSL"}   # index levels -> % change; rates / percentages -> difference
+
+def month_end_last(path: str, value: str) -> pd.Series:
+    df = pd.read_csv(path, usecols=["date", value])
+    df["date"] = pd.to_datetime(df["date"], utc=True, errors="coerce").dt.tz_localize(None)
+    s = df.dropna().set_index("date")[value].astype(float).sort_index()
+    return s.resample("ME").last()
+
+def main():
+    p = argparse.ArgumentParser(description="Lead-lag scan: monthly returns vs FRED indicator changes")
+    p.add_argument("--tickers", default=None, help="comma-separated (default: every data_cache/*_prices.csv)")
+    p.add_argument("--series", default=None, help="comma-separated FRED ids (default: every data_cache/fred_*.csv)")
+    p.add_argument("--max-lag", type=int, default=24, help="months in each direction")
+    p.add_argument("--min-obs", type=int, default=36, help="overlapping months required per lag")
+    p.add_argument("--top", type=int, default=20)
+    args = p.parse_args()
+
+    if args.tickers:
+        tickers = [t.strip().upper() for t in args.tickers.split(",") if t.strip()]
+    else:
+        tickers = sorted(os.path.basename(f)[:-len("_prices.csv")] for f in glob.glob(os.path.join(DATA_DIR, "*_prices.csv")))
+    if args.series:
+        series = [s.strip().upper() for s in args.series.split(",") if s.strip()]
+    else:
+        series = sorted(os.path.basename(f)[len("fred_"):-len(".csv")] for f in glob.glob(os.path.join(DATA_DIR, "fred_*.csv")))
+
+    closes = {t: month_end_last(os.path.join(DATA_DIR, f"{t}_prices.csv"), "close")
+              for t in tickers if os.path.exists(os.path.join(DATA_DIR, f"{t}_prices.csv"))}
+    macro = {s: month_end_last(os.path.join(DATA_DIR, f"fred_{s}.csv"), "value")
+             for s in series if os.path.exists(os.path.join(DATA_DIR, f"fred_{s}.csv"))}
+    if not closes or not macro:
+        print("[fatal] need cached prices (download_prices.py) and FRED series (download_fred.py) in", DATA_DIR)
+        sys.exit(1)
+
+    rets = pd.DataFrame(closes).sort_index().pct_change(fill_method=None)
+    changes = pd.DataFrame({s: v.pct_change(fill_method=None) * 100 if s in PCT_CHANGE else v.diff()
+                            for s, v in macro.items()}).reindex(rets.index)
+
+    t0 = time.time()
+    peaks = lead_lag(rets, changes, max_lag=args.max_lag, min_obs=args.min_obs)
+    print(f"✅ {len(closes)} tickers x {len(macro)} indicators x ±{args.max_lag} months "
+          f"in {time.time() - t0:.2f}s (lag > 0: indicator leads)")
+    print(peaks.head(args.top).round(3).to_string(index=False))
+    peaks.to_csv(OUT_CSV, index=False)
+    print("Saved →", OUT_CSV)
+
+if __name__ == "__main__":
+    main()
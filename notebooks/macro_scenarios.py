@@ -0,0 +1,76 @@
+import sys, os, argparse, time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+
+from src.features.scenarios import FactorModel, macro_factors, risk_report, simulate_scenarios
+
+MONTHLY_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data_cache", "Monthly"))
+MACRO_CSV = os.path.join(MONTHLY_DIR, "macro_monthly.csv")
+COMBINED_CSV = os.path.join(MONTHLY_DIR, "tech_features_combined.csv")
+OUT_CSV = os.path.join(MONTHLY_DIR, "scenario_risk.csv")
+
+AI_BASKET = ["NVDA","META","MSFT","GOOGL","AMD","AVGO"]
+BENCHMARKS = {"ixic_ret", "xlk_ret", "ai_basket_ret"}
+
+def _month_end(df: pd.DataFrame) -> pd.DataFrame:
+    df.index = pd.to_datetime(df.index, errors="coerce").to_period("M").to_timestamp("M")
+    return df[~df.index.duplicated(keep="last")].sort_index().apply(pd.to_numeric, errors="coerce")
+
+def load_returns(path: str) -> pd.DataFrame:
+    """<TICKER>_ret columns of the combined CSV (flat or per-ticker MultiIndex header) -> one column per ticker."""
+    df = pd.read_csv(path, index_col=0, parse_dates=True)
+    if not any(c.endswith("_ret") for c in df.columns):
+        df = pd.read_csv(path, index_col=0, header=[0, 1], parse_dates=True)
+        df.columns = df.columns.get_level_values(1)
+        df = df.loc[:, ~df.columns.duplicated()]
+    cols = [c for c in df.columns if c.endswith("_ret") and c not in BENCHMARKS]
+    out = _month_end(df[cols])
+    out.columns = [c[:-len("_ret")] for c in cols]
+    return out
+
+def parse_shocks(items) -> dict:
+    shocks = {}
+    for item in items or []:
+        name, _, value = item.partition("=")
+        shocks[name.strip()] = float(value)
+    return shocks
+
+def main():
+    p = argparse.ArgumentParser(description="Monte Carlo macro-shock VaR/CVaR per ticker and basket")
+    p.add_argument("--paths", type=int, default=1_000_000)
+    p.add_argument("--horizon", type=int, default=12, help="months")
+    p.add_argument("--method", choices=["bootstrap", "normal"], default="bootstrap")
+    p.add_argument("--block", type=int, default=3, help="bootstrap block length (months)")
+    p.add_argument("--lags", default="0,1,3")
+    p.add_argument("--ridge", type=float, default=0.0, help="beta shrinkage for collinear factors (0 = OLS)")
+    p.add_argument("--shock", action="append", metavar="FACTOR=CHANGE",
+                   help="e.g. us10y_chg=1.0 (+100bp DGS10 in month 1); repeatable")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = p.parse_args()
+
+    if not (os.path.exists(MACRO_CSV) and os.path.exists(COMBINED_CSV)):
+        print("[fatal] need", MACRO_CSV, "and", COMBINED_CSV, "(run TechMonthly_stable.py first)")
+        sys.exit(1)
+    factors = macro_factors(_month_end(pd.read_csv(MACRO_CSV, index_col=0, parse_dates=True)))
+    returns = load_returns(COMBINED_CSV)
+    model = FactorModel.fit(returns, factors, lags=[int(x) for x in args.lags.split(",")],
+                            ridge=args.ridge)
+    print("Betas:\n", model.table().round(4).to_string())
+
+    baskets = {"ai_basket": [t for t in AI_BASKET if t in model.tickers], "equal_all": model.tickers}
+    shocks = parse_shocks(args.shock)
+    t0 = time.time()
+    sims = simulate_scenarios(model, horizon=args.horizon, n_paths=args.paths, method=args.method,
+                              block=args.block, shocks=shocks, baskets=baskets, seed=args.seed,
+                              workers=args.workers)
+    report = risk_report(sims)
+    print(f"\n✅ {args.paths:,} paths x {args.horizon} months ({args.method}, shocks={shocks or 'none'}) "
+          f"in {time.time() - t0:.1f}s")
+    print(report.round(4).to_string())
+    report.to_csv(OUT_CSV)
+    print("Saved →", OUT_CSV)
+
+if __name__ == "__main__":
+    main()
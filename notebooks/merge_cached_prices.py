@@ -1,30 +1,53 @@
-import os, glob
-import pandas as pd
+import sys, os, glob, argparse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pyarrow.parquet as pq
+from src.data.merge_prices import merge_price_files
+from src.data.quality import flag_cells, summarize, validate_panel
+
+def validate_merged(path: str, tz: str = "America/New_York"):
+    """Quality pass over the merged closes (dates -> exchange-local days) -> report, flagged cells."""
+    long = pq.read_table(path, columns=["date", "ticker", "close", "volume"]).to_pandas()
+    long["date"] = long["date"].dt.tz_convert(tz).dt.tz_localize(None)
+    # keep repeated dates as separate rows so the duplicate check can see them
+    long["_n"] = long.groupby(["ticker", "date"], observed=True).cumcount()
+    wide = long.pivot_table(index=["date", "_n"], columns="ticker", values=["close", "volume"],
+                            aggfunc="last", observed=True)
+    wide.index = wide.index.get_level_values(0)
+    # volume moving by the inverse ratio is what tells an unadjusted split from a real gap
+    report, flags = validate_panel(wide["close"], kind="price", freq="B", volume=wide["volume"])
+    return report, flag_cells(flags)
 
 def main():
+    p = argparse.ArgumentParser(description="Stream-merge data_cache/*_prices.csv into one long-form dataset")
+    p.add_argument("--batch-rows", type=int, default=250_000,
+                   help="rows per Parquet row group (bounds peak memory)")
+    p.add_argument("--workers", type=int, default=4, help="parallel CSV parser threads")
+    p.add_argument("--no-csv", action="store_true",
+                   help="only write the Parquet file (skip tech_prices_merged.csv)")
+    p.add_argument("--no-validate", action="store_true",
+                   help="skip the data-quality pass (price_quality.csv / price_quality_flags.csv)")
+    args = p.parse_args()
+
     os.makedirs("data_cache", exist_ok=True)
     files = glob.glob("data_cache/*_prices.csv")
     if not files:
         print("⚠️ No cached CSVs found in data_cache/. Run download_prices.py first.")
         return
 
-    frames = []
-    for f in files:
-        ticker = os.path.basename(f).split("_")[0]
-        df = pd.read_csv(f)
-        df["ticker"] = ticker
-        frames.append(df)
-
-    out = pd.concat(frames, ignore_index=True)
-    # ensure consistent columns and order
-    cols = ["date","ticker","open","high","low","close","volume"]
-    out = out[cols]
-    out.sort_values(["ticker","date"], inplace=True)
+    out_path = "data_cache/tech_prices_merged.parquet"
+    csv_path = None if args.no_csv else "data_cache/tech_prices_merged.csv"
+    n = merge_price_files(files, out_path, csv_path=csv_path,
+                          batch_rows=args.batch_rows, workers=args.workers)
+    print(f"✅ Merged {len(files)} files ({n} rows) -> {out_path}" + (f" + {csv_path}" if csv_path else ""))
+    print(pq.ParquetFile(out_path).read_row_group(0).slice(0, 5).to_pandas())
 
-    out_path = "data_cache/tech_prices_merged.csv"
-    out.to_csv(out_path, index=False)
-    print(f"✅ Merged {len(files)} files -> {out_path}")
-    print(out.head())
+    if not args.no_validate and n:
+        report, cells = validate_merged(out_path)
+        report.to_csv("data_cache/price_quality.csv")
+        cells.to_csv("data_cache/price_quality_flags.csv", index=False)
+        print("[Quality]", summarize(report))
+        print("Saved → data_cache/price_quality.csv, data_cache/price_quality_flags.csv")
 
 if __name__ == "__main__":
     main()
@@ -5,6 +5,8 @@ import pandas as pd
 import matplotlib.pyplot as plt
 from src.data.yahoo import get_stock_prices
 from src.data.fred import get_dgs10, MissingApiKey
+from src.viz.downsample import plot_series
+from src.features.asof import align_asof
 
 # --- Fetch AAPL (1y daily) ---
 aapl = get_stock_prices("AAPL", period="1y", interval="1d")
@@ -22,18 +24,17 @@ except MissingApiKey:
 # --- Plot ---
 plt.figure(figsize=(10,6))
 ax1 = plt.gca()
-ax1.plot(aapl["date"], aapl["close"], label="AAPL Close (USD)")
+plot_series(ax1, aapl["date"], aapl["close"], label="AAPL Close (USD)")
 ax1.set_xlabel("Date")
 ax1.set_ylabel("AAPL Price (USD)")
 
 if dgs10 is not None:
-    # align to the AAPL window
-    start = aapl["date"].min()
-    end = aapl["date"].max()
-    dgs10_win = dgs10[(dgs10["date"] >= start) & (dgs10["date"] <= end)]
+    # DGS10 as of each AAPL trading day; bond-market holidays carry the prior
+    # close, anything older than 5 days is left as a gap
+    aligned = align_asof(pd.DatetimeIndex(aapl["date"]), {"DGS10": dgs10}, max_age="5D")
 
     ax2 = ax1.twinx()
-    ax2.plot(dgs10_win["date"], dgs10_win["value"], label="US 10Y Yield (DGS10)", linestyle="--")
+    plot_series(ax2, aligned.index, aligned["DGS10"], label="US 10Y Yield (DGS10)", linestyle="--")
     ax2.set_ylabel("Yield (%)")
     ax2.legend(loc="upper left")
 
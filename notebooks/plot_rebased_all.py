@@ -1,18 +1,24 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
 import pandas as pd
 import matplotlib.pyplot as plt
+from src.features.ragged import rebase, segment_offsets, sort_long
+from src.viz.downsample import plot_series
 
 df = pd.read_csv("data_cache/tech_prices_merged.csv")
 df["date"] = pd.to_datetime(df["date"])
 
-# pivot to wide for close prices
-wide = df.pivot(index="date", columns="ticker", values="close").sort_index()
-
-# rebase each series to 100 at the first available value
-rebased = wide.apply(lambda s: (s / s.dropna().iloc[0]) * 100, axis=0)
+# rebase each ticker to 100 at its first available close, on the long rows (no pivot)
+df = sort_long(df)
+tickers, offsets = segment_offsets(df["ticker"].to_numpy())
+rebased = rebase(df["close"], offsets)
+dates = df["date"].to_numpy()
 
 plt.figure(figsize=(10,6))
-for col in rebased.columns:
-    plt.plot(rebased.index, rebased[col], label=col)
+ax = plt.gca()
+for t, a, b in zip(tickers, offsets[:-1], offsets[1:]):
+    plot_series(ax, dates[a:b], rebased[a:b], label=t)
 
 plt.title("Tech Stocks — Rebased to 100 (Last ~1Y)")
 plt.xlabel("Date")
@@ -2,6 +2,7 @@ import sys, os, argparse
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from src.data.yahoo import get_stock_prices
+from src.viz.downsample import plot_series
 import matplotlib.pyplot as plt
 
 def main():
@@ -14,7 +15,7 @@ def main():
     df = get_stock_prices(args.ticker.upper(), period=args.period, interval=args.interval)
 
     plt.figure(figsize=(10,5))
-    plt.plot(df["date"], df["close"], label=f"{args.ticker.upper()} Close")
+    plot_series(plt.gca(), df["date"], df["close"], label=f"{args.ticker.upper()} Close")
     plt.title(f"{args.ticker.upper()} Closing Price ({args.period})")
     plt.xlabel("Date")
     plt.ylabel("Price (USD)")
@@ -0,0 +1,68 @@
+import sys, os, argparse, json, time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pandas as pd
+
+from src.features.lags import select_lags
+
+MONTHLY_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data_cache", "Monthly"))
+MACRO_CSV = os.path.join(MONTHLY_DIR, "macro_monthly.csv")
+COMBINED_CSV = os.path.join(MONTHLY_DIR, "tech_features_combined.csv")
+OUT_JSON = os.path.join(MONTHLY_DIR, "selected_lags.json")
+OUT_CSV = os.path.join(MONTHLY_DIR, "lag_scores.csv")
+
+# same macro columns the TechMonthly scripts lag
+BASE = ["inflation_yoy","us10y","us10y_chg","fed_funds_rate","fedfunds_chg","unemployment_rate","unrate_chg"]
+BENCHMARKS = {"ixic_ret", "xlk_ret", "ai_basket_ret"}
+LAGS = [1,3,6]
+
+def _month_end(df: pd.DataFrame) -> pd.DataFrame:
+    df.index = pd.to_datetime(df.index, errors="coerce").to_period("M").to_timestamp("M")
+    return df[~df.index.duplicated(keep="last")].sort_index().apply(pd.to_numeric, errors="coerce")
+
+def load_returns(path: str) -> pd.DataFrame:
+    """<TICKER>_ret columns of the combined CSV (flat or per-ticker MultiIndex header) -> one column per ticker."""
+    df = pd.read_csv(path, index_col=0, parse_dates=True)
+    if not any(c.endswith("_ret") for c in df.columns):
+        df = pd.read_csv(path, index_col=0, header=[0, 1], parse_dates=True)
+        df.columns = df.columns.get_level_values(1)
+        df = df.loc[:, ~df.columns.duplicated()]
+    cols = [c for c in df.columns if c.endswith("_ret") and c not in BENCHMARKS]
+    out = _month_end(df[cols])
+    out.columns = [c[:-len("_ret")] for c in cols]
+    return out
+
+def main():
+    p = argparse.ArgumentParser(description="Select macro lag structure per ticker by time-series CV")
+    p.add_argument("--max-lag", type=int, default=24)
+    p.add_argument("--max-size", type=int, default=3, help="max number of lags per candidate set")
+    p.add_argument("--folds", type=int, default=5)
+    p.add_argument("--min-train", type=int, default=36, help="months in the first training window")
+    p.add_argument("--ridge", type=float, default=1e-6, help="shrinkage as a fraction of column variance")
+    p.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = p.parse_args()
+
+    if not (os.path.exists(MACRO_CSV) and os.path.exists(COMBINED_CSV)):
+        print("[fatal] need", MACRO_CSV, "and", COMBINED_CSV, "(run TechMonthly_stable.py first)")
+        sys.exit(1)
+    macro = _month_end(pd.read_csv(MACRO_CSV, index_col=0, parse_dates=True))
+    features = macro[[c for c in BASE if c in macro.columns]]
+    returns = load_returns(COMBINED_CSV)
+
+    t0 = time.time()
+    best, scores = select_lags(returns, features, pool=range(1, args.max_lag + 1), max_size=args.max_size,
+                               baseline=LAGS, n_folds=args.folds, min_train=args.min_train,
+                               ridge=args.ridge, workers=args.workers)
+    n_sets = scores["lags"].nunique()
+    print(f"✅ {n_sets} lag sets x {len(best)} tickers scored in {time.time() - t0:.1f}s")
+    print(best.to_string())
+
+    selected = {t: row["lags"] for t, row in best.iterrows() if row["lags"]}
+    with open(OUT_JSON, "w") as f:
+        json.dump(selected, f, indent=2)
+    scores.to_csv(OUT_CSV, index=False)
+    print("Saved →", OUT_JSON)
+    print("Saved →", OUT_CSV)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import sys, os, argparse, glob, multiprocessing as mp
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+from src.agent.workqueue import make_shards, open_queue, run_worker
+from src.data.universe import DEFAULT_UNIVERSE, load_universe
+from src.data.yahoo import get_stock_prices
+from src.features.corr import cross_corr
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(REPO_ROOT, "data_cache")
+OUT_DIR = os.path.join(DATA_DIR, "universe")
+PARTS_DIR = os.path.join(OUT_DIR, "parts")
+DEFAULT_QUEUE = os.path.join(OUT_DIR, "queue.sqlite")
+FRED_SERIES = ["DGS10", "FEDFUNDS", "CPIAUCSL", "UNRATE"]
+PCT_CHANGE = {"CPIAUCSL"}
+STAGES = ["returns", "model"]
+
+_MACRO = None
+
+def macro_changes() -> pd.DataFrame:
+    """Month-end changes of the cached FRED series (loaded once per worker process)."""
+    global _MACRO
+    if _MACRO is None:
+        cols = {}
+        for s in FRED_SERIES:
+            path = os.path.join(DATA_DIR, f"fred_{s}.csv")
+            if not os.path.exists(path):
+                continue
+            df = pd.read_csv(path, parse_dates=["date"]).dropna()
+            v = df.set_index("date")["value"].astype(float).sort_index().resample("ME").last()
+            cols[s] = v.pct_change(fill_method=None) * 100 if s in PCT_CHANGE else v.diff()
+        _MACRO = pd.DataFrame(cols)
+    return _MACRO
+
+def _write_part(df: pd.DataFrame, stage: str, shard: int):
+    os.makedirs(os.path.join(PARTS_DIR, stage), exist_ok=True)
+    path = os.path.join(PARTS_DIR, stage, f"shard-{shard:06d}.parquet")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)     # a rerun of the shard (crashed worker) just overwrites it
+
+def process_shard(shard: int, tickers, period: str = "5y", max_age_hours: float = 24):
+    # fetch: month-end closes
+    closes = {}
+    for t in tickers:
+        try:
+            df = get_stock_prices(t, period=period, use_cache=True, max_age_hours=max_age_hours)
+        except Exception as e:
+            print(f"⚠️ {t}: {type(e).__name__}: {e}")
+            continue
+        if df.empty:
+            continue
+        d = pd.to_datetime(df["date"], utc=True).dt.tz_convert("America/New_York").dt.tz_localize(None)
+        closes[t] = pd.Series(df["close"].to_numpy(dtype=float), index=d).resample("ME").last()
+    if not closes:
+        raise RuntimeError(f"no prices for any of {len(tickers)} tickers")
+
+    # features: monthly returns, trailing 12m volatility and momentum
+    px = pd.DataFrame(closes).sort_index()
+    rets = px.pct_change(fill_method=None)
+    feats = pd.concat({
+        "ret": rets,
+        "vol_12m": rets.rolling(12, min_periods=6).std() * np.sqrt(12),
+        "mom_12m": px.pct_change(12, fill_method=None),
+    }, axis=1).stack(level=1, future_stack=True).dropna(how="all")
+    feats.index.names = ["date", "ticker"]
+    _write_part(feats.reset_index(), "returns", shard)
+
+    # model: correlation with contemporaneous and one-month-lagged macro changes
+    macro = macro_changes().reindex(rets.index)
+    rows = []
+    if not macro.empty:
+        valid = rets.notna().to_numpy(dtype=float)
+        for lag in (0, 1):
+            m = macro.shift(lag)
+            c = cross_corr(rets, m, min_obs=24)
+            n = pd.DataFrame((valid.T @ m.notna().to_numpy(dtype=float)).astype(np.int64), index=c.index, columns=c.columns)
+            long = c.stack(future_stack=True).rename("corr").to_frame().join(n.stack(future_stack=True).rename("n_obs"))
+            long.index.names = ["ticker", "indicator"]
+            rows.append(long.reset_index().assign(lag=lag))
+    model = pd.concat(rows, ignore_index=True) if rows else pd.DataFrame(columns=["ticker", "indicator", "corr", "n_obs", "lag"])
+    _write_part(model, "model", shard)
+
+def _worker(queue_path: str, lease: float, period: str, max_age_hours: float):
+    queue = open_queue(queue_path)
+    try:
+        run_worker(queue, lambda s, t: process_shard(s, t, period, max_age_hours), lease=lease)
+    finally:
+        queue.close()
+
+def merge_parts():
+    for stage in STAGES:
+        files = sorted(glob.glob(os.path.join(PARTS_DIR, stage, "shard-*.parquet")))
+        if not files:
+            print(f"⚠️ no {stage} parts in {PARTS_DIR}")
+            continue
+        df = pd.concat([pd.read_parquet(f) for f in files], ignore_index=True)
+        out = os.path.join(OUT_DIR, f"universe_{stage}.parquet")
+        df.to_parquet(out, index=False)
+        print(f"✅ {stage}: {len(files)} shards, {len(df)} rows → {out}")
+
+def main():
+    p = argparse.ArgumentParser(description="Sharded fetch → features → model over a ticker universe")
+    p.add_argument("command", choices=["init", "work", "status", "merge"])
+    p.add_argument("--universe", default=os.path.join(REPO_ROOT, DEFAULT_UNIVERSE),
+                   help="CSV with a ticker column, or one ticker per line")
+    p.add_argument("--groups", default=None, help="comma-separated universe groups (default: all)")
+    p.add_argument("--queue", default=DEFAULT_QUEUE,
+                   help="*.sqlite for one machine, a directory on a shared file system for several")
+    p.add_argument("--shard-size", type=int, default=25)
+    p.add_argument("--reset", action="store_true", help="init: drop the existing queue state")
+    p.add_argument("--procs", type=int, default=1, help="work: worker processes on this machine")
+    p.add_argument("--lease", type=float, default=900, help="seconds before a silent worker's shard is reclaimed")
+    p.add_argument("--period", default="5y")
+    p.add_argument("--max-age", type=float, default=24, help="hours a cached price CSV stays fresh")
+    args = p.parse_args()
+    # relative paths mean the caller's directory, for every command (`work` changes directory)
+    args.queue, args.universe = os.path.abspath(args.queue), os.path.abspath(args.universe)
+
+    if args.command == "init":
+        groups = args.groups.split(",") if args.groups else None
+        tickers = load_universe(args.universe, groups)
+        queue = open_queue(args.queue)
+        n = queue.seed(make_shards(tickers, args.shard_size), reset=args.reset)
+        print(f"✅ {len(tickers)} tickers → {n} new shards" if n else "Queue already seeded (use --reset to start over)")
+        print(queue.counts())
+    elif args.command == "work":
+        os.chdir(REPO_ROOT)    # yahoo CSV cache lives in ./data_cache
+        procs = [mp.Process(target=_worker, args=(args.queue, args.lease, args.period, args.max_age))
+                 for _ in range(args.procs)]
+        for pr in procs:
+            pr.start()
+        for pr in procs:
+            pr.join()
+        print(open_queue(args.queue).counts())
+    elif args.command == "status":
+        queue = open_queue(args.queue)
+        print(queue.counts())
+        for shard, err in queue.failures():
+            print(f"  failed shard {shard}: {err}")
+    else:
+        counts = open_queue(args.queue).counts()
+        if set(counts) - {"done"}:
+            print(f"⚠️ not all shards are done yet: {counts}")
+        merge_parts()
+
+if __name__ == "__main__":
+    main()
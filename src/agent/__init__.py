@@ -0,0 +1,2 @@
+# Research agent (plan -> gather -> analyze -> reflect -> learn).
+from .research_agent import InvestmentResearchAgent
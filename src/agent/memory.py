@@ -0,0 +1,254 @@
+"""
+Persistent agent memory in an embedded SQLite file.
+
+Every analysis is stored with its plan, insight, reflection, the numeric
+correlation results and an `analysis_key`: a hash of the analysis version,
+ticker(s), indicators and the content fingerprints of the input frames. The
+agent looks the key up before computing; a hit means the exact analysis was
+already run on the same data and the stored result is returned as-is.
+
+Tables
+    research      one row per analysis (indexed by analysis_key, ticker, created_at)
+    correlations  one row per (research, ticker, indicator) (indexed by ticker/indicator/date)
+    notes         free-form notes per symbol (same API as the JSON MemoryStore
+                  in Final_Investment_Agent.ipynb)
+
+Retention keeps at most `max_records` research rows (oldest are dropped,
+their correlations cascade) and as many notes, and optionally drops rows
+older than `max_age_days`.
+"""
+
+import datetime as dt
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List
+
+import pandas as pd
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS research (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at    TEXT NOT NULL,
+    kind          TEXT NOT NULL,
+    ticker        TEXT NOT NULL,
+    analysis_key  TEXT NOT NULL,
+    status        TEXT,
+    plan          TEXT,
+    insight       TEXT,
+    reflection    TEXT,
+    result        TEXT,
+    fingerprints  TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_research_key ON research(analysis_key);
+CREATE INDEX IF NOT EXISTS ix_research_ticker ON research(ticker, created_at);
+CREATE INDEX IF NOT EXISTS ix_research_created ON research(created_at);
+
+CREATE TABLE IF NOT EXISTS correlations (
+    research_id  INTEGER NOT NULL REFERENCES research(id) ON DELETE CASCADE,
+    created_at   TEXT NOT NULL,
+    ticker       TEXT NOT NULL,
+    indicator    TEXT NOT NULL,
+    corr         REAL,
+    latest       REAL,
+    n_obs        INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_corr_ticker ON correlations(ticker, indicator, created_at);
+CREATE INDEX IF NOT EXISTS ix_corr_indicator ON correlations(indicator, created_at);
+CREATE INDEX IF NOT EXISTS ix_corr_research ON correlations(research_id);
+
+CREATE TABLE IF NOT EXISTS notes (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at  TEXT NOT NULL,
+    symbol      TEXT NOT NULL,
+    note        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_notes_symbol ON notes(symbol, id);
+"""
+
+
+def _now() -> str:
+    return dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def analysis_key(version: str, tickers: Iterable[str], indicators: Iterable[str],
+                 fingerprints: Dict[str, str]) -> str:
+    """Stable hash identifying one analysis on one exact set of inputs."""
+    payload = json.dumps(
+        {"v": version, "tickers": list(tickers), "indicators": list(indicators),
+         "inputs": dict(sorted(fingerprints.items()))},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class MemoryStore:
+    """
+    SQLite-backed research memory (safe to share between threads).
+
+    Args:
+        path (str): Database file (":memory:" for a throwaway store).
+        max_records (int): Research rows (and notes) kept; the oldest are deleted beyond this.
+        max_age_days (float): Optional age limit for research rows and notes.
+    """
+
+    def __init__(self, path: str = "data_cache/agent_memory.sqlite",
+                 max_records: int = 5000, max_age_days: float | None = None):
+        self.path = path
+        self.max_records = max_records
+        self.max_age_days = max_age_days
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM research").fetchone()[0]
+
+    # -------- analyses --------
+    def find(self, key: str) -> dict | None:
+        """Most recent stored result for an analysis key, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, created_at, result FROM research "
+                "WHERE analysis_key = ? AND result IS NOT NULL ORDER BY id DESC LIMIT 1",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        result = json.loads(row[2])
+        result.update(memory_id=row[0], stored_at=row[1])
+        return result
+
+    def add(self, kind: str, tickers: List[str], key: str, plan: dict, result: dict,
+            correlations: pd.DataFrame, latest: Dict[str, float] | None = None,
+            n_obs: Dict[str, int] | None = None, fingerprints: Dict[str, str] | None = None,
+            insight: str | None = None) -> int:
+        """
+        Store one analysis. `correlations` is a (tickers x indicators) table;
+        `result` must be JSON-serialisable and is returned verbatim by `find`.
+        Returns the new research id.
+        """
+        now = _now()
+        latest, n_obs = latest or {}, n_obs or {}
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO research (created_at, kind, ticker, analysis_key, status, plan, insight, "
+                "result, fingerprints) VALUES (?, ?, ?, ?, 'pending', ?, ?, ?, ?)",
+                (now, kind, ",".join(tickers), key, json.dumps(plan), insight,
+                 json.dumps(result), json.dumps(fingerprints or {})),
+            )
+            rid = cur.lastrowid
+            values = correlations.to_numpy(dtype=float)
+            self._conn.executemany(
+                "INSERT INTO correlations (research_id, created_at, ticker, indicator, corr, latest, n_obs) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(rid, now, str(t), str(ind), None if pd.isna(values[i, j]) else float(values[i, j]),
+                  latest.get(ind), None if n_obs.get(t) is None else int(n_obs[t]))
+                 for i, t in enumerate(correlations.index)
+                 for j, ind in enumerate(correlations.columns)],
+            )
+            self._enforce_retention()
+        return rid
+
+    def reflect(self, ticker: str, insight: str, reflection: str, status: str, plan: dict | None = None) -> int:
+        """
+        Attach a reflection to the latest analysis of `ticker` that produced `insight`;
+        if there is none (insight produced elsewhere), store a bare record instead.
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT id FROM research WHERE ticker = ? AND insight = ? ORDER BY id DESC LIMIT 1",
+                (ticker, insight),
+            ).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE research SET reflection = ?, status = ? WHERE id = ?",
+                                   (reflection, status, row[0]))
+                return row[0]
+            cur = self._conn.execute(
+                "INSERT INTO research (created_at, kind, ticker, analysis_key, status, plan, insight, reflection) "
+                "VALUES (?, 'note', ?, '', ?, ?, ?, ?)",
+                (_now(), ticker, status, json.dumps(plan or {}), insight, reflection),
+            )
+            self._enforce_retention()
+            return cur.lastrowid
+
+    def records(self, ticker: str | None = None, limit: int = 20) -> pd.DataFrame:
+        """Latest research rows (optionally for one ticker) without the stored payloads."""
+        sql = "SELECT id, created_at, kind, ticker, status, reflection FROM research"
+        args: list = []
+        if ticker:
+            sql += " WHERE ticker = ?"
+            args.append(ticker.upper())
+        sql += " ORDER BY id DESC LIMIT ?"
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=args + [limit])
+
+    def history(self, ticker: str | None = None, indicator: str | None = None,
+                since: str | None = None, limit: int = 1000) -> pd.DataFrame:
+        """Stored correlation results, newest first, filtered by ticker / indicator / date."""
+        where, args = [], []
+        if ticker:
+            where.append("ticker = ?")
+            args.append(ticker.upper())
+        if indicator:
+            where.append("indicator = ?")
+            args.append(indicator.upper())
+        if since:
+            where.append("created_at >= ?")
+            args.append(str(since))
+        sql = "SELECT research_id, created_at, ticker, indicator, corr, latest, n_obs FROM correlations"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC, research_id DESC LIMIT ?"
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=args + [limit])
+
+    # -------- notes (compatible with the notebook's JSON MemoryStore) --------
+    def add_note(self, symbol: str, note: str):
+        """Adds a new memory note for a given stock symbol."""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO notes (created_at, symbol, note) VALUES (?, ?, ?)",
+                               (_now(), symbol.upper(), note))
+            self._enforce_retention()
+        print(f"   - Memory added for {symbol.upper()}")
+
+    def get_notes(self, symbol: str, last_n: int = 5) -> str:
+        """Retrieves the last N notes for a symbol as a single string."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT created_at, note FROM notes WHERE symbol = ? ORDER BY id DESC LIMIT ?",
+                (symbol.upper(), last_n),
+            ).fetchall()
+        if not rows:
+            return "No past notes found for this symbol."
+        return "### Past Analysis Notes:\n" + "\n".join(f"- {ts} UTC: {n}" for ts, n in reversed(rows))
+
+    # -------- retention --------
+    def _enforce_retention(self):
+        """Called inside a write transaction."""
+        if self.max_age_days is not None:
+            cutoff = (dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=self.max_age_days)).strftime("%Y-%m-%d %H:%M:%S")
+            self._conn.execute("DELETE FROM research WHERE created_at < ?", (cutoff,))
+            self._conn.execute("DELETE FROM notes WHERE created_at < ?", (cutoff,))
+        if self.max_records:
+            self._conn.execute(
+                "DELETE FROM research WHERE id <= ("
+                "SELECT id FROM research ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (self.max_records,),
+            )
+            self._conn.execute(
+                "DELETE FROM notes WHERE id <= ("
+                "SELECT id FROM notes ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (self.max_records,),
+            )
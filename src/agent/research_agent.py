@@ -0,0 +1,505 @@
+"""
+InvestmentResearchAgent, packaged from notebooks/final_integrated_agent.ipynb.
+
+The execute phase gathers stock prices, every macro series and news
+concurrently on a thread pool through the cached data layer (src.data), so a
+research cycle costs about one slowest round-trip instead of six sequential
+ones, and nothing at all when the caches are warm.
+"""
+
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from ..features.asof import align_asof
+from ..features.corr import cross_corr
+from ..features.leadlag import lead_lag
+from ..data.fingerprint import frame_fingerprint
+from ..data.fred import get_fred_series, MissingApiKey
+from ..data.news import get_news
+from ..data.yahoo import get_stock_prices
+from .memory import MemoryStore, analysis_key
+from .sentiment import SentimentStore, refresh_sentiment
+
+MACRO_INDICATORS = ["DGS10", "FEDFUNDS", "CPIAUCSL", "UNRATE"]
+# upper-case words in a topic that are not tickers
+_NOT_TICKERS = {"US", "USA", "VS", "AND", "THE", "GDP", "CPI", "FED", "AI", "ETF"}
+MIN_OBS = 20
+# lead-lag scan on monthly returns vs indicator changes: +/- months, minimum overlapping months
+LEAD_LAG_MONTHS = 12
+LEAD_LAG_MIN_OBS = 24
+# bump when the analysis logic changes so stored results are not reused
+ANALYSIS_VERSION = "3"
+
+
+class InvestmentResearchAgent:
+    """
+    Autonomous agent designed for financial and macroeconomic research.
+
+    This agent integrates stock data with key macroeconomic indicators
+    from the FRED API, performs correlation analysis, and includes
+    self-reflection and memory mechanisms for learning from research outcomes.
+
+    Attributes:
+        memory (MemoryStore): Persistent store of past analyses and their outcomes;
+            an analysis already run on identical data is returned from it.
+        fred_api_key (str): FRED API key (falls back to FRED_API_KEY / cached CSVs).
+        news_api_key (str): NewsAPI key (falls back to NEWS_API_KEY; news is optional).
+        macro_indicators (list): A list of FRED series IDs for macroeconomic indicators.
+    """
+
+    def __init__(self, fred_api_key: str | None = None, news_api_key: str | None = None,
+                 period: str = "5y", max_workers: int = 8,
+                 memory_path: str | None = "data_cache/agent_memory.sqlite",
+                 sentiment_path: str | None = "data_cache/news_sentiment.sqlite",
+                 macro_max_age: dict | None = None):
+        """
+        Initializes the agent.
+
+        Args:
+            fred_api_key (str): Your FRED API key.
+            news_api_key (str): Your NewsAPI key.
+            period (str): Yahoo Finance history window for prices.
+            max_workers (int): Threads used to gather data concurrently.
+            memory_path (str): SQLite memory file (None keeps memory in-process only).
+            sentiment_path (str): SQLite article/sentiment cache (None: in-process only).
+            macro_max_age (dict): Staleness limit per FRED series when aligning onto
+                trading days, e.g. {'CPIAUCSL': '45D'} (default: inferred per series).
+        """
+        self.fred_api_key = fred_api_key
+        self.news_api_key = news_api_key
+        self.period = period
+        self.max_workers = max_workers
+        self.memory = MemoryStore(memory_path or ":memory:")
+        self.sentiment = SentimentStore(sentiment_path or ":memory:")
+        self.macro_indicators = list(MACRO_INDICATORS)
+        self.macro_max_age = macro_max_age
+
+    # -------- plan --------
+    def plan_research(self, topic: str) -> dict:
+        """
+        Generates a research plan based on the provided topic.
+
+        The plan extracts the ticker symbol from the topic and sets up a plan
+        to analyze this ticker against key macro indicators.
+
+        Args:
+            topic (str): The research topic (e.g., "NVDA vs. the US Economy").
+
+        Returns:
+            dict: A dictionary representing the research plan.
+        """
+        print(f"-> Planning research for: {topic}")
+        ticker = topic.split(" ")[0].strip(",.").upper()
+        plan = {"ticker": ticker}
+        print(f"   - Plan created: Analyze {ticker} against all key macro indicators.")
+        return plan
+
+    def plan_batch(self, topic: str) -> dict:
+        """
+        Plans research for every ticker named in a topic, e.g.
+        "Compare NVDA, AMD, and JPM against the US Economy" -> ['NVDA', 'AMD', 'JPM'].
+
+        Tickers are the upper-case words of the topic (macro words like US/CPI
+        excluded); if there are none, the first word is used as in `plan_research`.
+        """
+        print(f"-> Planning batch research for: {topic}")
+        tickers = [w for w in re.findall(r"\b[A-Z][A-Z0-9.\-]{0,5}\b", topic) if w not in _NOT_TICKERS]
+        tickers = list(dict.fromkeys(tickers)) or [topic.split(" ")[0].strip(",.").upper()]
+        print(f"   - Plan created: Analyze {len(tickers)} tickers ({', '.join(tickers[:10])}"
+              f"{', ...' if len(tickers) > 10 else ''}) against all key macro indicators.")
+        return {"tickers": tickers}
+
+    # -------- gather --------
+    def _fetch_prices(self, ticker: str) -> pd.DataFrame:
+        try:
+            df = get_stock_prices(ticker, period=self.period, interval="1d", use_cache=True)
+        except Exception as e:
+            print(f"Error fetching stock data for {ticker}: {e}")
+            return pd.DataFrame()
+        if df.empty:
+            return df
+        df = df.copy()
+        # daily bars: compare on calendar dates (FRED dates are tz-naive)
+        df["date"] = pd.to_datetime(df["date"], utc=True).dt.tz_localize(None).dt.normalize()
+        return df
+
+    def _fetch_macro(self, series_id: str) -> pd.DataFrame:
+        try:
+            df = get_fred_series(series_id, use_cache=True, api_key=self.fred_api_key)
+        except MissingApiKey as e:
+            print(f"Skipping {series_id}: {e}")
+            return pd.DataFrame()
+        except Exception as e:
+            print(f"Error fetching FRED data for {series_id}: {e}")
+            return pd.DataFrame()
+        return df.rename(columns={"value": series_id.lower()})[["date", series_id.lower()]]
+
+    def _fetch_news(self, ticker: str, api_key: str | None = None) -> pd.DataFrame:
+        return get_news(ticker, api_key or self.news_api_key)
+
+    def gather_data(self, plan: dict) -> dict:
+        """
+        Fetches prices, every macro series and news concurrently.
+
+        Returns:
+            dict: {'prices': DataFrame, 'macro': {series_id: DataFrame}, 'news': DataFrame}
+        """
+        ticker = plan["ticker"]
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as ex:
+            prices = ex.submit(self._fetch_prices, ticker)
+            macro = {s: ex.submit(self._fetch_macro, s) for s in self.macro_indicators}
+            news = ex.submit(self._fetch_news, ticker)
+            data = {
+                "prices": prices.result(),
+                "macro": {s: f.result() for s, f in macro.items()},
+                "news": news.result(),
+            }
+        print(f"   - Gathered {2 + len(macro)} sources concurrently in {time.perf_counter() - t0:.2f}s")
+        return data
+
+    def gather_batch(self, plan: dict) -> dict:
+        """
+        Fetches every macro series once and the prices of all tickers, concurrently.
+
+        Returns:
+            dict: {'prices': {ticker: DataFrame}, 'macro': {series_id: DataFrame}}
+        """
+        tickers = plan["tickers"]
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as ex:
+            macro = {s: ex.submit(self._fetch_macro, s) for s in self.macro_indicators}
+            prices = {t: ex.submit(self._fetch_prices, t) for t in tickers}
+            data = {
+                "prices": {t: f.result() for t, f in prices.items()},
+                "macro": {s: f.result() for s, f in macro.items()},
+            }
+        print(f"   - Gathered {len(tickers)} price histories + {len(macro)} macro series "
+              f"in {time.perf_counter() - t0:.2f}s")
+        return data
+
+    def _fingerprints(self, data: dict) -> dict:
+        """Content hashes of every gathered input frame plus alignment settings (the memory key)."""
+        fps = {"config:macro_max_age": repr(sorted((self.macro_max_age or {}).items()))}
+        prices = data["prices"]
+        for t, df in (prices.items() if isinstance(prices, dict) else [("", prices)]):
+            fps[f"prices:{t}"] = frame_fingerprint(df)
+        for s, df in data["macro"].items():
+            fps[f"macro:{s}"] = frame_fingerprint(df)
+        if "news" in data:
+            fps["news"] = frame_fingerprint(data["news"])
+        return fps
+
+    def _monthly_changes(self, macro: dict) -> pd.DataFrame:
+        """Month-end change of every indicator (CPIAUCSL as % change, the rest as differences)."""
+        out = {}
+        for s, v in macro.items():
+            m = v.set_axis(pd.to_datetime(v.index)).sort_index().resample("ME").last()
+            out[s] = m.pct_change(fill_method=None) * 100 if s == "CPIAUCSL" else m.diff()
+        return pd.DataFrame(out)
+
+    def lead_lags(self, prices: pd.DataFrame, macro: dict) -> pd.DataFrame:
+        """
+        Peak lead-lag (`features.leadlag`) of month-end returns of every price column
+        against monthly indicator changes, within +/- LEAD_LAG_MONTHS.
+        """
+        rets = prices.resample("ME").last().pct_change(fill_method=None)
+        changes = self._monthly_changes(macro).reindex(rets.index)
+        return lead_lag(rets, changes, max_lag=LEAD_LAG_MONTHS, min_obs=LEAD_LAG_MIN_OBS)
+
+    @staticmethod
+    def _describe_lead(ticker: str, series_id: str, lag: int, corr: float, corr0: float) -> str:
+        if lag > 0:
+            head = f"{series_id} changes lead {ticker} returns by {lag} month(s)"
+        elif lag < 0:
+            head = f"{ticker} returns lead {series_id} changes by {-lag} month(s)"
+        else:
+            head = f"{series_id}: strongest at lag 0"
+        return f"- {head} (r={corr:+.3f}; contemporaneous {corr0:+.3f})"
+
+    # -------- execute --------
+    def analyze(self, plan: dict) -> dict:
+        """
+        Gathers data, aligns the macro series onto the trading days and computes
+        correlations. If memory holds the same analysis on identical inputs (same
+        content fingerprints), the stored result is returned instead of recomputing.
+
+        Returns:
+            dict: ticker, correlations {series_id: float}, latest {series_id: float},
+                  n_obs, lead_lag {series_id: {lag, corr, n_obs}} (lag > 0: the indicator leads),
+                  headlines (list[str]), sentiment (when there is news) and the markdown `insight`
+                  (an error message when data is missing).
+        """
+        ticker = plan["ticker"]
+        print(f"-> Executing multi-indicator analysis for {ticker}...")
+        data = self.gather_data(plan)
+        # fold new articles into the cached sentiment before anything else
+        self.sentiment.ingest({ticker: data["news"]})
+        fps = self._fingerprints(data)
+        key = analysis_key(ANALYSIS_VERSION, [ticker], self.macro_indicators, fps)
+        stored = self.memory.find(key)
+        if stored is not None:
+            print(f"   - Same analysis on identical data found in memory ({stored['stored_at']} UTC); reusing it.")
+            return stored
+        result = {"ticker": ticker, "correlations": {}, "latest": {}, "n_obs": 0, "lead_lag": {}, "headlines": []}
+
+        stock_df = data["prices"]
+        if stock_df.empty:
+            result["insight"] = f"Error: Could not fetch stock price data for {ticker}."
+            return result
+        macro = {s: df.set_index("date")[s.lower()] for s, df in data["macro"].items() if not df.empty}
+        if not macro:
+            result["insight"] = "Error: Could not fetch any macroeconomic data from FRED."
+            return result
+
+        # every series as of each trading day (stale values expire), in one pass
+        close = stock_df.set_index("date")["close"].sort_index()
+        close = close[~close.index.duplicated(keep="last")]
+        full_close = close
+        levels = align_asof(close.index, macro, max_age=self.macro_max_age)
+        rows = levels.notna().all(axis=1).to_numpy() & close.notna().to_numpy()
+        close, levels = close[rows], levels[rows]
+
+        if len(close) < MIN_OBS:
+            result["insight"] = "Error: Insufficient overlapping data for analysis."
+            return result
+        result["n_obs"] = len(close)
+
+        insight_parts = [f"**Comprehensive Macroeconomic Analysis for {ticker}**\n" + "-" * 50]
+        for series_id in self.macro_indicators:
+            if series_id in levels.columns:
+                corr = close.corr(levels[series_id])
+                latest_val = levels[series_id].iloc[-1]
+                result["correlations"][series_id] = float(corr)
+                result["latest"][series_id] = float(latest_val)
+                insight_parts.append(f"- Correlation with {series_id}: {corr:.3f} (Latest: {latest_val:.2f})")
+
+        peaks = self.lead_lags(full_close.to_frame(ticker), macro).dropna(subset=["corr"])
+        if not peaks.empty:
+            insight_parts.append(f"\n**Lead-Lag (monthly returns vs indicator changes, +/-{LEAD_LAG_MONTHS} months):**")
+            for row in peaks.itertuples(index=False):
+                result["lead_lag"][row.indicator] = {"lag": int(row.lag), "corr": float(row.corr),
+                                                     "n_obs": int(row.n_obs)}
+                insight_parts.append(self._describe_lead(ticker, row.indicator, row.lag, row.corr, row.corr_lag0))
+
+        news = data["news"]
+        if news is not None and not news.empty:
+            result["headlines"] = news["title"].dropna().head(3).tolist()
+            insight_parts.append("\n**Recent Headlines:**")
+            insight_parts.extend(f"- {h}" for h in result["headlines"])
+        senti = self.sentiment.summary([ticker])
+        if not senti.empty:
+            row = senti.iloc[0]
+            result["sentiment"] = {"score": float(row["sentiment"]), "n_articles": int(row["n_articles"])}
+            insight_parts.append(f"- News sentiment (time-decayed mean of {int(row['n_articles'])} articles): "
+                                 f"{row['sentiment']:+.3f}")
+
+        insight_parts.append("\n**Summary Insight:**")
+        insight_parts.append(
+            "The analysis reveals the stock's sensitivity to interest rates (DGS10, FEDFUNDS), "
+            "inflation (CPIAUCSL), and employment (UNRATE)."
+        )
+        result["insight"] = "\n".join(insight_parts)
+        result["memory_id"] = self.memory.add(
+            "single", [ticker], key, plan, result,
+            pd.DataFrame([result["correlations"]], index=[ticker]),
+            latest=result["latest"], n_obs={ticker: result["n_obs"]},
+            fingerprints=fps, insight=result["insight"])
+        return result
+
+    def execute_research(self, plan: dict) -> str:
+        """
+        Executes the research plan and returns the markdown insight
+        (or an error message if data fetching or processing fails).
+        """
+        return self.analyze(plan)["insight"]
+
+    def analyze_batch(self, plan: dict) -> dict:
+        """
+        Ticker x indicator correlations for every ticker of a batch plan.
+
+        All closes go into one (dates x tickers) matrix and all macro series are
+        aligned as of the same dates (`align_asof`), keeping only dates where
+        every indicator is known (as in `analyze`). The whole
+        correlation table is then one `cross_corr` call; tickers with fewer than
+        20 overlapping days get NaN. Results are stored in / reused from memory
+        like in `analyze`.
+
+        Returns:
+            dict: tickers, correlations (DataFrame, tickers x series_id),
+                  latest {series_id: float}, n_obs (Series per ticker),
+                  lead_lag (DataFrame of peak lead-lags per ticker x indicator, strongest first),
+                  missing (tickers without prices) and the markdown `comparison`.
+        """
+        tickers = plan["tickers"]
+        print(f"-> Executing batch analysis for {len(tickers)} tickers...")
+        data = self.gather_batch(plan)
+        fps = self._fingerprints(data)
+        key = analysis_key(ANALYSIS_VERSION, tickers, self.macro_indicators, fps)
+        stored = self.memory.find(key)
+        if stored is not None:
+            print(f"   - Same batch on identical data found in memory ({stored['stored_at']} UTC); reusing it.")
+            stored["correlations"] = pd.DataFrame(**stored["correlations"]).rename_axis("ticker")
+            stored["n_obs"] = pd.Series(stored["n_obs"], dtype="int64")
+            stored["lead_lag"] = pd.DataFrame(stored.get("lead_lag", []))
+            return stored
+        result = {"tickers": tickers, "correlations": pd.DataFrame(), "latest": {},
+                  "n_obs": pd.Series(dtype="int64"), "lead_lag": pd.DataFrame(), "missing": []}
+
+        closes = {t: df.set_index("date")["close"] for t, df in data["prices"].items() if not df.empty}
+        result["missing"] = [t for t in tickers if t not in closes]
+        macro = {s: df.set_index("date")[s.lower()] for s, df in data["macro"].items() if not df.empty}
+        if not closes:
+            result["comparison"] = "Error: Could not fetch stock price data for any ticker."
+            return result
+        if not macro:
+            result["comparison"] = "Error: Could not fetch any macroeconomic data from FRED."
+            return result
+
+        prices = pd.concat(closes, axis=1).sort_index()
+        prices = prices[~prices.index.duplicated(keep="last")]
+        peaks = self.lead_lags(prices, macro).dropna(subset=["corr"])
+        levels = align_asof(prices.index, macro, max_age=self.macro_max_age)
+        rows = levels.notna().all(axis=1).to_numpy()
+        prices, levels = prices[rows], levels[rows]
+
+        table = cross_corr(prices, levels, min_obs=MIN_OBS)
+        table.index.name = "ticker"
+        result["correlations"] = table
+        result["n_obs"] = prices.notna().sum()
+        if len(levels):
+            result["latest"] = {s: float(v) for s, v in levels.iloc[-1].items()}
+        result["lead_lag"] = peaks.reset_index(drop=True)
+        result["comparison"] = self.compare(table, result["missing"], peaks=peaks)
+        payload = dict(result, correlations=table.to_dict(orient="split"),
+                       n_obs={t: int(n) for t, n in result["n_obs"].items()},
+                       lead_lag=peaks.to_dict(orient="records"))
+        result["memory_id"] = self.memory.add(
+            "batch", tickers, key, plan, payload, table, latest=result["latest"],
+            n_obs=payload["n_obs"], fingerprints=fps, insight=result["comparison"])
+        return result
+
+    def compare(self, table: pd.DataFrame, missing: list | None = None, top: int = 3,
+                peaks: pd.DataFrame | None = None) -> str:
+        """
+        Cross-stock comparison built from a correlation table (tickers x indicators):
+        per indicator the tickers ranked by correlation (top/bottom `top` for large batches),
+        plus the `top` strongest non-contemporaneous lead-lag pairs when `peaks` is given.
+        """
+        parts = [f"**Cross-Stock Macro Comparison ({len(table)} tickers)**\n" + "-" * 50]
+        for series_id in table.columns:
+            col = table[series_id].dropna().sort_values(ascending=False)
+            if col.empty:
+                continue
+            fmt = lambda s: ", ".join(f"{t} ({v:.3f})" for t, v in s.items())
+            if len(col) <= 2 * top:
+                ranked = fmt(col)
+            else:
+                ranked = f"{fmt(col.head(top))} ... {fmt(col.tail(top))}"
+            parts.append(f"- {series_id}: {ranked} | mean {col.mean():.3f}")
+        if peaks is not None:
+            leads = peaks[peaks["lag"] != 0].head(top)
+            if not leads.empty:
+                parts.append(f"\n**Strongest lead-lags (monthly, +/-{LEAD_LAG_MONTHS} months):**")
+                parts.extend(self._describe_lead(r.ticker, r.indicator, r.lag, r.corr, r.corr_lag0)
+                             for r in leads.itertuples(index=False))
+        if missing:
+            parts.append(f"\nNo price data: {', '.join(missing)}")
+        return "\n".join(parts)
+
+    def refresh_sentiment(self, tickers: list) -> pd.DataFrame:
+        """
+        News sentiment for a whole universe: fetches news concurrently, scores only
+        unseen articles and returns the per-ticker decayed means (see sentiment.py).
+        """
+        return refresh_sentiment(tickers, self.sentiment, api_key=self.news_api_key, fetch=self._fetch_news)
+
+    # -------- reflect / learn --------
+    def self_reflect(self, insight: str, plan: dict) -> str:
+        """
+        Reflects on the quality and completeness of the generated insight.
+
+        It checks if all required macroeconomic indicators were included
+        in the insight and if macro-risk context is discussed.
+
+        Args:
+            insight (str): The analysis insight generated by `execute_research`.
+            plan (dict): The research plan.
+        Returns:
+            str: A string summarizing the reflection (e.g., "COMPLETE | RISK-AWARE").
+        """
+        print("-> Reflecting on analysis quality...")
+        reflections = []
+
+        missing = [ind for ind in self.macro_indicators if ind.lower() not in insight.lower()]
+        if missing:
+            reflections.append(f"INCOMPLETE: Missing indicators: {', '.join(missing)}.")
+        else:
+            reflections.append("COMPLETE: All required macro indicators included.")
+
+        risk_terms = ["sensitivity", "inflation", "interest rates"]
+        if not any(term in insight.lower() for term in risk_terms):
+            reflections.append("RISK-GAP: Missing macro-risk context.")
+        else:
+            reflections.append("RISK-AWARE: Includes macro-risk discussion.")
+
+        reflection = " | ".join(reflections)
+        print(f"   - {reflection}")
+        return reflection
+
+    def learn(self, reflection: str, plan: dict, insight: str):
+        """
+        Logs the research outcome and reflection into the agent's memory.
+
+        Args:
+            reflection (str): The reflection string generated by `self_reflect`.
+            plan (dict): The research plan.
+            insight (str): The analysis insight.
+        """
+        print("-> Learning from outcome...")
+        status = "failure" if "INCOMPLETE" in reflection or "RISK-GAP" in reflection else "success"
+        ticker = plan.get("ticker") or ",".join(plan.get("tickers", []))
+        self.memory.reflect(ticker, insight, reflection, status, plan)
+        print(f"   - Memory logged with status: '{status}'.")
+
+    def run(self, topic: str) -> dict:
+        """Full cycle: plan -> execute -> reflect -> learn. Returns the analysis dict plus reflection."""
+        plan = self.plan_research(topic)
+        result = self.analyze(plan)
+        result["reflection"] = self.self_reflect(result["insight"], plan)
+        self.learn(result["reflection"], plan, result["insight"])
+        return result
+
+    def run_batch(self, topic: str) -> dict:
+        """Batch cycle for a multi-ticker topic: plan_batch -> analyze_batch. Logged in memory."""
+        plan = self.plan_batch(topic)
+        result = self.analyze_batch(plan)
+        status = "failure" if result["correlations"].empty else "success"
+        self.memory.reflect(",".join(plan["tickers"]), result["comparison"],
+                            f"BATCH: {len(plan['tickers'])} tickers", status, plan)
+        return result
+
+
+def main():
+    import sys
+    topic = " ".join(sys.argv[1:]) or "NVDA vs. the US Economy"
+    print(f"--- Starting Full Agent Cycle for: '{topic}' ---\n")
+    agent = InvestmentResearchAgent()
+    if len(agent.plan_batch(topic)["tickers"]) > 1:
+        result = agent.run_batch(topic)
+        print("\n--- Correlation Table ---")
+        print(result["correlations"].round(3).to_string())
+        print()
+        print(result["comparison"])
+    else:
+        result = agent.run(topic)
+        print("\n--- Generated Insight ---")
+        print(result["insight"])
+    print("\n--- ✅ Agent Cycle Complete ---")
+
+
+if __name__ == "__main__":
+    main()
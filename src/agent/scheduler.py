@@ -0,0 +1,369 @@
+"""
+Local refresh scheduler: each data source on its natural cadence, downstream
+stages only when their inputs actually changed.
+
+Jobs
+    source jobs  fetch one input (a FRED series, one ticker's prices). Due
+                 once per cadence period ("B" business day, "D", "W", "M"),
+                 `after` the period start in exchange-local time: DGS10 and
+                 prices every business day after the close, CPI monthly once
+                 the release is out, ...
+    stage jobs   (features, models) list `deps`; due when the content of any
+                 dependency's output files differs from what the stage last
+                 ran on. A source refetch that returns identical data does
+                 not trigger anything downstream.
+
+Each run's status and the sha256 of its output files are kept in SQLite
+(data_cache/scheduler.sqlite), so a restarted daemon does not redo work: a
+source that already succeeded in the current period, or a stage whose inputs
+are unchanged, is skipped. A failed job is retried after `retry` seconds.
+
+A tick runs the due jobs wave by wave in dependency order on one thread
+pool; a semaphore per provider caps concurrent calls (one Polygon request at
+a time on the free tier, two FRED downloads, ...).
+
+Run:  python -m src.agent.scheduler             (daemon, checks every 5 minutes)
+      python -m src.agent.scheduler --once      (one tick, e.g. from cron)
+      python -m src.agent.scheduler --status
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List
+
+import pandas as pd
+
+from ..data.fingerprint import diff_fingerprints
+from ..data.raw_cache import default_cache, record_file
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DEFAULT_DB = os.path.join("data_cache", "scheduler.sqlite")
+DEFAULT_LIMITS = {"fred": 2, "yahoo": 4, "polygon": 1, "local": 2}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    name         TEXT PRIMARY KEY,
+    last_run_at  TEXT,
+    last_ok_at   TEXT,
+    status       TEXT,
+    error        TEXT,
+    outputs      TEXT,
+    input_sig    TEXT,
+    runs         INTEGER NOT NULL DEFAULT 0,
+    changed_at   TEXT
+);
+"""
+
+
+class Job:
+    """
+    One schedulable unit.
+
+    Args:
+        name (str): Unique id, e.g. "fred:DGS10".
+        run (callable): Does the work; raises on failure.
+        outputs (list): Files the job writes (fingerprinted after each run).
+        provider (str): Concurrency group ("fred", "yahoo", "polygon", "local").
+        cadence (str): "B", "D", "W" or "M" for source jobs; None for stages.
+        after (Timedelta): Offset from the period start before the job is due.
+        deps (list): Upstream job names (stage jobs).
+        retry (float): Seconds before a failed job is tried again.
+    """
+
+    def __init__(self, name: str, run: Callable[[], object], outputs: Iterable[str] = (),
+                 provider: str = "local", cadence: str | None = None, after=pd.Timedelta(0),
+                 deps: Iterable[str] = (), retry: float = 1800):
+        if cadence is None and not deps:
+            raise ValueError(f"job {name!r} needs a cadence or deps")
+        self.name = name
+        self.run = run
+        self.outputs = list(outputs)
+        self.provider = provider
+        self.cadence = cadence
+        self.after = pd.Timedelta(after)
+        self.deps = list(deps)
+        self.retry = retry
+
+
+def period_boundary(now: pd.Timestamp, cadence: str, after: pd.Timedelta) -> pd.Timestamp:
+    """Latest `period start + after` that is <= now (all in local time)."""
+    d = (now - after).normalize()
+    if cadence == "B":
+        while d.dayofweek >= 5:
+            d -= pd.Timedelta(days=1)
+    elif cadence == "W":
+        d -= pd.Timedelta(days=d.dayofweek)
+    elif cadence == "M":
+        d = d.replace(day=1)
+    elif cadence != "D":
+        raise ValueError(f"unknown cadence {cadence!r}")
+    return d + after
+
+
+def _levels(jobs: Dict[str, Job]) -> List[List[str]]:
+    """Jobs grouped into waves; every job comes after all of its deps."""
+    depth: Dict[str, int] = {}
+
+    def visit(name, stack=()):
+        if name in depth:
+            return depth[name]
+        if name in stack:
+            raise ValueError(f"dependency cycle through {name!r}")
+        job = jobs[name]
+        missing = [d for d in job.deps if d not in jobs]
+        if missing:
+            raise ValueError(f"job {name!r} depends on unknown {missing}")
+        depth[name] = 1 + max((visit(d, stack + (name,)) for d in job.deps), default=-1)
+        return depth[name]
+
+    for n in jobs:
+        visit(n)
+    out: List[List[str]] = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+    for n, k in depth.items():
+        out[k].append(n)
+    return out
+
+
+class Scheduler:
+    """
+    Decides which jobs are due and runs them with per-provider concurrency caps.
+
+    Args:
+        jobs (iterable): Job objects.
+        db_path (str): SQLite state file (":memory:" for a throwaway one).
+        limits (dict): {provider: max concurrent jobs}; unknown providers get 1.
+        workers (int): Thread pool size.
+        tz (str): Time zone cadences are evaluated in.
+    """
+
+    def __init__(self, jobs: Iterable[Job], db_path: str = DEFAULT_DB, limits: Dict[str, int] | None = None,
+                 workers: int = 8, tz: str = "America/New_York", log: Callable[[str], None] = print):
+        self.jobs = {j.name: j for j in jobs}
+        self.levels = _levels(self.jobs)
+        self.tz = tz
+        self.log = log
+        limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self._sems = {p: threading.BoundedSemaphore(limits.get(p, 1)) for p in {j.provider for j in self.jobs.values()}}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="refresh")
+        if db_path != ":memory:" and os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        if db_path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+        self._conn.close()
+
+    # -------- state --------
+    def _state(self, name: str) -> dict:
+        with self._lock:
+            cur = self._conn.execute("SELECT * FROM jobs WHERE name = ?", (name,))
+            row = cur.fetchone()
+            cols = [c[0] for c in cur.description]
+        if row is None:
+            return {"name": name, "status": None, "outputs": {}, "input_sig": None, "runs": 0}
+        st = dict(zip(cols, row))
+        st["outputs"] = json.loads(st["outputs"] or "{}")
+        return st
+
+    def _save(self, st: dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (name, last_run_at, last_ok_at, status, error, outputs, input_sig, runs, changed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (st["name"], st.get("last_run_at"), st.get("last_ok_at"), st["status"], st.get("error"),
+                 json.dumps(st["outputs"]), st.get("input_sig"), st["runs"], st.get("changed_at")))
+            self._conn.commit()
+
+    def status(self) -> pd.DataFrame:
+        with self._lock:
+            df = pd.read_sql_query("SELECT name, status, last_run_at, last_ok_at, changed_at, runs, error FROM jobs"
+                                   " ORDER BY name", self._conn)
+        return df
+
+    def _input_sig(self, job: Job) -> str | None:
+        """Hash of the deps' output contents (deps that never succeeded are left out); None if none has."""
+        sig = {}
+        for d in job.deps:
+            st = self._state(d)
+            if st.get("last_ok_at"):
+                sig[d] = {k: v.get("sha256") for k, v in sorted(st["outputs"].items())}
+        if not sig:
+            return None
+        return hashlib.sha256(json.dumps(sig, sort_keys=True).encode()).hexdigest()
+
+    # -------- due --------
+    def _now(self, now=None) -> pd.Timestamp:
+        ts = pd.Timestamp(now) if now is not None else pd.Timestamp.now(tz="UTC")
+        return (ts.tz_localize(self.tz) if ts.tz is None else ts).tz_convert(self.tz)
+
+    def is_due(self, name: str, now=None) -> bool:
+        job, st, now = self.jobs[name], self._state(name), self._now(now)
+        if st["status"] == "error" and st.get("last_run_at"):
+            if (now - pd.Timestamp(st["last_run_at"])).total_seconds() < job.retry:
+                return False
+        if job.deps:
+            sig = self._input_sig(job)
+            if sig is None:
+                return False
+            if sig != st.get("input_sig") or st["status"] == "error":
+                return True
+        if job.cadence:
+            if not st.get("last_ok_at"):
+                return True
+            last_ok = pd.Timestamp(st["last_ok_at"]).tz_convert(self.tz)
+            return last_ok < period_boundary(now, job.cadence, job.after)
+        return False
+
+    def due(self, now=None) -> List[str]:
+        return [n for level in self.levels for n in level if self.is_due(n, now)]
+
+    # -------- run --------
+    def _run(self, name: str, now: pd.Timestamp) -> str:
+        job = self.jobs[name]
+        st = self._state(name)
+        sig = self._input_sig(job) if job.deps else None
+        with self._sems[job.provider]:
+            t0 = time.time()
+            try:
+                job.run()
+                ok, err = True, None
+            except Exception as e:
+                ok, err = False, f"{type(e).__name__}: {e}"[:500]
+        st.update(last_run_at=now.isoformat(), runs=st["runs"] + 1, input_sig=sig)
+        if ok:
+            paths = {p: p for p in job.outputs if os.path.exists(p)}
+            st["outputs"], changed = diff_fingerprints(paths, st["outputs"])
+            if changed or not st.get("changed_at"):
+                st["changed_at"] = now.isoformat()
+            st.update(status="ok", error=None, last_ok_at=now.isoformat())
+            self.log(f"✅ {name} ({time.time() - t0:.1f}s){' changed: ' + ', '.join(changed) if changed else ''}")
+        else:
+            st.update(status="error", error=err)
+            self.log(f"⚠️ {name}: {err}")
+        self._save(st)
+        return st["status"]
+
+    def tick(self, now=None) -> Dict[str, str]:
+        """Run every due job once, upstream waves first. Returns {job: 'ok' | 'error'}."""
+        now = self._now(now)
+        done: Dict[str, str] = {}
+        for level in self.levels:
+            todo = [n for n in level if self.is_due(n, now)]
+            futures = {n: self._pool.submit(self._run, n, now) for n in todo}
+            wait(futures.values())
+            done.update({n: f.result() for n, f in futures.items()})
+        return done
+
+    def run_forever(self, interval: float = 300):
+        self.log(f"Scheduler: {len(self.jobs)} jobs, checking every {interval:.0f}s")
+        while True:
+            ran = self.tick()
+            if ran:
+                self.log(f"tick: {sum(v == 'ok' for v in ran.values())} ok, {sum(v == 'error' for v in ran.values())} failed")
+            time.sleep(interval)
+
+
+# -------- default job graph --------
+FRED_CADENCE = {
+    # series: (cadence, due after the period start) -- after the usual release
+    "DGS10": ("B", pd.Timedelta(hours=18)),
+    "FEDFUNDS": ("M", pd.Timedelta(days=1, hours=18)),
+    "UNRATE": ("M", pd.Timedelta(days=7, hours=9)),
+    "CPIAUCSL": ("M", pd.Timedelta(days=14, hours=9)),
+}
+TICKERS = ["AAPL", "MSFT", "GOOGL", "NVDA", "META", "AMZN", "AMD", "AVGO"]
+
+
+def _script(path: str, *args: str) -> Callable[[], None]:
+    def run():
+        subprocess.run([sys.executable, os.path.join(ROOT, path), *args], cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL)
+    return run
+
+
+def _fred_job(series_id: str) -> Callable[[], None]:
+    def run():
+        from ..data.fred import get_fred_series
+        get_fred_series(series_id, refresh=True)
+    return run
+
+
+def _prices_job(ticker: str, period: str) -> Callable[[], None]:
+    def run():
+        from ..data.yahoo import get_stock_prices
+        df = get_stock_prices(ticker, period=period)
+        if df.empty:
+            raise RuntimeError(f"no prices for {ticker}")
+        path = os.path.join("data_cache", f"{ticker}_prices.csv")
+        df.to_csv(path, index=False)
+        record_file(path, False, "prices")
+    return run
+
+
+def default_jobs(tickers: Iterable[str] = TICKERS, period: str = "5y") -> List[Job]:
+    """FRED series + daily prices -> merged prices, lead-lag scan, monthly features -> offline model."""
+    cache = "data_cache"
+    jobs = [Job(f"fred:{s}", _fred_job(s), [os.path.join(cache, f"fred_{s}.csv")], "fred", cad, after)
+            for s, (cad, after) in FRED_CADENCE.items()]
+    jobs += [Job(f"prices:{t}", _prices_job(t, period), [os.path.join(cache, f"{t}_prices.csv")],
+                 "yahoo", "B", pd.Timedelta(hours=17)) for t in tickers]
+    fred = [j.name for j in jobs if j.provider == "fred"]
+    prices = [j.name for j in jobs if j.provider == "yahoo"]
+    monthly = os.path.join(cache, "Monthly")
+    jobs += [
+        Job("stage:merge_prices", _script("notebooks/merge_cached_prices.py", "--no-csv"),
+            [os.path.join(cache, "tech_prices_merged.parquet"), os.path.join(cache, "price_quality.csv")],
+            deps=prices),
+        Job("stage:lead_lag", _script("notebooks/lead_lag_scan.py"),
+            [os.path.join(cache, "lead_lag_peaks.csv")], deps=prices + fred),
+        Job("stage:features", _script("notebooks/TechMonthly_hardening.py"),
+            [os.path.join(monthly, "tech_features_combined.csv"), os.path.join(monthly, "macro_monthly.csv")],
+            provider="polygon", deps=fred),
+        Job("stage:model", _script("notebooks/Monthly_offline_model.py"),
+            [os.path.join(monthly, "ret_corr.csv")], deps=["stage:features"]),
+    ]
+    return jobs
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Refresh scheduler for data sources and downstream stages")
+    ap.add_argument("--once", action="store_true", help="run one tick and exit")
+    ap.add_argument("--status", action="store_true", help="print job state and what is due, then exit")
+    ap.add_argument("--interval", type=float, default=300, help="seconds between checks")
+    ap.add_argument("--tickers", default=",".join(TICKERS))
+    ap.add_argument("--period", default="5y", help="price history refetched per ticker")
+    ap.add_argument("--db", default=DEFAULT_DB)
+    args = ap.parse_args(argv)
+
+    os.chdir(ROOT)
+    tickers = [t.strip().upper() for t in args.tickers.split(",") if t.strip()]
+    sched = Scheduler(default_jobs(tickers, args.period), db_path=args.db)
+    try:
+        if args.status:
+            print(sched.status().to_string(index=False))
+            print("Due now:", ", ".join(sched.due()) or "nothing")
+        elif args.once:
+            sched.tick()
+        else:
+            default_cache().start_compactor()      # pack small raw files / enforce RAW_CACHE_BUDGET meanwhile
+            sched.run_forever(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sched.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Cached, batched news sentiment.
+
+Articles are keyed by URL (or a hash of title + description when there is no
+URL). Their payload and VADER compound score are stored in SQLite next to
+the agent memory, so a refresh only scores articles it has not seen before,
+or whose text changed. Large backlogs are scored across a process pool. Each
+worker builds one analyzer and reuses it.
+
+Per-ticker sentiment is an exponentially time-decayed mean of article
+scores (half-life `half_life_days`). It is kept as two running sums
+anchored at `as_of`. When new articles arrive, the sums are decayed to the
+newest timestamp and only the new articles are added. Updating a ticker
+costs O(new articles), not O(history). An article's score is folded in
+once, when it is first linked to the ticker.
+
+Scorer: vaderSentiment if installed, else NLTK's VADER, else a small keyword
+fallback (same word lists as TechStockData_daily.ipynb).
+"""
+
+import datetime as dt
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List
+
+import pandas as pd
+
+from ..data.news import get_news
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    article_id    TEXT PRIMARY KEY,
+    url           TEXT,
+    published_at  TEXT,
+    source        TEXT,
+    title         TEXT,
+    description   TEXT,
+    content_hash  TEXT NOT NULL,
+    score         REAL,
+    scorer        TEXT
+);
+CREATE TABLE IF NOT EXISTS ticker_articles (
+    ticker        TEXT NOT NULL,
+    article_id    TEXT NOT NULL,
+    published_at  TEXT,
+    PRIMARY KEY (ticker, article_id)
+);
+CREATE INDEX IF NOT EXISTS ix_ticker_articles_time ON ticker_articles(ticker, published_at);
+CREATE TABLE IF NOT EXISTS aggregates (
+    ticker        TEXT PRIMARY KEY,
+    as_of         TEXT NOT NULL,
+    value_sum     REAL NOT NULL,
+    weight_sum    REAL NOT NULL,
+    n_articles    INTEGER NOT NULL,
+    last_link     INTEGER NOT NULL,
+    updated_at    TEXT NOT NULL
+);
+"""
+
+_POS = ["beat", "record", "growth", "surge", "profit", "upgrade", "outperform", "strong", "rally"]
+_NEG = ["miss", "cut", "probe", "lawsuit", "downgrade", "decline", "headwind", "weak", "plunge"]
+
+_ANALYZER = None
+_SCORER = None
+
+
+# -------- scoring (module-level so worker processes can run it) --------
+def _load_analyzer():
+    """One analyzer per process: (polarity_scores callable or None, scorer name)."""
+    global _ANALYZER, _SCORER
+    if _SCORER is None:
+        try:
+            from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+            _ANALYZER, _SCORER = SentimentIntensityAnalyzer(), "vader"
+        except ImportError:
+            try:
+                from nltk.sentiment import SentimentIntensityAnalyzer
+                _ANALYZER, _SCORER = SentimentIntensityAnalyzer(), "nltk-vader"
+            except Exception:
+                _ANALYZER, _SCORER = None, "keywords"
+    return _ANALYZER, _SCORER
+
+
+def scorer_name() -> str:
+    return _load_analyzer()[1]
+
+
+def score_texts(texts: List[str]) -> List[float]:
+    """Compound sentiment in [-1, 1] for each text (0.0 for empty text)."""
+    analyzer, _ = _load_analyzer()
+    out = []
+    for text in texts:
+        if not isinstance(text, str) or not text.strip():
+            out.append(0.0)
+        elif analyzer is not None:
+            out.append(float(analyzer.polarity_scores(text)["compound"]))
+        else:
+            t = text.lower()
+            net = sum(w in t for w in _POS) - sum(w in t for w in _NEG)
+            out.append(max(-1.0, min(1.0, net / 6.0)))      # 9 words per side: clip to the compound range
+    return out
+
+
+def score_parallel(texts: List[str], workers: int | None = None, chunk: int = 500,
+                   min_parallel: int = 2000) -> List[float]:
+    """score_texts, spread over a process pool when there are at least `min_parallel` texts."""
+    if len(texts) < min_parallel or workers == 1:
+        return score_texts(texts)
+    chunks = [texts[i:i + chunk] for i in range(0, len(texts), chunk)]
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return [s for part in ex.map(score_texts, chunks) for s in part]
+
+
+# -------- helpers --------
+def _text(title, description) -> str:
+    parts = [p for p in (title, description) if isinstance(p, str) and p.strip()]
+    return ". ".join(parts)
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _secs(iso: str) -> float:
+    return dt.datetime.fromisoformat(iso).replace(tzinfo=dt.timezone.utc).timestamp()
+
+
+class SentimentStore:
+    """
+    Article cache + incremental per-ticker sentiment aggregates.
+
+    Args:
+        path (str): SQLite file (":memory:" for a throwaway store).
+        half_life_days (float): Decay half-life of the per-ticker mean.
+        workers (int): Processes used to score large backlogs.
+    """
+
+    def __init__(self, path: str = "data_cache/news_sentiment.sqlite",
+                 half_life_days: float = 3.0, workers: int | None = None):
+        self.path = path
+        self.tau = half_life_days * 86400 / math.log(2)
+        self.workers = workers
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    # -------- ingest --------
+    def _known_hashes(self, ids: List[str]) -> Dict[str, str]:
+        known = {}
+        for i in range(0, len(ids), 500):
+            part = ids[i:i + 500]
+            q = f"SELECT article_id, content_hash FROM articles WHERE article_id IN ({','.join('?' * len(part))})"
+            known.update(self._conn.execute(q, part).fetchall())
+        return known
+
+    def ingest(self, news: Dict[str, pd.DataFrame]) -> dict:
+        """
+        Add {ticker: news frame (get_news columns)} to the cache, score unseen or
+        changed articles, and fold newly linked articles into each ticker's aggregate.
+        Returns {'articles': n, 'scored': n, 'linked': n}.
+        """
+        rows, links = {}, []
+        for ticker, df in news.items():
+            if df is None or df.empty:
+                continue
+            n = len(df)
+            col = lambda c: df[c].tolist() if c in df.columns else [None] * n
+            published = pd.to_datetime(df["published_at"], utc=True, errors="coerce") \
+                if "published_at" in df.columns else pd.Series(pd.NaT, index=df.index)
+            pubs = [None if pd.isna(t) else t for t in published.dt.strftime("%Y-%m-%dT%H:%M:%S")]
+            for url, pub, source, title, desc in zip(col("url"), pubs, col("source"),
+                                                     col("title"), col("description")):
+                text = _text(title, desc)
+                if not text:
+                    continue
+                h = _content_hash(text)
+                url = url if isinstance(url, str) else None
+                aid = url or h
+                rows[aid] = (aid, url, pub, source, title, desc, h, text)
+                links.append((ticker.upper(), aid, pub))
+
+        with self._lock:
+            known = self._known_hashes(list(rows))
+            todo = [r for aid, r in rows.items() if known.get(aid) != r[6]]
+            scores = score_parallel([r[7] for r in todo], workers=self.workers)
+            name = scorer_name()
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO articles (article_id, url, published_at, source, title, "
+                    "description, content_hash, score, scorer) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [r[:7] + (s, name) for r, s in zip(todo, scores)],
+                )
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO ticker_articles (ticker, article_id, published_at) VALUES (?, ?, ?)",
+                    links,
+                )
+                linked = self._conn.total_changes - before
+                if linked:
+                    self._fold({t for t, _, _ in links})
+        return {"articles": len(rows), "scored": len(todo), "linked": linked}
+
+    def _fold(self, tickers: Iterable[str]):
+        """Add links not yet counted into each ticker's decayed sums (inside the write transaction)."""
+        now = dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+        for ticker in tickers:
+            agg = self._conn.execute(
+                "SELECT as_of, value_sum, weight_sum, n_articles, last_link FROM aggregates WHERE ticker = ?",
+                (ticker,)).fetchone()
+            new = self._conn.execute(
+                "SELECT ta.rowid, a.published_at, a.score FROM ticker_articles ta "
+                "JOIN articles a ON a.article_id = ta.article_id "
+                "WHERE ta.ticker = ? AND ta.rowid > ? ORDER BY ta.rowid",
+                (ticker, agg[4] if agg else 0),
+            ).fetchall()
+            if not new:
+                continue
+            pubs = [p or now for _, p, _ in new]
+            as_of = max(pubs + ([agg[0]] if agg else []))
+            t_new = _secs(as_of)
+            v = w = 0.0
+            if agg:
+                decay = math.exp(-(t_new - _secs(agg[0])) / self.tau)
+                v, w = agg[1] * decay, agg[2] * decay
+            for p, (_, _, score) in zip(pubs, new):
+                k = math.exp(-(t_new - _secs(p)) / self.tau)
+                v += k * (score or 0.0)
+                w += k
+            self._conn.execute(
+                "INSERT OR REPLACE INTO aggregates "
+                "(ticker, as_of, value_sum, weight_sum, n_articles, last_link, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (ticker, as_of, v, w, (agg[3] if agg else 0) + len(new), new[-1][0], now),
+            )
+
+    # -------- read --------
+    def summary(self, tickers: List[str] | None = None, at=None) -> pd.DataFrame:
+        """
+        Per-ticker decayed mean sentiment as of `at` (default: now).
+        Columns: ticker, sentiment, weight, n_articles, last_article.
+        """
+        t_at = pd.Timestamp(at or dt.datetime.now(dt.timezone.utc))
+        t_at = (t_at.tz_localize("UTC") if t_at.tzinfo is None else t_at).timestamp()
+        with self._lock:
+            aggs = self._conn.execute(
+                "SELECT ticker, as_of, value_sum, weight_sum, n_articles FROM aggregates").fetchall()
+        want = {t.upper() for t in tickers} if tickers else None
+        out = []
+        for ticker, as_of, v, w, n in aggs:
+            if want is not None and ticker not in want:
+                continue
+            decay = math.exp(-max(0.0, t_at - _secs(as_of)) / self.tau)
+            out.append({"ticker": ticker, "sentiment": v / w if w else float("nan"),
+                        "weight": w * decay, "n_articles": n, "last_article": as_of})
+        return pd.DataFrame(out, columns=["ticker", "sentiment", "weight", "n_articles", "last_article"])
+
+    def articles(self, ticker: str, limit: int = 20) -> pd.DataFrame:
+        """Latest cached articles of a ticker with their scores."""
+        with self._lock:
+            return pd.read_sql_query(
+                "SELECT a.published_at, a.source, a.title, a.url, a.score FROM ticker_articles ta "
+                "JOIN articles a ON a.article_id = ta.article_id WHERE ta.ticker = ? "
+                "ORDER BY ta.published_at DESC LIMIT ?",
+                self._conn, params=(ticker.upper(), limit))
+
+
+def refresh_sentiment(tickers: List[str], store: SentimentStore, api_key: str | None = None,
+                      fetch: Callable[..., pd.DataFrame] = get_news, fetch_workers: int = 16) -> pd.DataFrame:
+    """
+    Fetch news for every ticker concurrently, ingest it (scoring only unseen
+    articles) and return `store.summary(tickers)`.
+    """
+    with ThreadPoolExecutor(max_workers=fetch_workers) as ex:
+        futs = {t: ex.submit(fetch, t, api_key) for t in tickers}
+        news = {}
+        for t, f in futs.items():
+            try:
+                news[t] = f.result()
+            except Exception as e:
+                print(f"⚠️ News fetch failed for {t}: {e}")
+    stats = store.ingest(news)
+    print(f"   - Sentiment: {stats['articles']} articles, {stats['scored']} newly scored, "
+          f"{stats['linked']} new ticker links")
+    return store.summary(tickers)
@@ -0,0 +1,337 @@
+"""
+Long-running local HTTP/JSON research service.
+
+One process keeps a single InvestmentResearchAgent and its inputs warm:
+prices, FRED series and news are held in memory for `ttl` seconds (on top of
+the on-disk caches), and the agent's SQLite memory / sentiment stores stay open.
+
+- identical in-flight requests are coalesced: the second caller waits on the
+  first caller's computation instead of starting its own
+- concurrent loads of the same input (e.g. DGS10 for two tickers) are
+  coalesced the same way
+- work runs on a fixed pool with a bounded queue; when it is full the service
+  answers 503 with Retry-After instead of piling up requests
+
+Endpoints (GET unless noted; all responses are JSON):
+    /health
+    /stats
+    /research?topic=NVDA vs. the US Economy    (or ?ticker=NVDA; POST {"topic": ...} also works)
+    /batch?tickers=NVDA,AMD,JPM
+    /sentiment?tickers=NVDA,AMD
+
+Run:  python -m src.agent.service --port 8765 --workers 4 --queue 32
+"""
+
+import argparse
+import json
+import math
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from .research_agent import InvestmentResearchAgent
+
+
+class QueueFull(Exception):
+    """Raised when the work queue is at capacity."""
+
+
+# -------- building blocks --------
+class SingleFlight:
+    """Run work once per key at a time; concurrent callers with the same key share the result."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self.coalesced = 0
+
+    def submit(self, key: str, start: Callable[[], Future]) -> Future:
+        """
+        Return the in-flight future for `key`, or start the work with `start()`
+        (outside the lock). Errors raised by `start()` (e.g. QueueFull) are
+        re-raised to the caller and passed on to anyone already waiting.
+        """
+        with self._lock:
+            shared = self._inflight.get(key)
+            if shared is not None:
+                self.coalesced += 1
+                return shared
+            shared = Future()
+            self._inflight[key] = shared
+        try:
+            inner = start()
+        except BaseException as e:
+            self._finish(key, shared, None, e)
+            raise
+        inner.add_done_callback(lambda f: self._finish(key, shared, f, None))
+        return shared
+
+    def _finish(self, key: str, shared: Future, inner: Future | None, error: BaseException | None):
+        with self._lock:
+            if self._inflight.get(key) is shared:
+                del self._inflight[key]
+        if error is None and inner is not None:
+            error = inner.exception()
+        if error is not None:
+            shared.set_exception(error)
+        else:
+            shared.set_result(inner.result())
+
+
+class BoundedExecutor:
+    """Thread pool that refuses work (QueueFull) beyond `workers + queue_size` pending tasks."""
+
+    def __init__(self, workers: int = 4, queue_size: int = 32):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="research")
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self.capacity = workers + queue_size
+
+    def submit(self, fn, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            raise QueueFull()
+        try:
+            fut = self._pool.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        fut.add_done_callback(lambda _: self._slots.release())
+        return fut
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _cacheable(value) -> bool:
+    """Only real data is kept warm; an empty frame (e.g. a failed download) is retried next time."""
+    if value is None:
+        return False
+    return not (isinstance(value, (pd.DataFrame, pd.Series)) and value.empty)
+
+
+class WarmCache:
+    """In-memory TTL cache whose concurrent misses for one key trigger a single load."""
+
+    def __init__(self, ttl: float = 900):
+        self.ttl = ttl
+        self._data: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self.hits = self.misses = 0
+
+    def get(self, key: str, loader: Callable[[], object]):
+        now = time.monotonic()
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is not None and now - hit[0] < self.ttl:
+                self.hits += 1
+                return hit[1]
+            self.misses += 1
+
+        def _load():
+            fut: Future = Future()
+            try:
+                value = loader()
+                if _cacheable(value):
+                    with self._lock:
+                        self._data[key] = (time.monotonic(), value)
+                fut.set_result(value)
+            except Exception as e:
+                fut.set_exception(e)
+            return fut
+        # the first caller runs the loader in its own thread; others wait on it
+        return self._flight.submit(key, _load).result()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class WarmAgent(InvestmentResearchAgent):
+    """InvestmentResearchAgent whose price / macro / news fetches go through a WarmCache."""
+
+    def __init__(self, cache: WarmCache, news_ttl: float = 300, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+        self.news_cache = WarmCache(news_ttl)
+
+    def _fetch_prices(self, ticker: str) -> pd.DataFrame:
+        return self.cache.get(f"prices:{ticker}:{self.period}", lambda: super(WarmAgent, self)._fetch_prices(ticker))
+
+    def _fetch_macro(self, series_id: str) -> pd.DataFrame:
+        return self.cache.get(f"macro:{series_id}", lambda: super(WarmAgent, self)._fetch_macro(series_id))
+
+    def _fetch_news(self, ticker: str, api_key: str | None = None) -> pd.DataFrame:
+        return self.news_cache.get(f"news:{ticker}", lambda: super(WarmAgent, self)._fetch_news(ticker, api_key))
+
+
+# -------- JSON --------
+def _clean(obj):
+    """Make analysis results JSON-safe (DataFrames, numpy scalars, NaN -> null)."""
+    if isinstance(obj, pd.DataFrame):
+        return {str(i): _clean(row.to_dict()) for i, row in obj.iterrows()}
+    if isinstance(obj, pd.Series):
+        return _clean(obj.to_dict())
+    if isinstance(obj, dict):
+        return {str(k): _clean(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_clean(v) for v in obj]
+    if hasattr(obj, "item"):
+        obj = obj.item()
+    if isinstance(obj, float) and not math.isfinite(obj):
+        return None
+    return obj
+
+
+# -------- service --------
+class ResearchService:
+    """The state shared by all HTTP handler threads."""
+
+    def __init__(self, workers: int = 4, queue_size: int = 32, ttl: float = 900,
+                 timeout: float = 120, **agent_kwargs):
+        self.cache = WarmCache(ttl)
+        self.agent = WarmAgent(self.cache, **agent_kwargs)
+        self.executor = BoundedExecutor(workers, queue_size)
+        self.flight = SingleFlight()
+        self.timeout = timeout
+        self.started = time.time()
+        self.requests = 0
+        self._lock = threading.Lock()   # handler threads update the counter concurrently
+
+    def _run(self, key: str, fn, *args):
+        with self._lock:
+            self.requests += 1
+        fut = self.flight.submit(key, lambda: self.executor.submit(fn, *args))
+        return fut.result(timeout=self.timeout)
+
+    def research(self, topic: str) -> dict:
+        plan = self.agent.plan_research(topic)
+        return self._run(f"research:{plan['ticker']}", self.agent.run, plan["ticker"])
+
+    def batch(self, tickers: list) -> dict:
+        tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+        return self._run(f"batch:{','.join(tickers)}", self._batch, tickers)
+
+    def _batch(self, tickers: list) -> dict:
+        return self.agent.analyze_batch({"tickers": tickers})
+
+    def sentiment(self, tickers: list) -> pd.DataFrame:
+        tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+        return self._run(f"sentiment:{','.join(tickers)}", self._sentiment, tickers)
+
+    def _sentiment(self, tickers: list) -> pd.DataFrame:
+        return self.agent.refresh_sentiment(tickers).set_index("ticker")
+
+    def stats(self) -> dict:
+        return {
+            "uptime_s": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "coalesced": self.flight.coalesced,
+            "queue_capacity": self.executor.capacity,
+            "warm_entries": len(self.cache),
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+            "memory_records": len(self.agent.memory),
+        }
+
+
+def make_handler(service: ResearchService):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, payload, headers: dict | None = None):
+            body = json.dumps(_clean(payload)).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _dispatch(self, path: str, params: dict):
+            try:
+                if path == "/health":
+                    return self._send(200, {"status": "ok"})
+                if path == "/stats":
+                    return self._send(200, service.stats())
+                if path == "/research":
+                    topic = params.get("topic") or params.get("ticker")
+                    if not topic:
+                        return self._send(400, {"error": "topic or ticker is required"})
+                    return self._send(200, service.research(topic))
+                if path == "/batch":
+                    tickers = params.get("tickers", "")
+                    if not tickers:
+                        return self._send(400, {"error": "tickers is required"})
+                    return self._send(200, service.batch(tickers.split(",")))
+                if path == "/sentiment":
+                    tickers = params.get("tickers", "")
+                    if not tickers:
+                        return self._send(400, {"error": "tickers is required"})
+                    return self._send(200, service.sentiment(tickers.split(",")))
+                return self._send(404, {"error": f"unknown path {path}"})
+            except QueueFull:
+                return self._send(503, {"error": "research queue is full, retry later"}, {"Retry-After": "5"})
+            except FutureTimeout:                       # not the builtin TimeoutError before 3.11
+                return self._send(504, {"error": "research timed out"})
+            except Exception as e:
+                return self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            self._dispatch(url.path, params)
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            try:
+                n = int(self.headers.get("Content-Length") or 0)
+                params = json.loads(self.rfile.read(n) or b"{}")
+                if isinstance(params.get("tickers"), list):
+                    params["tickers"] = ",".join(params["tickers"])
+            except (ValueError, AttributeError):
+                return self._send(400, {"error": "body must be a JSON object"})
+            self._dispatch(url.path, params)
+
+        def log_message(self, fmt, *args):
+            print(f"[service] {self.address_string()} {fmt % args}")
+
+    return Handler
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, **kwargs) -> ThreadingHTTPServer:
+    """Create the server (call .serve_forever() on it)."""
+    service = ResearchService(**kwargs)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Local research agent HTTP/JSON service")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--workers", type=int, default=4, help="concurrent research computations")
+    ap.add_argument("--queue", type=int, default=32, help="pending requests before answering 503")
+    ap.add_argument("--ttl", type=float, default=900, help="seconds inputs stay warm in memory")
+    ap.add_argument("--period", default="5y")
+    args = ap.parse_args(argv)
+
+    server = serve(args.host, args.port, workers=args.workers, queue_size=args.queue,
+                   ttl=args.ttl, period=args.period)
+    print(f"Research service on http://{args.host}:{args.port} (workers={args.workers}, queue={args.queue})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.executor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+Shard work queues for running the universe pipeline on many processes / machines.
+
+Two interchangeable backends with the same methods:
+
+    SqliteQueue("data_cache/universe/queue.sqlite")
+        one SQLite file; claims are `BEGIN IMMEDIATE` transactions. Best for
+        many processes on one machine (SQLite locking over NFS is unreliable)
+    FileQueue("/shared/universe/queue")
+        one JSON file per shard in pending/ running/ done/ failed/; a claim is
+        an atomic rename, so it works on a shared file system across nodes
+        (node clocks must roughly agree; a lease is the running file's mtime plus
+        the length in its name)
+
+A claimed shard carries a lease that the worker renews while it works
+(`run_worker` does this from a heartbeat thread). If a worker crashes the
+lease runs out and the next `claim` hands the shard to someone else; a shard
+that failed or was orphaned `max_attempts` times is parked as failed.
+Shard processing must therefore be idempotent (write outputs to a temp file
+and rename).
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shards (
+    id           INTEGER PRIMARY KEY,
+    tickers      TEXT NOT NULL,
+    status       TEXT NOT NULL DEFAULT 'pending',
+    worker       TEXT,
+    lease_until  REAL,
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    error        TEXT,
+    updated_at   REAL
+);
+CREATE INDEX IF NOT EXISTS ix_shards_status ON shards(status, id);
+"""
+
+
+def make_shards(tickers: Sequence[str], size: int) -> List[List[str]]:
+    return [list(tickers[i:i + size]) for i in range(0, len(tickers), size)]
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class SqliteQueue:
+    """Shard queue in one SQLite file (see module docstring)."""
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        self.path = path
+        self.max_attempts = max_attempts
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._conn.close()
+
+    def _tx(self, fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                out = fn(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return out
+
+    def seed(self, shards: Sequence[Sequence[str]], reset: bool = False) -> int:
+        """Enqueue shards unless the queue already holds some (resume); reset=True starts over."""
+        def fn(c):
+            if reset:
+                c.execute("DELETE FROM shards")
+            elif c.execute("SELECT COUNT(*) FROM shards").fetchone()[0]:
+                return 0
+            c.executemany("INSERT INTO shards (id, tickers, updated_at) VALUES (?, ?, ?)",
+                          [(i, json.dumps(list(s)), time.time()) for i, s in enumerate(shards)])
+            return len(shards)
+        return self._tx(fn)
+
+    def claim(self, worker: str, lease: float = 900) -> Tuple[int, List[str]] | None:
+        """Next pending shard, or a running one whose lease expired (its worker died)."""
+        def fn(c):
+            now = time.time()
+            # orphans that already used up their attempts are parked
+            c.execute("UPDATE shards SET status = 'failed', error = 'lease expired', updated_at = ?"
+                      " WHERE status = 'running' AND lease_until < ? AND attempts + 1 >= ?",
+                      (now, now, self.max_attempts))
+            row = c.execute("SELECT id, tickers, status FROM shards WHERE status = 'pending'"
+                            " OR (status = 'running' AND lease_until < ?) ORDER BY id LIMIT 1", (now,)).fetchone()
+            if row is None:
+                return None
+            c.execute("UPDATE shards SET status = 'running', worker = ?, lease_until = ?, updated_at = ?,"
+                      " attempts = attempts + ? WHERE id = ?",
+                      (worker, now + lease, now, int(row[2] == "running"), row[0]))
+            return row[0], json.loads(row[1])
+        return self._tx(fn)
+
+    def renew(self, shard: int, worker: str, lease: float = 900) -> bool:
+        def fn(c):
+            cur = c.execute("UPDATE shards SET lease_until = ?, updated_at = ? WHERE id = ? AND worker = ?"
+                            " AND status = 'running'", (time.time() + lease, time.time(), shard, worker))
+            return cur.rowcount == 1
+        return self._tx(fn)
+
+    def complete(self, shard: int, worker: str) -> bool:
+        def fn(c):
+            cur = c.execute("UPDATE shards SET status = 'done', error = NULL, updated_at = ? WHERE id = ?"
+                            " AND worker = ? AND status = 'running'", (time.time(), shard, worker))
+            return cur.rowcount == 1
+        return self._tx(fn)
+
+    def fail(self, shard: int, worker: str, error: str) -> str | None:
+        """Back to pending (or failed after max_attempts). Returns the new status."""
+        def fn(c):
+            row = c.execute("SELECT attempts FROM shards WHERE id = ? AND worker = ? AND status = 'running'",
+                            (shard, worker)).fetchone()
+            if row is None:
+                return None
+            status = "failed" if row[0] + 1 >= self.max_attempts else "pending"
+            c.execute("UPDATE shards SET status = ?, attempts = attempts + 1, error = ?, worker = NULL,"
+                      " updated_at = ? WHERE id = ?", (status, error[:500], time.time(), shard))
+            return status
+        return self._tx(fn)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM shards GROUP BY status").fetchall()
+        return dict(rows)
+
+    def failures(self) -> List[Tuple[int, str]]:
+        with self._lock:
+            return self._conn.execute("SELECT id, error FROM shards WHERE status = 'failed' ORDER BY id").fetchall()
+
+
+class FileQueue:
+    """Shard queue as files on a shared file system (see module docstring)."""
+
+    STATES = ("pending", "running", "done", "failed")
+
+    def __init__(self, root: str, max_attempts: int = 3):
+        self.root = root
+        self.max_attempts = max_attempts
+        for s in self.STATES:
+            os.makedirs(os.path.join(root, s), exist_ok=True)
+
+    def close(self):
+        pass
+
+    def _dir(self, state: str) -> str:
+        return os.path.join(self.root, state)
+
+    def _write(self, state: str, name: str, payload: dict):
+        path = os.path.join(self._dir(state), name)
+        tmp = os.path.join(self.root, f".{name}.{worker_id().replace(':', '-')}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _read(path: str) -> dict:
+        with open(path) as f:
+            return json.load(f)
+
+    def seed(self, shards: Sequence[Sequence[str]], reset: bool = False) -> int:
+        existing = [f for s in self.STATES for f in os.listdir(self._dir(s))]
+        if existing and not reset:
+            return 0
+        for s in self.STATES:
+            for f in os.listdir(self._dir(s)):
+                os.remove(os.path.join(self._dir(s), f))
+        for i, tickers in enumerate(shards):
+            self._write("pending", f"{i:06d}.json", {"id": i, "tickers": list(tickers), "attempts": 0})
+        return len(shards)
+
+    def _running_prefix(self, shard: int, worker: str) -> str:
+        return f"{shard:06d}@{worker.replace(os.sep, '_').replace('@', '_')}@"
+
+    def _running_path(self, shard: int, worker: str) -> str | None:
+        # the running name also carries the lease, which renew/complete/fail don't know
+        prefix = self._running_prefix(shard, worker)
+        for f in os.listdir(self._dir("running")):
+            if f.startswith(prefix) and f.endswith(".json"):
+                return os.path.join(self._dir("running"), f)
+        return None
+
+    @staticmethod
+    def _lease_of(name: str) -> float | None:
+        try:
+            return float(name[:-len(".json")].rsplit("@", 1)[1])
+        except (IndexError, ValueError):
+            return None
+
+    def _reclaim_expired(self):
+        now = time.time()
+        for f in sorted(os.listdir(self._dir("running"))):
+            path = os.path.join(self._dir("running"), f)
+            lease = self._lease_of(f) if f.endswith(".json") else None
+            if lease is None:                            # a reclaim in progress or no lease: not expired
+                continue
+            try:
+                if now - os.path.getmtime(path) < lease:
+                    continue
+                mine = f"{path}.reclaim.{worker_id().replace(':', '-')}"
+                os.rename(path, mine)                    # only one reclaimer wins
+            except FileNotFoundError:
+                continue
+            payload = self._read(mine)
+            payload["attempts"] += 1
+            state = "failed" if payload["attempts"] >= self.max_attempts else "pending"
+            payload["error"] = "lease expired"
+            self._write(state, f"{payload['id']:06d}.json", payload)
+            os.remove(mine)
+
+    def claim(self, worker: str, lease: float = 900) -> Tuple[int, List[str]] | None:
+        self._reclaim_expired()
+        for f in sorted(os.listdir(self._dir("pending"))):
+            shard = int(f.split(".")[0])
+            src = os.path.join(self._dir("pending"), f)
+            # the lease is in the name, so it is there the moment the shard shows up in running/;
+            # rename keeps the mtime, hence the touch first (a losing worker's touch is harmless)
+            name = f"{self._running_prefix(shard, worker)}{lease:g}.json"
+            try:
+                os.utime(src)
+                os.rename(src, os.path.join(self._dir("running"), name))
+            except FileNotFoundError:
+                continue                                  # another worker got it first
+            return shard, self._read(os.path.join(self._dir("running"), name))["tickers"]
+        return None
+
+    def renew(self, shard: int, worker: str, lease: float = 900) -> bool:
+        path = self._running_path(shard, worker)
+        if path is None:
+            return False
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _take(self, shard: int, worker: str) -> dict | None:
+        path = self._running_path(shard, worker)
+        if path is None:
+            return None
+        try:
+            payload = self._read(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return None
+        return payload
+
+    def complete(self, shard: int, worker: str) -> bool:
+        src = self._running_path(shard, worker)
+        if src is None:
+            return False
+        try:
+            os.rename(src, os.path.join(self._dir("done"), f"{shard:06d}.json"))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def fail(self, shard: int, worker: str, error: str) -> str | None:
+        payload = self._take(shard, worker)
+        if payload is None:
+            return None
+        payload["attempts"] += 1
+        payload["error"] = error[:500]
+        state = "failed" if payload["attempts"] >= self.max_attempts else "pending"
+        self._write(state, f"{shard:06d}.json", payload)
+        return state
+
+    def counts(self) -> Dict[str, int]:
+        out = {s: len([f for f in os.listdir(self._dir(s)) if f.endswith(".json")]) for s in self.STATES}
+        return {s: n for s, n in out.items() if n}
+
+    def failures(self) -> List[Tuple[int, str]]:
+        out = []
+        for f in sorted(os.listdir(self._dir("failed"))):
+            p = self._read(os.path.join(self._dir("failed"), f))
+            out.append((p["id"], p.get("error")))
+        return out
+
+
+def open_queue(path: str, max_attempts: int = 3):
+    """SqliteQueue for *.sqlite / *.db paths, FileQueue (a directory) otherwise."""
+    if path.endswith((".sqlite", ".db")):
+        return SqliteQueue(path, max_attempts)
+    return FileQueue(path, max_attempts)
+
+
+def run_worker(queue, process: Callable[[int, List[str]], None], worker: str | None = None,
+               lease: float = 900, max_shards: int | None = None, log: Callable[[str], None] = print) -> int:
+    """
+    Claim and process shards until the queue is drained (or `max_shards` done).
+    The lease is renewed every lease/3 seconds while `process(shard_id, tickers)` runs.
+    Returns the number of shards completed by this worker.
+    """
+    worker = worker or worker_id()
+    done = 0
+    while max_shards is None or done < max_shards:
+        job = queue.claim(worker, lease)
+        if job is None:
+            break
+        shard, tickers = job
+        stop = threading.Event()
+
+        def heartbeat():
+            while not stop.wait(lease / 3):
+                queue.renew(shard, worker, lease)
+
+        hb = threading.Thread(target=heartbeat, daemon=True)
+        hb.start()
+        t0 = time.time()
+        try:
+            process(shard, tickers)
+        except Exception as e:
+            stop.set()
+            status = queue.fail(shard, worker, f"{type(e).__name__}: {e}")
+            log(f"⚠️ [{worker}] shard {shard} failed ({status}): {type(e).__name__}: {e}")
+            continue
+        finally:
+            stop.set()
+            hb.join()
+        if queue.complete(shard, worker):
+            done += 1
+            log(f"✅ [{worker}] shard {shard}: {len(tickers)} tickers in {time.time() - t0:.1f}s")
+        else:
+            log(f"⚠️ [{worker}] shard {shard} lease lost before completion (another worker redoes it)")
+    return done
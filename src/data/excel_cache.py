@@ -0,0 +1,200 @@
+"""
+Excel -> Parquet conversion cache.
+
+Parsing an .xlsx with openpyxl is by far the slowest step of the offline
+workflow, so parsed + typed sheets are kept as Parquet next to a small JSON
+manifest holding fingerprints of the workbook and of every sheet:
+
+    <cache_dir>/<workbook stem>/manifest.json
+    <cache_dir>/<workbook stem>/<sheet>.parquet
+
+- unchanged workbook (same size + mtime, or same sha256) -> served from Parquet
+- changed workbook -> only sheets whose own fingerprint changed are re-parsed
+
+A sheet fingerprint is the hash of its worksheet XML plus the shared strings
+it references, so editing one sheet does not invalidate the others.
+"""
+
+import hashlib
+import json
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import Callable, Dict, List, Tuple
+
+import pandas as pd
+
+from .fingerprint import file_fingerprint, same_stat
+
+try:
+    import pyarrow  # noqa: F401
+    _PARQUET_OK = True
+except Exception:
+    _PARQUET_OK = False
+
+DEFAULT_CACHE_DIR = os.path.join("data_cache", "excel_cache")
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_SHARED_REF = re.compile(rb'<c\b[^>]*\bt="s"[^>]*>\s*<v>(\d+)</v>')
+_SI = re.compile(rb"<si>.*?</si>", re.S)
+
+
+def _sheet_parts(zf: zipfile.ZipFile) -> List[Tuple[str, str]]:
+    """Return [(sheet_name, zip member path)] in workbook order."""
+    wb = ET.fromstring(zf.read("xl/workbook.xml"))
+    rels = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+    targets = {r.get("Id"): r.get("Target") for r in rels.iter(f"{_NS_PKG}Relationship")}
+    out = []
+    for s in wb.iter(f"{_NS_MAIN}sheet"):
+        target = targets.get(s.get(f"{_NS_REL}id"), "")
+        target = target.lstrip("/")
+        if not target.startswith("xl/"):
+            target = "xl/" + target
+        out.append((s.get("name"), target))
+    return out
+
+
+def sheet_names(path: str) -> List[str]:
+    """Sheet names without loading the workbook (falls back to pandas for .xls)."""
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            return [name for name, _ in _sheet_parts(zf)]
+    return pd.ExcelFile(path).sheet_names
+
+
+def sheet_fingerprints(path: str, whole_file_hash: str = "") -> Dict[str, str]:
+    """
+    {sheet_name: sha256} for every sheet.
+    Non-zip workbooks (.xls) fall back to the whole-file hash for every sheet.
+    """
+    if not zipfile.is_zipfile(path):
+        return {name: whole_file_hash for name in sheet_names(path)}
+
+    with zipfile.ZipFile(path) as zf:
+        parts = _sheet_parts(zf)
+        shared = []
+        if "xl/sharedStrings.xml" in zf.namelist():
+            shared = _SI.findall(zf.read("xl/sharedStrings.xml"))
+        out = {}
+        for name, member in parts:
+            xml = zf.read(member)
+            h = hashlib.sha256(xml)
+            for idx in _SHARED_REF.findall(xml):
+                i = int(idx)
+                if i < len(shared):
+                    h.update(shared[i])
+            out[name] = h.hexdigest()
+    return out
+
+
+def _safe_name(sheet: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", sheet) or "sheet"
+
+
+def _load_manifest(path: str) -> dict:
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except Exception:
+            pass
+    return {}
+
+
+def _save_manifest(path: str, manifest: dict) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _arrow_safe(df: pd.DataFrame) -> pd.DataFrame:
+    out = df.copy()
+    # mixed-type object columns can't round-trip through Arrow; store as text
+    for c in out.columns:
+        if out[c].dtype == object:
+            out[c] = out[c].astype("string")
+    out.columns = [str(c) for c in out.columns]
+    return out
+
+
+def load_sheets_cached(
+    path: str,
+    sheets: List[str] | None = None,
+    parse: Callable[[pd.DataFrame], pd.DataFrame] | None = None,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+    parser_version: str = "1",
+) -> Tuple[Dict[str, pd.DataFrame], List[str]]:
+    """
+    Return ({sheet: parsed DataFrame}, [sheets that were re-parsed]).
+
+    Each stale sheet is read with pd.read_excel(header=None, dtype=object) and
+    passed through `parse` before being stored. Bump `parser_version` whenever
+    `parse` changes so that old Parquet files are not reused.
+    """
+    parse = parse or (lambda raw: raw)
+
+    if not _PARQUET_OK:
+        print("[info] pyarrow not installed – Excel cache disabled.")
+        names = sheets or sheet_names(path)
+        frames = {s: parse(pd.read_excel(path, sheet_name=s, header=None, dtype=object)) for s in names}
+        return frames, list(names)
+
+    root = os.path.join(cache_dir, _safe_name(os.path.splitext(os.path.basename(path))[0]))
+    os.makedirs(root, exist_ok=True)
+    manifest_path = os.path.join(root, "manifest.json")
+    manifest = _load_manifest(manifest_path)
+    if manifest.get("parser_version") != parser_version:
+        manifest = {"parser_version": parser_version, "sheets": {}}
+    cached = manifest.setdefault("sheets", {})
+
+    def _cached_frame(name: str) -> pd.DataFrame | None:
+        entry = cached.get(name)
+        if not entry:
+            return None
+        p = os.path.join(root, entry["file"])
+        if not os.path.exists(p):
+            return None
+        try:
+            return pd.read_parquet(p)
+        except Exception:
+            return None
+
+    # fast path: stat unchanged -> trust every cached sheet without hashing
+    stat_fp = file_fingerprint(path, with_hash=False)
+    wanted = sheets or manifest.get("sheet_order") or sheet_names(path)
+    if same_stat(manifest.get("workbook"), stat_fp):
+        frames = {s: _cached_frame(s) for s in wanted}
+        if all(f is not None for f in frames.values()):
+            return frames, []
+
+    full_fp = file_fingerprint(path)
+    per_sheet = sheet_fingerprints(path, full_fp["sha256"])
+    wanted = sheets or list(per_sheet)
+
+    frames, reparsed = {}, []
+    for s in wanted:
+        if s not in per_sheet:
+            raise KeyError(f"Sheet not found in workbook: {s}")
+        df = None
+        if cached.get(s, {}).get("sha256") == per_sheet[s]:
+            df = _cached_frame(s)
+        if df is None:
+            raw = pd.read_excel(path, sheet_name=s, header=None, dtype=object)
+            df = _arrow_safe(parse(raw))
+            fname = _safe_name(s) + ".parquet"
+            try:
+                df.to_parquet(os.path.join(root, fname))
+                cached[s] = {"sha256": per_sheet[s], "file": fname}
+            except Exception as e:
+                print(f"[warn] Could not cache sheet {s}: {type(e).__name__}: {e}")
+            reparsed.append(s)
+        frames[s] = df
+
+    manifest["workbook"] = full_fp
+    manifest["sheet_order"] = list(per_sheet)
+    _save_manifest(manifest_path, manifest)
+    return frames, reparsed
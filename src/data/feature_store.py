@@ -0,0 +1,223 @@
+"""
+Point-in-time, versioned store for the monthly feature tables.
+
+The pipeline scripts overwrite macro_monthly.csv / *_features_enriched.csv on
+every run, so FRED revisions and price adjustments silently rewrite history.
+Each run can instead `commit` its tables as an immutable version:
+
+    <root>/objects/<ab>/<sha256>.parquet     content-addressed partitions
+    <root>/versions/<version>.json           manifest: known_at, note, and per
+                                             table the partition -> object map
+
+- tables are split into partitions (calendar years of a date index, one
+  partition otherwise) and each partition is stored under the hash of its
+  content: a partition that did not change is written once and shared by
+  every version that contains it; a revision rewrites only the years it touched
+- a version is never modified after it is written (objects and manifests are
+  written to a temp file and renamed)
+- `as_of(table, date)` serves the latest version known on `date`;
+  `get(table, version)` a specific one. Manifests are small JSON files read
+  once per store instance; loaded partitions are kept in a small LRU
+- `diff` compares two versions from their manifests alone (partition hashes);
+  `diff_cells` then loads only the changed partitions for cell-level changes
+"""
+
+import datetime as dt
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Dict, List, Mapping
+
+import numpy as np
+import pandas as pd
+
+from .fingerprint import frame_fingerprint
+
+DEFAULT_STORE_DIR = os.path.join("data_cache", "Monthly", "store")
+
+
+def _atomic_write(path: str, write) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _partitions(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Calendar-year partitions of a date-indexed frame; {'all': df} otherwise."""
+    if isinstance(df.index, pd.DatetimeIndex) and len(df) and not df.index.hasnans:
+        years = df.index.year.to_numpy()
+        return {str(y): df[years == y] for y in np.unique(years)}
+    return {"all": df}
+
+
+def _object_key(part: pd.DataFrame) -> str:
+    dtypes = ",".join(map(str, part.dtypes))
+    return hashlib.sha256(f"{frame_fingerprint(part)}|{dtypes}|{part.index.dtype}".encode()).hexdigest()
+
+
+class FeatureStore:
+    """Immutable, deduplicated snapshots of named DataFrames with as-of lookup."""
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR, cache_size: int = 64):
+        self.root = root
+        self.cache_size = cache_size
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "versions"), exist_ok=True)
+        self._manifests: Dict[str, dict] | None = None
+        self._objects: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+
+    # -------- write --------
+    def _object_path(self, key: str) -> str:
+        return os.path.join(self.root, "objects", key[:2], f"{key}.parquet")
+
+    def _put(self, part: pd.DataFrame) -> str:
+        key = _object_key(part)
+        path = self._object_path(key)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _atomic_write(path, part.to_parquet)
+        return key
+
+    def commit(self, tables: Mapping[str, pd.DataFrame], known_at=None, note: str = "") -> str:
+        """
+        Store `tables` as a new version and return its id.
+        known_at -> the date this data was known (default: today, UTC).
+        Only partitions whose content is not stored yet are written.
+        """
+        created = dt.datetime.now(dt.timezone.utc)
+        known = pd.Timestamp(known_at if known_at is not None else created.date()).strftime("%Y-%m-%d")
+        entry = {}
+        for name, df in tables.items():
+            if df is None:
+                continue
+            parts = _partitions(df)
+            entry[name] = {"partitions": {p: self._put(part) for p, part in parts.items()}, "rows": len(df)}
+        digest = hashlib.sha256(json.dumps(entry, sort_keys=True).encode()).hexdigest()[:8]
+        version = f"{created:%Y%m%dT%H%M%S%f}-{digest}"
+        manifest = {"version": version, "known_at": known, "created_at": created.isoformat(timespec="seconds"),
+                    "note": note, "tables": entry}
+
+        def _write(tmp):
+            with open(tmp, "w") as f:
+                json.dump(manifest, f, indent=1)
+        _atomic_write(os.path.join(self.root, "versions", f"{version}.json"), _write)
+        if self._manifests is not None:
+            self._manifests[version] = manifest
+        return version
+
+    # -------- read --------
+    def _load_manifests(self) -> Dict[str, dict]:
+        if self._manifests is None:
+            out = {}
+            vdir = os.path.join(self.root, "versions")
+            for fname in sorted(os.listdir(vdir)):
+                if fname.endswith(".json"):
+                    with open(os.path.join(vdir, fname)) as f:
+                        m = json.load(f)
+                    out[m["version"]] = m
+            self._manifests = out
+        return self._manifests
+
+    def refresh(self):
+        """Re-read the version list (picks up commits made by other processes)."""
+        self._manifests = None
+
+    def versions(self) -> pd.DataFrame:
+        """One row per version, ordered by (known_at, created_at)."""
+        rows = [{"version": v, "known_at": pd.Timestamp(m["known_at"]), "created_at": m["created_at"],
+                 "note": m.get("note", ""), "tables": len(m["tables"])}
+                for v, m in self._load_manifests().items()]
+        cols = ["version", "known_at", "created_at", "note", "tables"]
+        return pd.DataFrame(rows, columns=cols).sort_values(["known_at", "created_at"], kind="stable").reset_index(drop=True)
+
+    def resolve(self, known_at=None, table: str | None = None) -> str:
+        """Id of the latest version known on `known_at` (any date-like; None = latest) holding `table`."""
+        cutoff = pd.Timestamp(known_at).strftime("%Y-%m-%d") if known_at is not None else "9999-12-31"
+        best = None
+        for v, m in self._load_manifests().items():
+            if m["known_at"] > cutoff or (table is not None and table not in m["tables"]):
+                continue
+            if best is None or (m["known_at"], m["created_at"], v) > best[0]:
+                best = ((m["known_at"], m["created_at"], v), v)
+        if best is None:
+            what = f"table {table!r}" if table else "any table"
+            raise KeyError(f"no version with {what} known on {cutoff}")
+        return best[1]
+
+    def _object(self, key: str) -> pd.DataFrame:
+        df = self._objects.get(key)
+        if df is None:
+            df = pd.read_parquet(self._object_path(key))
+            self._objects[key] = df
+            while len(self._objects) > self.cache_size:
+                self._objects.popitem(last=False)
+        else:
+            self._objects.move_to_end(key)
+        return df
+
+    def get(self, table: str, version: str | None = None) -> pd.DataFrame:
+        """`table` as stored in `version` (default: the latest version holding it)."""
+        version = version or self.resolve(table=table)
+        m = self._load_manifests().get(version)
+        if m is None:
+            raise KeyError(f"unknown version {version!r}")
+        if table not in m["tables"]:
+            raise KeyError(f"table {table!r} not in version {version}")
+        parts = m["tables"][table]["partitions"]
+        frames = [self._object(parts[p]) for p in sorted(parts)]
+        return frames[0].copy() if len(frames) == 1 else pd.concat(frames)
+
+    def as_of(self, table: str, known_at) -> pd.DataFrame:
+        """`table` as it was known on `known_at` (e.g. '2025-06-30')."""
+        return self.get(table, self.resolve(known_at, table))
+
+    def tables(self, version: str | None = None) -> List[str]:
+        version = version or self.resolve()
+        return list(self._load_manifests()[version]["tables"])
+
+    # -------- compare --------
+    def diff(self, old: str, new: str) -> pd.DataFrame:
+        """Partitions added / removed / changed between two versions (manifests only, no data read)."""
+        mo, mn = self._load_manifests()[old]["tables"], self._load_manifests()[new]["tables"]
+        rows = []
+        for table in sorted(set(mo) | set(mn)):
+            po = mo.get(table, {}).get("partitions", {})
+            pn = mn.get(table, {}).get("partitions", {})
+            for p in sorted(set(po) | set(pn)):
+                if p not in po:
+                    rows.append((table, p, "added"))
+                elif p not in pn:
+                    rows.append((table, p, "removed"))
+                elif po[p] != pn[p]:
+                    rows.append((table, p, "changed"))
+        return pd.DataFrame(rows, columns=["table", "partition", "status"])
+
+    def diff_cells(self, old: str, new: str, table: str) -> pd.DataFrame:
+        """Cell-level changes of `table` (index, column, old, new), reading only partitions that differ."""
+        changed = self.diff(old, new)
+        changed = changed[changed["table"] == table]
+        mo = self._load_manifests()[old]["tables"].get(table, {}).get("partitions", {})
+        mn = self._load_manifests()[new]["tables"].get(table, {}).get("partitions", {})
+        out = []
+        for p in changed["partition"]:
+            a = self._object(mo[p]) if p in mo else None
+            b = self._object(mn[p]) if p in mn else None
+            a = a if a is not None else pd.DataFrame(columns=b.columns)
+            b = b if b is not None else pd.DataFrame(columns=a.columns)
+            idx = a.index.union(b.index)
+            cols = a.columns.union(b.columns, sort=False)
+            av = a.reindex(index=idx, columns=cols)
+            bv = b.reindex(index=idx, columns=cols)
+            both_nan = av.isna() & bv.isna()
+            ne = (av != bv) & ~both_nan
+            if not ne.to_numpy().any():
+                continue
+            r, c = np.nonzero(ne.to_numpy())
+            out.append(pd.DataFrame({
+                "index": idx[r], "column": cols[c],
+                "old": av.to_numpy()[r, c], "new": bv.to_numpy()[r, c],
+            }))
+        if not out:
+            return pd.DataFrame(columns=["index", "column", "old", "new"])
+        return pd.concat(out, ignore_index=True)
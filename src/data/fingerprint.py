@@ -0,0 +1,68 @@
+import hashlib
+import os
+
+import pandas as pd
+
+_CHUNK = 1 << 20
+
+
+def file_digest(path: str) -> str:
+    """
+    Return the sha256 hex digest of a file, read in 1 MiB chunks.
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def file_fingerprint(path: str, with_hash: bool = True) -> dict:
+    """
+    Return {'size', 'mtime_ns', 'sha256'} for a file.
+    Set with_hash=False for the cheap stat-only variant ('sha256' is then None).
+    """
+    st = os.stat(path)
+    return {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": file_digest(path) if with_hash else None,
+    }
+
+
+def same_stat(a: dict | None, b: dict | None) -> bool:
+    """True when two fingerprints agree on size and mtime."""
+    if not a or not b:
+        return False
+    return a.get("size") == b.get("size") and a.get("mtime_ns") == b.get("mtime_ns")
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Content hash of a DataFrame (index, columns and values), stable across runs.
+    """
+    h = hashlib.sha256()
+    h.update(repr(list(map(str, df.columns))).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return h.hexdigest()
+
+
+def diff_fingerprints(paths: dict, previous: dict | None) -> tuple[dict, list]:
+    """
+    Compare {name: path} against a previous {name: fingerprint} mapping.
+    Returns (current fingerprints, names that are new or whose content changed).
+    Files with unchanged size + mtime are not re-hashed.
+    """
+    previous = previous or {}
+    current, changed = {}, []
+    for name, path in paths.items():
+        old = previous.get(name)
+        stat = file_fingerprint(path, with_hash=False)
+        if same_stat(old, stat) and old.get("sha256"):
+            current[name] = old
+            continue
+        fp = file_fingerprint(path)
+        current[name] = fp
+        if not old or old.get("sha256") != fp["sha256"]:
+            changed.append(name)
+    return current, changed
@@ -2,6 +2,8 @@ import os
 import pandas as pd
 import requests
 
+from .raw_cache import record_file
+
 # NEW: ensure .env is loaded and overrides any old shell values
 try:
     from dotenv import load_dotenv
@@ -32,8 +34,8 @@ def _load_cache(series_id: str) -> pd.DataFrame | None:
 def _save_cache(series_id: str, df: pd.DataFrame) -> None:
     df.to_csv(_cache_path(series_id), index=False)
 
-def _get_key() -> str:
-    key = os.getenv("FRED_API_KEY")
+def _get_key(key: str | None = None) -> str:
+    key = key or os.getenv("FRED_API_KEY")
     # Treat the demo/placeholder as missing too
     if not key or key.strip().upper() == "YOUR_KEY":
         raise MissingApiKey(
@@ -42,17 +44,20 @@ def _get_key() -> str:
         )
     return key
 
-def get_fred_series(series_id: str, start: str = "2015-01-01", use_cache: bool = True) -> pd.DataFrame:
+def get_fred_series(series_id: str, start: str = "2015-01-01", use_cache: bool = True,
+                    api_key: str | None = None, refresh: bool = False) -> pd.DataFrame:
     """
     Return a tidy DataFrame with columns: date (datetime64[ns]), value (float).
-    Priority: load from cache -> else fetch from API (requires FRED_API_KEY).
+    Priority: load from cache -> else fetch from API (requires FRED_API_KEY or api_key).
+    refresh=True always fetches and rewrites the cache (used by the refresh scheduler).
     """
-    if use_cache:
+    if use_cache and not refresh:
         cached = _load_cache(series_id)
         if cached is not None:
+            record_file(_cache_path(series_id), True, "fred")
             return cached
 
-    api_key = _get_key()
+    api_key = _get_key(api_key)
     params = {
         "series_id": series_id,
         "api_key": api_key,
@@ -67,8 +72,9 @@ def get_fred_series(series_id: str, start: str = "2015-01-01", use_cache: bool =
     df["date"] = pd.to_datetime(df["date"])
     df["value"] = pd.to_numeric(df["value"], errors="coerce")
 
-    if use_cache:
+    if use_cache or refresh:
         _save_cache(series_id, df)
+        record_file(_cache_path(series_id), False, "fred")
 
     return df
 
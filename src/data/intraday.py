@@ -0,0 +1,334 @@
+"""
+Intraday bars (minute / hourly) with streaming, session-aware aggregation.
+
+Bars are fetched one calendar month at a time and written to
+
+    <root>/<interval>/<TICKER>/<YYYY-MM>.parquet
+
+plus `_through.json`, the last complete exchange date each month file was
+fetched through. A rerun only fetches months that are missing or whose file
+stops short of the month's last session (written while the month was open,
+or cut off by `end`). Daily and
+monthly aggregates are built by streaming those month files (or any other
+iterator of bar chunks) through `SessionAggregator`, which keeps only the
+session still in progress between chunks — memory depends on the chunk size,
+not on the number of bars.
+
+Per session (exchange-local date, regular hours by default):
+  open / high / low / close, volume, vwap = sum(price * volume) / sum(volume)
+  (price = the bar's own vwap when the source has one, else (h + l + c) / 3),
+  realized_vol = sqrt(sum of squared log close-to-close returns within the
+  session; overnight gaps are excluded), bars = number of bars.
+`monthly_bars` rolls sessions up exactly (vwap from dollar volume, realized
+variance summed over sessions). Volatilities are not annualized.
+"""
+
+import json
+import os
+import time
+from typing import Callable, Iterable, Iterator, List
+
+import numpy as np
+import pandas as pd
+import requests
+
+POLY_BASE = "https://api.polygon.io"
+DEFAULT_INTRADAY_DIR = os.path.join("data_cache", "intraday")
+COLUMNS = ["ts", "open", "high", "low", "close", "volume", "vwap"]
+DAILY_COLUMNS = ["open", "high", "low", "close", "volume", "vwap", "realized_vol", "bars"]
+
+# interval -> (multiplier, timespan) for Polygon aggregates
+POLYGON_INTERVALS = {
+    "1m": (1, "minute"), "5m": (5, "minute"), "15m": (15, "minute"),
+    "30m": (30, "minute"), "60m": (1, "hour"), "1h": (1, "hour"),
+}
+
+SESSIONS = {
+    "regular": ("09:30", "16:00"),
+    "extended": ("04:00", "20:00"),
+}
+
+
+def month_windows(start, end) -> List[pd.Period]:
+    return list(pd.period_range(pd.Timestamp(start), pd.Timestamp(end), freq="M"))
+
+
+def _bars_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Conform a bar chunk to COLUMNS with a tz-aware UTC `ts`."""
+    ts = pd.to_datetime(df["ts"], utc=True)
+    out = pd.DataFrame({"ts": ts})
+    for c in COLUMNS[1:]:
+        out[c] = pd.to_numeric(df[c], errors="coerce").to_numpy() if c in df else np.nan
+    return out.sort_values("ts", kind="stable").reset_index(drop=True)
+
+
+# -------- fetchers (one month per chunk) --------
+def polygon_bar_chunks(ticker: str, start, end, interval: str = "1m",
+                       api_key: str | None = None, pause: float = 0.15) -> Iterator[tuple]:
+    """Yield (month, bars) from Polygon v2 aggregates, following `next_url` pagination."""
+    api_key = api_key or os.getenv("POLYGON_API_KEY", "")
+    if not api_key:
+        raise RuntimeError("POLYGON_API_KEY not set.")
+    mult, span = POLYGON_INTERVALS[interval]
+    lo, hi = pd.Timestamp(start), pd.Timestamp(end)
+    for month in month_windows(lo, hi):
+        a = max(month.start_time, lo).strftime("%Y-%m-%d")
+        b = min(month.end_time, hi).strftime("%Y-%m-%d")
+        url = f"{POLY_BASE}/v2/aggs/ticker/{ticker}/range/{mult}/{span}/{a}/{b}"
+        params = {"adjusted": "true", "sort": "asc", "limit": 50000, "apiKey": api_key}
+        pages = []
+        while url:
+            r = requests.get(url, params=params, timeout=30)
+            r.raise_for_status()
+            js = r.json()
+            pages.extend(js.get("results") or [])
+            url, params = js.get("next_url"), {"apiKey": api_key}
+            time.sleep(pause)
+        if not pages:
+            continue
+        df = pd.DataFrame(pages).rename(columns={"o": "open", "h": "high", "l": "low", "c": "close",
+                                                 "v": "volume", "vw": "vwap"})
+        df["ts"] = pd.to_datetime(df["t"], unit="ms", utc=True)
+        yield month, _bars_frame(df)
+
+
+def yahoo_bar_chunks(ticker: str, start, end, interval: str = "60m") -> Iterator[tuple]:
+    """
+    Yield (month, bars) from Yahoo Finance. Yahoo only serves recent intraday
+    history (about 30 days of 1m bars, 730 days of hourly), and 1m requests
+    are limited to 7-day windows.
+    """
+    import yfinance as yf
+    step = pd.Timedelta(days=7 if interval == "1m" else 59)
+    lo, hi = pd.Timestamp(start), pd.Timestamp(end) + pd.Timedelta(days=1)
+    tk = yf.Ticker(ticker)
+    for month in month_windows(lo, pd.Timestamp(end)):
+        a, b = max(month.start_time, lo), min(month.end_time + pd.Timedelta(1, "ns"), hi)
+        parts = []
+        while a < b:
+            c = min(a + step, b)
+            df = tk.history(start=a.strftime("%Y-%m-%d"), end=c.strftime("%Y-%m-%d"), interval=interval)
+            if not df.empty:
+                parts.append(df.reset_index().rename(columns=str.lower))
+            a = c
+        if not parts:
+            continue
+        df = pd.concat(parts, ignore_index=True)
+        df["ts"] = df["datetime"] if "datetime" in df else df["date"]
+        df = _bars_frame(df)
+        yield month, df[~df["ts"].duplicated(keep="last")]
+
+
+# -------- streaming aggregation --------
+class SessionAggregator:
+    """
+    Feed time-ordered bar chunks of one ticker with `update`; each call returns
+    the sessions completed so far, `flush` returns the last one. Only the open
+    session's running sums are kept between calls.
+    """
+
+    def __init__(self, tz: str = "America/New_York", session: str | tuple | None = "regular"):
+        self.tz = tz
+        hours = SESSIONS.get(session, session) if isinstance(session, str) else session
+        self.hours = None if hours is None else tuple(pd.Timedelta(f"{h}:00") for h in hours)
+        self._pending: pd.DataFrame | None = None       # partial sums of the open session
+        self._last = (None, np.nan)                      # (session date, close) of the last bar
+        self._last_ts = None
+
+    def update(self, bars: pd.DataFrame) -> pd.DataFrame:
+        if bars.empty:
+            return _empty_daily()
+        bars = _bars_frame(bars)
+        if self._last_ts is not None and bars["ts"].iloc[0] < self._last_ts:
+            raise ValueError("bar chunks must be in time order")
+        self._last_ts = bars["ts"].iloc[-1]
+
+        local = bars["ts"].dt.tz_convert(self.tz)
+        day = local.dt.tz_localize(None).dt.normalize()
+        if self.hours is not None:
+            tod = local.dt.tz_localize(None) - day
+            keep = ((tod >= self.hours[0]) & (tod < self.hours[1])).to_numpy()
+            bars, day = bars[keep], day[keep]
+            if bars.empty:
+                return _empty_daily()
+
+        close = bars["close"].to_numpy(dtype=np.float64)
+        d = day.to_numpy()
+        prev_close = np.r_[self._last[1], close[:-1]]
+        prev_day = np.r_[np.datetime64("NaT") if self._last[0] is None else self._last[0], d[:-1]]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = np.log(close / prev_close)
+        r2 = np.where((prev_day == d) & np.isfinite(r), r * r, 0.0)
+        self._last = (d[-1], close[-1])
+
+        vol = bars["volume"].fillna(0.0).to_numpy(dtype=np.float64)
+        typical = (bars["high"] + bars["low"] + bars["close"]).to_numpy(dtype=np.float64) / 3
+        price = np.where(np.isnan(bars["vwap"].to_numpy(dtype=np.float64)), typical, bars["vwap"].to_numpy())
+        parts = pd.DataFrame({
+            "open": bars["open"].to_numpy(), "high": bars["high"].to_numpy(), "low": bars["low"].to_numpy(),
+            "close": close, "volume": vol, "dollar_volume": price * vol, "realized_var": r2, "bars": 1,
+        }, index=pd.DatetimeIndex(d, name="date"))
+        g = parts.groupby(level=0, sort=False)
+        sums = g.agg({"open": "first", "high": "max", "low": "min", "close": "last",
+                      "volume": "sum", "dollar_volume": "sum", "realized_var": "sum", "bars": "sum"})
+
+        if self._pending is not None:
+            if sums.index[0] == self._pending.index[0]:
+                sums = pd.concat([_combine(self._pending, sums.iloc[:1]), sums.iloc[1:]])
+            else:
+                sums = pd.concat([self._pending, sums])
+        self._pending = sums.iloc[-1:]
+        return _finish(sums.iloc[:-1])
+
+    def flush(self) -> pd.DataFrame:
+        done, self._pending = self._pending, None
+        return _empty_daily() if done is None else _finish(done)
+
+
+def _combine(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    """Merge partial sums of the same session (a earlier than b)."""
+    out = b.copy()
+    out["open"] = a["open"].to_numpy()
+    out["high"] = np.fmax(a["high"].to_numpy(), b["high"].to_numpy())
+    out["low"] = np.fmin(a["low"].to_numpy(), b["low"].to_numpy())
+    for c in ("volume", "dollar_volume", "realized_var", "bars"):
+        out[c] = a[c].to_numpy() + b[c].to_numpy()
+    return out
+
+
+def _finish(sums: pd.DataFrame) -> pd.DataFrame:
+    out = sums[["open", "high", "low", "close", "volume"]].copy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["vwap"] = np.where(sums["volume"] > 0, sums["dollar_volume"] / sums["volume"], np.nan)
+    out["realized_vol"] = np.sqrt(sums["realized_var"])
+    out["bars"] = sums["bars"].astype(np.int64)
+    return out
+
+
+def _empty_daily() -> pd.DataFrame:
+    return pd.DataFrame(columns=DAILY_COLUMNS, index=pd.DatetimeIndex([], name="date"))
+
+
+def daily_bars(chunks: Iterable[pd.DataFrame], tz: str = "America/New_York",
+               session: str | tuple | None = "regular") -> pd.DataFrame:
+    """Stream bar chunks (time-ordered, one ticker) into one row per session."""
+    agg = SessionAggregator(tz, session)
+    out = [agg.update(c) for c in chunks]
+    out.append(agg.flush())
+    out = [d for d in out if len(d)]
+    return pd.concat(out) if out else _empty_daily()
+
+
+def monthly_bars(daily: pd.DataFrame) -> pd.DataFrame:
+    """Month-end roll-up of `daily_bars` output (same columns; `bars` = sessions)."""
+    if daily.empty:
+        return daily.copy()
+    d = daily.assign(dollar_volume=daily["vwap"] * daily["volume"], realized_var=daily["realized_vol"] ** 2)
+    g = d.groupby(d.index.to_period("M").to_timestamp("M"))
+    out = g.agg({"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum",
+                 "dollar_volume": "sum", "realized_var": "sum", "bars": "size"})
+    out.index.name = "date"
+    return _finish(out)
+
+
+# -------- month-file store --------
+class IntradayStore:
+    """Month-partitioned Parquet bar files for one interval; incomplete months are refetched."""
+
+    def __init__(self, root: str = DEFAULT_INTRADAY_DIR, interval: str = "1m"):
+        self.root = root
+        self.interval = interval
+
+    def _dir(self, ticker: str) -> str:
+        return os.path.join(self.root, self.interval, ticker.upper())
+
+    def path(self, ticker: str, month) -> str:
+        return os.path.join(self._dir(ticker), f"{pd.Period(month, 'M')}.parquet")
+
+    def months(self, ticker: str) -> List[pd.Period]:
+        d = self._dir(ticker)
+        if not os.path.isdir(d):
+            return []
+        return sorted(pd.Period(f[:-len(".parquet")], "M") for f in os.listdir(d) if f.endswith(".parquet"))
+
+    def _through_path(self, ticker: str) -> str:
+        return os.path.join(self._dir(ticker), "_through.json")
+
+    def _load_through(self, ticker: str) -> dict:
+        try:
+            with open(self._through_path(ticker)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_through(self, ticker: str, through: dict):
+        path = self._through_path(ticker)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(dict(sorted(through.items())), f, indent=2)
+        os.replace(tmp, path)
+
+    def fetched_through(self, ticker: str, month) -> pd.Timestamp | None:
+        """Last exchange date the month file is complete through (None if there is no file)."""
+        m = pd.Period(month, "M")
+        hit = self._load_through(ticker).get(str(m))
+        if hit is not None:
+            return pd.Timestamp(hit)
+        path = self.path(ticker, m)
+        if not os.path.exists(path):
+            return None
+        # files written before the marker existed: trust their last bar's date
+        ts = pd.read_parquet(path, columns=["ts"])["ts"]
+        return pd.Timestamp(ts.max()).tz_convert("America/New_York").tz_localize(None).normalize()
+
+    def ingest(self, ticker: str, fetch: Callable[..., Iterator[tuple]], start, end,
+               now=None) -> List[pd.Period]:
+        """
+        Fetch and write the months of [start, end] that are missing or were
+        fetched short of min(end, the month's last session) - the month still
+        open, or an earlier run's `end`. `fetch(ticker, start, end)` yields
+        (month, bars) like `polygon_bar_chunks`. Returns the months written.
+        """
+        now = pd.Timestamp.now(tz="America/New_York") if now is None else pd.Timestamp(now)
+        if now.tzinfo is not None:
+            now = now.tz_convert("America/New_York").tz_localize(None)
+        complete = now.normalize() - pd.Timedelta(days=1)          # today's session may still be trading
+        todo = []
+        for m in month_windows(start, end):
+            last_session = pd.offsets.BMonthEnd().rollforward(m.start_time)
+            wanted = min(last_session, pd.Timestamp(end).normalize(), complete)
+            through = self.fetched_through(ticker, m)
+            if through is None or through < wanted:
+                todo.append(m)
+        if not todo:
+            return []
+        os.makedirs(self._dir(ticker), exist_ok=True)
+        marks = self._load_through(ticker)
+        written = []
+        for m in todo:
+            lo = max(m.start_time, pd.Timestamp(start)).normalize()
+            hi = min(m.end_time, pd.Timestamp(end)).normalize()
+            for month, bars in fetch(ticker, lo, hi):
+                if month != m or bars.empty:
+                    continue
+                path = self.path(ticker, month)
+                tmp = f"{path}.{os.getpid()}.tmp"
+                bars.to_parquet(tmp, index=False)
+                os.replace(tmp, path)
+                marks[str(month)] = str(min(hi, complete).date())
+                written.append(month)
+        if written:
+            self._save_through(ticker, marks)
+        return written
+
+    def iter_bars(self, ticker: str, start=None, end=None) -> Iterator[pd.DataFrame]:
+        """One month of bars at a time, in time order."""
+        lo = pd.Timestamp(start).to_period("M") if start is not None else None
+        hi = pd.Timestamp(end).to_period("M") if end is not None else None
+        for m in self.months(ticker):
+            if (lo is None or m >= lo) and (hi is None or m <= hi):
+                yield pd.read_parquet(self.path(ticker, m))
+
+    def daily(self, ticker: str, session: str | tuple | None = "regular", tz: str = "America/New_York",
+              start=None, end=None) -> pd.DataFrame:
+        return daily_bars(self.iter_bars(ticker, start, end), tz=tz, session=session)
@@ -0,0 +1,180 @@
+"""
+Streaming merge of per-ticker price CSVs into one long-form columnar file.
+
+Each `data_cache/<TICKER>_prices.csv` is already one ticker sorted by date, so
+the (ticker, date) order of the merged dataset is obtained by walking tickers
+in sorted order and streaming their rows — no global sort, no full concat.
+
+- CSVs are parsed in parallel with pyarrow's reader (GIL-free) with a bounded
+  prefetch window, so only a few files are held in memory at once
+- rows are written as Parquet row groups of `batch_rows`
+- `ticker` is dictionary-encoded; in the Parquet file `date` is normalised
+  to timestamp[ns, UTC] (so 2024-01-02 00:00-05:00 reads back as
+  2024-01-02 05:00Z - convert to America/New_York for session dates)
+- the CSV mirror keeps each row's `date` text exactly as it was in its source
+  file (e.g. "2024-01-02 00:00:00-05:00" from yfinance), like the old
+  pandas-concat output
+
+Peak memory is roughly `batch_rows` rows plus the prefetch window.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+SCHEMA = pa.schema([
+    ("date", pa.timestamp("ns", tz="UTC")),
+    ("ticker", pa.dictionary(pa.int32(), pa.string())),
+    ("open", pa.float64()),
+    ("high", pa.float64()),
+    ("low", pa.float64()),
+    ("close", pa.float64()),
+    ("volume", pa.int64()),
+])
+# rows carry their source date text along for the CSV mirror
+_READ_SCHEMA = SCHEMA.append(pa.field("date_text", pa.string()))
+CSV_SCHEMA = pa.schema([pa.field("date", pa.string()), pa.field("ticker", pa.string())] + list(SCHEMA)[2:])
+
+
+def ticker_from_path(path: str) -> str:
+    return os.path.basename(path).split("_")[0]
+
+
+def group_by_ticker(files: List[str]) -> Dict[str, List[str]]:
+    """{ticker: [files]} in sorted ticker order."""
+    out: Dict[str, List[str]] = {}
+    for f in sorted(files):
+        out.setdefault(ticker_from_path(f), []).append(f)
+    return dict(sorted(out.items()))
+
+
+def _to_utc(col: pa.ChunkedArray) -> pa.ChunkedArray:
+    if pa.types.is_timestamp(col.type):
+        if col.type.tz is None:
+            col = pc.assume_timezone(col.cast(pa.timestamp("ns")), "UTC")
+        return col.cast(pa.timestamp("ns", tz="UTC"))
+    # ISO-8601 text; date-only / offset-less values are taken as UTC
+    try:
+        return pc.cast(col, pa.timestamp("ns", tz="UTC"))
+    except pa.ArrowInvalid:
+        return pc.assume_timezone(pc.cast(col, pa.timestamp("ns")), "UTC")
+
+
+def read_ticker(ticker: str, paths: List[str]) -> pa.Table:
+    """Read all files of one ticker, conform to SCHEMA and order by date (dups: last file wins)."""
+    parts = []
+    for p in paths:
+        t = pacsv.read_csv(p, convert_options=pacsv.ConvertOptions(
+            column_types={"date": pa.string(), "Date": pa.string()}))
+        cols = {c.lower(): t.column(c) for c in t.column_names}
+        n = t.num_rows
+        arrays = []
+        for field in SCHEMA:
+            if field.name == "ticker":
+                arrays.append(pa.DictionaryArray.from_arrays(
+                    pa.array([0] * n, pa.int32()), pa.array([ticker])))
+            elif field.name == "date":
+                arrays.append(_to_utc(cols["date"]))
+            elif field.name in cols:
+                arrays.append(pc.cast(cols[field.name], field.type, safe=False))
+            else:
+                arrays.append(pa.nulls(n, field.type))
+        arrays.append(pc.cast(cols["date"], pa.string()))
+        parts.append(pa.Table.from_arrays(arrays, schema=_READ_SCHEMA))
+    table = pa.concat_tables(parts) if len(parts) > 1 else parts[0]
+
+    dates = table.column("date")
+    if len(parts) > 1 or not _is_sorted(dates):
+        # stable sort keeps later files after earlier ones for equal dates
+        table = table.take(pc.sort_indices(table, sort_keys=[("date", "ascending")]))
+        if len(parts) > 1 and table.num_rows > 1:
+            d = table.column("date").combine_chunks()
+            keep = pc.fill_null(pc.not_equal(d[:-1], d[1:]), True)
+            table = table.filter(pa.concat_arrays([keep, pa.array([True])]))
+    return table
+
+
+def _is_sorted(col: pa.ChunkedArray) -> bool:
+    if len(col) < 2:
+        return True
+    a = col.combine_chunks()
+    return pc.all(pc.less_equal(a[:-1], a[1:])).as_py() is not False
+
+
+def iter_tables(groups: Dict[str, List[str]], workers: int = 4) -> Iterator[pa.Table]:
+    """Yield one table per ticker in ticker order, parsing up to `2 * workers` files ahead."""
+    window = max(1, 2 * workers)
+    items = iter(groups.items())
+    pending: deque = deque()
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        for _ in range(window):
+            nxt = next(items, None)
+            if nxt is None:
+                break
+            pending.append((nxt[0], ex.submit(read_ticker, *nxt)))
+        while pending:
+            ticker, fut = pending.popleft()
+            nxt = next(items, None)
+            if nxt is not None:
+                pending.append((nxt[0], ex.submit(read_ticker, *nxt)))
+            try:
+                yield fut.result()
+            except Exception as e:
+                print(f"⚠️ Skipping {ticker}: {type(e).__name__}: {e}")
+
+
+def merge_price_files(
+    files: List[str],
+    out_path: str,
+    csv_path: str | None = None,
+    batch_rows: int = 250_000,
+    workers: int = 4,
+) -> int:
+    """
+    Stream-merge per-ticker CSVs into `out_path` (Parquet), optionally mirroring
+    the same rows to `csv_path` (original date text, see module docstring).
+    Returns the number of rows written.
+    """
+    groups = group_by_ticker(files)
+    pq_writer = pq.ParquetWriter(out_path, SCHEMA)
+    csv_writer = None
+    if csv_path:
+        csv_writer = pacsv.CSVWriter(csv_path, CSV_SCHEMA)
+
+    buf: List[pa.Table] = []
+    buffered = total = 0
+
+    def _flush():
+        nonlocal buf, buffered, total
+        if not buf:
+            return
+        table = pa.concat_tables(buf).unify_dictionaries().combine_chunks()
+        pq_writer.write_table(table.select(SCHEMA.names), row_group_size=batch_rows)
+        if csv_writer is not None:
+            csv_cols = [table.column("date_text"), table.column("ticker").cast(pa.string())]
+            csv_cols += [table.column(name) for name in SCHEMA.names[2:]]
+            csv_writer.write_table(pa.Table.from_arrays(csv_cols, schema=CSV_SCHEMA))
+        total += table.num_rows
+        buf, buffered = [], 0
+
+    try:
+        for table in iter_tables(groups, workers=workers):
+            # split big tickers so a single row group never exceeds batch_rows
+            for off in range(0, table.num_rows, batch_rows):
+                chunk = table.slice(off, batch_rows)
+                buf.append(chunk)
+                buffered += chunk.num_rows
+                if buffered >= batch_rows:
+                    _flush()
+        _flush()
+    finally:
+        pq_writer.close()
+        if csv_writer is not None:
+            csv_writer.close()
+    return total
@@ -0,0 +1,43 @@
+import os
+import datetime as dt
+
+import pandas as pd
+import requests
+
+NEWS_URL = "https://newsapi.org/v2/everything"
+NEWS_COLUMNS = ["published_at", "source", "title", "description", "url"]
+
+def get_news(ticker: str, api_key: str | None = None, days: int = 7, page_size: int = 20) -> pd.DataFrame:
+    """
+    Recent articles mentioning `ticker` from NewsAPI.
+    Columns: published_at, source, title, description, url
+    Returns an empty frame when no NEWS_API_KEY is available or the request fails.
+    """
+    key = api_key or os.getenv("NEWS_API_KEY")
+    if not key:
+        return pd.DataFrame(columns=NEWS_COLUMNS)
+    params = {
+        "q": ticker,
+        "from": (dt.date.today() - dt.timedelta(days=days)).isoformat(),
+        "sortBy": "publishedAt",
+        "language": "en",
+        "pageSize": page_size,
+        "apiKey": key,
+    }
+    try:
+        r = requests.get(NEWS_URL, params=params, timeout=15)
+        r.raise_for_status()
+        articles = r.json().get("articles", [])
+    except Exception as e:
+        print(f"⚠️ News fetch failed for {ticker}: {e}")
+        return pd.DataFrame(columns=NEWS_COLUMNS)
+    rows = [{
+        "published_at": a.get("publishedAt"),
+        "source": (a.get("source") or {}).get("name"),
+        "title": a.get("title"),
+        "description": a.get("description"),
+        "url": a.get("url"),
+    } for a in articles]
+    df = pd.DataFrame(rows, columns=NEWS_COLUMNS)
+    df["published_at"] = pd.to_datetime(df["published_at"], errors="coerce", utc=True)
+    return df
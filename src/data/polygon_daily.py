@@ -0,0 +1,307 @@
+"""
+Daily Polygon bars for large universes: ticker-major or date-major fetching.
+
+Polygon serves daily aggregates two ways:
+
+    ticker-major  /v2/aggs/ticker/{T}/range/1/day/{a}/{b}
+                  one call per ticker, any date span
+    date-major    /v2/aggs/grouped/locale/us/market/stocks/{date}
+                  one call per date, every US ticker
+
+Refreshing the last few sessions of a 5,000-ticker universe is 5,000 calls
+ticker-major but a handful date-major; backfilling twenty tickers over five
+years is the other way round. `plan_fetch` picks a cutoff date per refresh:
+tickers that need data from before the cutoff are fetched ticker-major, every
+session from the cutoff on is fetched date-major, and the cutoff is chosen to
+minimise the total number of calls (so a tail refresh goes date-major, a new
+ticker added to the universe gets its own history call).
+
+Grouped results are transposed into the ticker-partitioned store
+
+    <root>/<TICKER>.parquet          date, open, high, low, close, volume, vwap, trades
+    <root>/_through.json             ticker -> last session already fetched
+
+`_through.json` also records sessions that returned no bar (holidays, halted
+tickers), so they are not asked for again. Adjusted prices from an
+incremental tail do not line up with history stored before a split, so the
+splits executed since the last refresh are looked up (one call) and those
+tickers are refetched in full.
+"""
+
+import json
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+import requests
+
+POLY_BASE = "https://api.polygon.io"
+DEFAULT_DAILY_DIR = os.path.join("data_cache", "daily")
+COLUMNS = ["date", "open", "high", "low", "close", "volume", "vwap", "trades"]
+EXCHANGE_TZ = "America/New_York"
+
+
+def _api_key(api_key: str | None) -> str:
+    api_key = api_key or os.getenv("POLYGON_API_KEY", "")
+    if not api_key:
+        raise RuntimeError("POLYGON_API_KEY not set.")
+    return api_key
+
+
+def _get_json(url: str, params: dict, tries: int = 4, backoff: float = 2.0) -> dict:
+    for i in range(tries):
+        r = requests.get(url, params=params, timeout=30)
+        if r.status_code == 429 and i < tries - 1:        # rate limited: back off and retry
+            time.sleep(backoff * (i + 1))
+            continue
+        r.raise_for_status()
+        return r.json()
+
+
+def _bars(results: List[dict], ticker: str | None = None) -> pd.DataFrame:
+    """Polygon aggregate rows -> COLUMNS (+ ticker), date = exchange-local session date."""
+    if not results:
+        return pd.DataFrame(columns=(["ticker"] if ticker is None else []) + COLUMNS)
+    df = pd.DataFrame(results).rename(columns={"T": "ticker", "o": "open", "h": "high", "l": "low",
+                                               "c": "close", "v": "volume", "vw": "vwap", "n": "trades"})
+    stamp = pd.to_datetime(df["t"], unit="ms", utc=True).dt.tz_convert(EXCHANGE_TZ)
+    df["date"] = stamp.dt.tz_localize(None).dt.normalize()
+    for c in COLUMNS[1:]:
+        df[c] = pd.to_numeric(df[c], errors="coerce").astype(np.float64) if c in df else np.nan
+    return df[(["ticker"] if ticker is None else []) + COLUMNS]
+
+
+def last_session_date(now=None, ready: pd.Timedelta = pd.Timedelta(hours=17)) -> pd.Timestamp:
+    """Latest exchange date whose daily bars should be published (`ready` after local midnight)."""
+    now = pd.Timestamp.now(tz=EXCHANGE_TZ) if now is None else pd.Timestamp(now)
+    if now.tzinfo is not None:
+        now = now.tz_convert(EXCHANGE_TZ).tz_localize(None)
+    d = (now - ready).normalize()
+    while d.dayofweek >= 5:
+        d -= pd.Timedelta(days=1)
+    return d
+
+
+# -------- fetchers --------
+def polygon_daily_ticker(ticker: str, start, end, api_key: str | None = None,
+                         pause: float = 0.15) -> pd.DataFrame:
+    """Ticker-major: adjusted daily bars of one ticker over [start, end]."""
+    key = _api_key(api_key)
+    a, b = pd.Timestamp(start).strftime("%Y-%m-%d"), pd.Timestamp(end).strftime("%Y-%m-%d")
+    url = f"{POLY_BASE}/v2/aggs/ticker/{ticker}/range/1/day/{a}/{b}"
+    params = {"adjusted": "true", "sort": "asc", "limit": 50000, "apiKey": key}
+    rows = []
+    while url:
+        js = _get_json(url, params)
+        rows.extend(js.get("results") or [])
+        url, params = js.get("next_url"), {"apiKey": key}
+        time.sleep(pause)
+    return _bars(rows, ticker)
+
+
+def polygon_grouped_daily(date, api_key: str | None = None, pause: float = 0.15) -> pd.DataFrame:
+    """Date-major: adjusted bars of every US stock for one session (empty on holidays)."""
+    key = _api_key(api_key)
+    day = pd.Timestamp(date).strftime("%Y-%m-%d")
+    js = _get_json(f"{POLY_BASE}/v2/aggs/grouped/locale/us/market/stocks/{day}",
+                   {"adjusted": "true", "apiKey": key})
+    time.sleep(pause)
+    return _bars(js.get("results") or [])
+
+
+def polygon_splits(start, end, api_key: str | None = None, pause: float = 0.15) -> pd.DataFrame:
+    """Splits executed in [start, end]: columns ticker, date."""
+    key = _api_key(api_key)
+    url = f"{POLY_BASE}/v3/reference/splits"
+    params = {"execution_date.gte": pd.Timestamp(start).strftime("%Y-%m-%d"),
+              "execution_date.lte": pd.Timestamp(end).strftime("%Y-%m-%d"), "limit": 1000, "apiKey": key}
+    rows = []
+    while url:
+        js = _get_json(url, params)
+        rows.extend(js.get("results") or [])
+        url, params = js.get("next_url"), {"apiKey": key}
+        time.sleep(pause)
+    if not rows:
+        return pd.DataFrame(columns=["ticker", "date"])
+    df = pd.DataFrame(rows)
+    return pd.DataFrame({"ticker": df["ticker"], "date": pd.to_datetime(df["execution_date"])})
+
+
+# -------- ticker-partitioned store --------
+class DailyBarStore:
+    """One Parquet file of daily bars per ticker plus a `_through.json` fetch manifest."""
+
+    def __init__(self, root: str = DEFAULT_DAILY_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._manifest = os.path.join(root, "_through.json")
+
+    def path(self, ticker: str) -> str:
+        return os.path.join(self.root, f"{ticker.upper()}.parquet")
+
+    def through(self) -> Dict[str, pd.Timestamp]:
+        if not os.path.exists(self._manifest):
+            return {}
+        with open(self._manifest) as f:
+            return {t: pd.Timestamp(d) for t, d in json.load(f).items()}
+
+    def _set_through(self, updates: Dict[str, pd.Timestamp]):
+        cur = self.through()
+        for t, d in updates.items():
+            cur[t] = d if t not in cur else max(cur[t], d)
+        tmp = f"{self._manifest}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({t: d.strftime("%Y-%m-%d") for t, d in sorted(cur.items())}, f)
+        os.replace(tmp, self._manifest)
+
+    def read(self, ticker: str, start=None, end=None) -> pd.DataFrame:
+        p = self.path(ticker)
+        if not os.path.exists(p):
+            return pd.DataFrame(columns=COLUMNS)
+        df = pd.read_parquet(p)
+        if start is not None:
+            df = df[df["date"] >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df["date"] <= pd.Timestamp(end)]
+        return df.reset_index(drop=True)
+
+    def _write(self, ticker: str, bars: pd.DataFrame, replace: bool):
+        old = None if replace else self.read(ticker)
+        df = bars[COLUMNS] if old is None or old.empty else pd.concat([old, bars[COLUMNS]], ignore_index=True)
+        df = df.drop_duplicates("date", keep="last").sort_values("date").reset_index(drop=True)
+        path = self.path(ticker)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+
+    def merge(self, bars: pd.DataFrame, through, tickers: Iterable[str] | None = None, replace: bool = False):
+        """
+        Write long-form bars (a `ticker` column) into the per-ticker files (new
+        dates win) and mark `tickers` (default: those in `bars`) as fetched
+        through `through`. replace=True drops each ticker's stored history first.
+        """
+        for t, g in bars.groupby("ticker", sort=False):
+            self._write(str(t), g, replace)
+        tickers = bars["ticker"].unique() if tickers is None else tickers
+        self._set_through({str(t).upper(): pd.Timestamp(through).normalize() for t in tickers})
+
+    def closes(self, tickers: Iterable[str], start=None, end=None) -> pd.DataFrame:
+        """Wide date x ticker close panel."""
+        cols = {t: self.read(t, start, end).set_index("date")["close"] for t in tickers}
+        cols = {t: s for t, s in cols.items() if len(s)}
+        return pd.DataFrame(cols).sort_index() if cols else pd.DataFrame()
+
+
+# -------- planning --------
+class FetchPlan:
+    """
+    Calls needed to bring a universe up to `end`.
+
+    Args:
+        dates (list): Sessions to fetch date-major (grouped daily).
+        date_tickers (list): Tickers served by those grouped calls.
+        ticker_ranges (dict): ticker -> (start, end) fetched ticker-major.
+    """
+
+    def __init__(self, dates: List[pd.Timestamp], date_tickers: List[str],
+                 ticker_ranges: Dict[str, Tuple[pd.Timestamp, pd.Timestamp]]):
+        self.dates = dates
+        self.date_tickers = date_tickers
+        self.ticker_ranges = ticker_ranges
+
+    @property
+    def calls(self) -> int:
+        return len(self.dates) + len(self.ticker_ranges)
+
+    def __repr__(self):
+        return (f"FetchPlan({len(self.dates)} date-major calls for {len(self.date_tickers)} tickers, "
+                f"{len(self.ticker_ranges)} ticker-major calls)")
+
+
+def plan_fetch(tickers: Iterable[str], start, end, through: Dict[str, pd.Timestamp] | None = None,
+               strategy: str = "auto") -> FetchPlan:
+    """
+    Split the missing (ticker, session) cells into grouped-date and per-ticker
+    calls. Sessions are weekdays (a holiday costs one empty grouped call).
+    strategy: "auto" (fewest calls), "date" or "ticker".
+    """
+    if strategy not in ("auto", "date", "ticker"):
+        raise ValueError(f"unknown strategy {strategy!r}")
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    through = through or {}
+    need = {}
+    for t in dict.fromkeys(t.upper() for t in tickers):
+        lo = start if t not in through else max(start, through[t] + pd.Timedelta(days=1))
+        if lo <= end:
+            need[t] = lo
+    sessions = pd.bdate_range(start, end)
+    if not need or not len(sessions):
+        return FetchPlan([], [], {})
+
+    # cutoff c: tickers needing data before c go ticker-major, sessions >= c date-major
+    starts = np.array(sorted(need.values()), dtype="datetime64[ns]")
+    cands = np.unique(starts)
+    n_dates = len(sessions) - np.searchsorted(sessions.values, cands)
+    n_tickers = np.searchsorted(starts, cands)
+    cost = np.r_[n_dates + n_tickers, len(need)]       # last option: no grouped calls at all
+    if strategy == "date":
+        k = 0
+    elif strategy == "ticker":
+        k = len(cands)
+    else:
+        k = int(np.argmin(cost))
+    if k == len(cands):
+        return FetchPlan([], [], {t: (lo, end) for t, lo in need.items()})
+    cut = pd.Timestamp(cands[k])
+    return FetchPlan(list(sessions[sessions >= cut]), [t for t, lo in need.items() if lo >= cut],
+                     {t: (lo, end) for t, lo in need.items() if lo < cut})
+
+
+def refresh_daily(store: DailyBarStore, tickers: Iterable[str], start, end=None, strategy: str = "auto",
+                  fetch_grouped: Callable[..., pd.DataFrame] = polygon_grouped_daily,
+                  fetch_ticker: Callable[..., pd.DataFrame] = polygon_daily_ticker,
+                  fetch_splits: Callable[..., pd.DataFrame] | None = polygon_splits,
+                  flush_every: int = 250, log: Callable[[str], None] = print) -> dict:
+    """
+    Bring `store` up to `end` (default: the last published session) for
+    `tickers` with the fewest calls, refetching tickers split since their
+    last refresh in full. Grouped results are written every `flush_every`
+    sessions, so an interrupted backfill resumes where it stopped.
+    """
+    tickers = list(dict.fromkeys(t.upper() for t in tickers))
+    end = last_session_date() if end is None else pd.Timestamp(end).normalize()
+    through = {t: d for t, d in store.through().items() if t in set(tickers)}
+
+    refetch = set()
+    if through and fetch_splits is not None:
+        since = min(through.values()) + pd.Timedelta(days=1)
+        if since <= end:
+            splits = fetch_splits(since, end)
+            refetch = {t for t, d in zip(splits["ticker"], splits["date"])
+                       if t in through and pd.Timestamp(d) > through[t]}
+    plan = plan_fetch([t for t in tickers if t not in refetch], start, end, through, strategy)
+    log(f"{plan}; {len(refetch)} split refetch(es)")
+
+    rows = 0
+    for t in sorted(refetch):
+        bars = fetch_ticker(t, start, end)
+        store.merge(bars.assign(ticker=t), end, [t], replace=True)
+        rows += len(bars)
+    for t, (lo, hi) in plan.ticker_ranges.items():
+        bars = fetch_ticker(t, lo, hi)
+        store.merge(bars.assign(ticker=t), hi, [t])
+        rows += len(bars)
+
+    wanted, buf = set(plan.date_tickers), []
+    for i, d in enumerate(plan.dates, 1):
+        day = fetch_grouped(d)
+        buf.append(day[day["ticker"].isin(wanted)])
+        if i % flush_every == 0 or i == len(plan.dates):
+            bars = pd.concat(buf, ignore_index=True)
+            store.merge(bars, d, plan.date_tickers)
+            rows += len(bars)
+            buf = []
+    return {"date_calls": len(plan.dates), "ticker_calls": len(plan.ticker_ranges) + len(refetch),
+            "split_refetch": sorted(refetch), "rows": rows}
@@ -0,0 +1,284 @@
+"""
+Vectorized data-quality checks for wide panels (rows = dates, columns = tickers).
+
+`validate_panel` runs every check over whole column blocks with NumPy (no
+per-ticker loops) and returns
+
+  report -> one row per column: n_obs, first, last, gaps and the count of
+            cells raising each flag; `bad` counts cells with a HARD flag
+  flags  -> uint16 bit mask, same shape/order as the input; test with
+            `flags & FLAGS["jump"]`, or `hard_mask(flags)` for cells to drop
+
+Checks (kind="price" for close levels, kind="return" for simple returns):
+  nonfinite    +/-inf
+  nonpositive  price <= 0, return <= -100%
+  duplicate    index entry repeated later (the last one is kept, as the
+               pipeline's `duplicated(keep="last")` does)
+  misaligned   NaT or stamp off the calendar: a time of day on a daily panel
+               (timezone drift), not a month-end on a monthly one, a weekend
+               on a business-day one
+  jump         |log return| (or |return|) beyond `jump_z` robust sigmas
+               (MAD) and `min_jump`
+  split        a jump by a typical split ratio (2:1, 3:2, 1:10 ...) that is
+               not reversed by the next move: maybe unadjusted history, but
+               a real -35% crash looks the same, so it is only reported
+  split_confirmed
+               a split candidate backed by a second signal: volume moving by
+               the inverse ratio (`volume=`) or an entry in `known_splits`.
+               Only this one is HARD
+  stale        the same value `stale_run`+ times in a row (all but the first)
+  unit         price jump by ~100x / 1000x (cents vs dollars); return column
+               whose median |return| is above 50% (percent, not fraction)
+
+`gaps` counts missing calendar dates (per `freq`) and interior NaNs between a
+column's first and last observation.
+"""
+
+from typing import Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+FLAGS = {
+    "nonfinite": 1,
+    "nonpositive": 2,
+    "duplicate": 4,
+    "misaligned": 8,
+    "jump": 16,
+    "split": 32,
+    "stale": 64,
+    "unit": 128,
+    "split_confirmed": 256,
+}
+HARD = (FLAGS["nonfinite"] | FLAGS["nonpositive"] | FLAGS["duplicate"]
+        | FLAGS["misaligned"] | FLAGS["split_confirmed"] | FLAGS["unit"])
+SPLIT_RATIOS = (1.5, 2, 3, 4, 5, 7, 8, 10, 15, 20, 25, 30, 50)
+UNIT_RATIOS = (100, 1000)
+
+
+def hard_mask(flags: pd.DataFrame) -> pd.DataFrame:
+    """True where a cell should not be used (see HARD)."""
+    return (flags & HARD) > 0
+
+
+def _misaligned(idx: pd.DatetimeIndex, freq: str | None) -> np.ndarray:
+    if idx.tz is not None:
+        idx = idx.tz_convert(None)
+    bad = np.asarray(idx.isna())
+    bad |= np.asarray(idx != idx.normalize())
+    if freq in ("ME", "M"):
+        bad |= ~np.asarray(idx.is_month_end)
+    elif freq == "B":
+        bad |= np.asarray(idx.dayofweek >= 5)
+    return bad
+
+
+def _run_lengths(eq: np.ndarray) -> np.ndarray:
+    """Length of the run of equal-to-previous cells each cell sits at the end of (1 = no repeat)."""
+    pos = np.arange(len(eq))[:, None]
+    start = np.maximum.accumulate(np.where(eq, 0, pos), axis=0)
+    return pos - start + 1
+
+
+def _near(x: np.ndarray, ratios, tol: float) -> np.ndarray:
+    logs = np.log(np.asarray(ratios, dtype=np.float64))
+    ax = np.abs(x)[..., None]
+    return (np.abs(ax - logs) < tol).any(axis=-1)
+
+
+def _nanmedian_cols(a: np.ndarray) -> np.ndarray:
+    """Column medians ignoring NaN (one sort; np.nanmedian falls back to a per-column loop)."""
+    srt = np.sort(a, axis=0)                          # NaN sort last
+    n = (~np.isnan(a)).sum(0)
+    lo = np.take_along_axis(srt, np.maximum((n - 1) // 2, 0)[None], axis=0)[0]
+    hi = np.take_along_axis(srt, np.maximum(n // 2, 0)[None], axis=0)[0]
+    return np.where(n > 0, (lo + hi) / 2, np.nan)
+
+
+def _volume_confirms(vol: np.ndarray, r: np.ndarray, c: np.ndarray, move: np.ndarray,
+                     window: int = 5, tol: float = 0.35) -> np.ndarray:
+    """Split candidates whose volume shifts by the inverse ratio (median of `window` rows each side)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lv = np.where(vol > 0, np.log(vol), np.nan)
+    out = np.zeros(len(r), dtype=bool)
+    for k, (i, j) in enumerate(zip(r, c)):            # candidates are rare
+        before, after = lv[max(i - window, 0):i, j], lv[i:i + window, j]
+        if np.isfinite(before).any() and np.isfinite(after).any():
+            shift = np.nanmedian(after) - np.nanmedian(before)
+            out[k] = abs(shift + move[k]) < tol
+    return out
+
+
+def _check_block(v: np.ndarray, kind: str, jump_z: float, min_jump: float, stale_run: int,
+                 volume: np.ndarray | None = None, known: np.ndarray | None = None) -> np.ndarray:
+    """Series checks on sorted, unique, aligned rows; returns uint16 flags."""
+    T, N = v.shape
+    flags = np.zeros((T, N), dtype=np.uint16)
+    flags[np.isinf(v)] = FLAGS["nonfinite"]
+    finite = np.isfinite(v)
+    with np.errstate(invalid="ignore"):
+        nonpos = finite & (v <= (0.0 if kind == "price" else -1.0))
+    flags[nonpos] |= FLAGS["nonpositive"]
+    usable = finite & ~nonpos
+
+    # previous usable value per cell (forward fill through gaps)
+    pos = np.arange(T)[:, None]
+    last = np.maximum.accumulate(np.where(usable, pos, -1), axis=0)
+    prev = np.r_[np.full((1, N), -1), last[:-1]]
+    has_prev = usable & (prev >= 0)
+    prev_v = np.take_along_axis(v, np.maximum(prev, 0), axis=0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if kind == "price":
+            move = np.where(has_prev, np.log(v / prev_v), np.nan)
+        else:
+            move = np.where(usable, np.log1p(v), np.nan)
+    med = _nanmedian_cols(move) if T else np.zeros(N)
+    mad = _nanmedian_cols(np.abs(move - med)) * 1.4826 if T else np.zeros(N)
+    with np.errstate(invalid="ignore"):
+        jump = np.abs(move - med) > np.maximum(jump_z * mad, min_jump)
+    flags[jump] |= FLAGS["jump"]
+
+    # a bad tick is a jump undone by the next move; a split / unit change is a jump that stays
+    nxt = np.minimum.accumulate(np.where(usable, pos, T)[::-1], axis=0)[::-1]
+    nxt = np.r_[nxt[1:], np.full((1, N), T)]
+    padded = np.r_[move, np.full((1, N), np.nan)]
+    next_move = np.take_along_axis(padded, nxt, axis=0)
+    prev_move = np.take_along_axis(padded, np.where(prev >= 0, prev, T), axis=0)
+    with np.errstate(invalid="ignore"):
+        undone = np.abs(next_move + move) < 0.5 * np.abs(move)
+        undoes = np.abs(prev_move + move) < 0.5 * np.abs(move)
+    shift_r, shift_c = np.nonzero(jump & ~undone & ~undoes)   # rare: test ratios on these cells only
+    m = move[shift_r, shift_c]
+    if kind == "price":
+        unit = _near(m, UNIT_RATIOS, 0.1)
+        flags[shift_r[unit], shift_c[unit]] |= FLAGS["unit"]
+        split = ~unit & _near(m, SPLIT_RATIOS, 0.05)
+    else:
+        split = (m < 0) & _near(m, SPLIT_RATIOS, 0.05)
+    flags[shift_r[split], shift_c[split]] |= FLAGS["split"]
+    sr, sc = shift_r[split], shift_c[split]
+    confirmed = np.zeros(len(sr), dtype=bool)
+    if known is not None:
+        confirmed |= known[sr, sc]
+    if volume is not None:
+        confirmed |= _volume_confirms(volume, sr, sc, m[split])
+    flags[sr[confirmed], sc[confirmed]] |= FLAGS["split_confirmed"]
+    if kind == "return":
+        with np.errstate(invalid="ignore"):
+            percent = _nanmedian_cols(np.where(finite, np.abs(v), np.nan)) > 0.5
+        flags[:, percent] |= np.where(finite[:, percent], FLAGS["unit"], 0).astype(np.uint16)
+
+    # stale runs: equal to the previous row, in a run of >= stale_run cells
+    eq = np.r_[np.zeros((1, N), bool), usable[1:] & usable[:-1] & (v[1:] == v[:-1])]
+    fwd = _run_lengths(eq)
+    bwd = _run_lengths(np.r_[eq[1:], np.zeros((1, N), bool)][::-1])[::-1]
+    flags[eq & (fwd + bwd - 1 >= stale_run)] |= FLAGS["stale"]
+    return flags
+
+
+def validate_panel(
+    df: pd.DataFrame,
+    kind: str = "price",
+    freq: str | None = None,
+    jump_z: float = 8.0,
+    min_jump: float = 0.25,
+    stale_run: int = 5,
+    chunk_size: int = 1000,
+    volume: pd.DataFrame | None = None,
+    known_splits: Iterable[Tuple[object, str]] | None = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Quality report and flag mask for a date-indexed panel (see module docstring).
+    freq -> expected calendar ("B", "D", "ME") for gaps and alignment; None
+    skips calendar gaps and only requires midnight stamps.
+    volume / known_splits -> evidence that turns a split candidate into a hard
+    `split_confirmed`: a volume panel on the same index and columns, and
+    (date, column) pairs of splits known to be missing from the history.
+    """
+    if kind not in ("price", "return"):
+        raise ValueError("kind must be 'price' or 'return'")
+    idx = pd.DatetimeIndex(pd.to_datetime(df.index, errors="coerce"))
+    if not all(pd.api.types.is_numeric_dtype(t) for t in df.dtypes):
+        df = df.apply(pd.to_numeric, errors="coerce")
+    x = df.to_numpy(dtype=np.float64, na_value=np.nan)
+    T, N = x.shape
+    flags = np.zeros((T, N), dtype=np.uint16)
+    vol = None
+    if volume is not None:
+        vol = volume.reindex(index=df.index, columns=df.columns).apply(pd.to_numeric, errors="coerce")
+        vol = vol.to_numpy(dtype=np.float64, na_value=np.nan)
+    known = None
+    if known_splits:
+        known = np.zeros((T, N), dtype=bool)
+        day = idx.normalize() if idx.tz is None else idx.tz_convert(None).normalize()
+        col = {c: j for j, c in enumerate(df.columns)}
+        for d, c in known_splits:
+            if c in col:
+                known[np.asarray(day == pd.Timestamp(d).normalize()), col[c]] = True
+
+    order = np.argsort(idx.asi8, kind="stable")
+    s_idx = idx[order]
+    dup = np.asarray(s_idx.duplicated(keep="last")) & ~np.asarray(s_idx.isna())
+    mis = _misaligned(s_idx, freq)
+    flags[order[dup]] |= FLAGS["duplicate"]
+    flags[order[mis]] |= FLAGS["misaligned"]
+    rows = order[~dup & ~mis]                        # sorted, unique, on-calendar rows
+    r_idx = idx[rows]
+    if r_idx.tz is not None:
+        r_idx = r_idx.tz_convert(None)
+
+    for s in range(0, N, chunk_size):
+        block = _check_block(x[rows, s:s + chunk_size], kind, jump_z, min_jump, stale_run,
+                             None if vol is None else vol[rows, s:s + chunk_size],
+                             None if known is None else known[rows, s:s + chunk_size])
+        flags[rows, s:s + chunk_size] |= block
+
+    # report
+    v = x[rows]
+    valid = ~np.isnan(v)
+    n_obs = valid.sum(0)
+    has = n_obs > 0
+    first = np.where(has, valid.argmax(0), 0)
+    last = np.where(has, len(v) - 1 - valid[::-1].argmax(0), 0)
+    gaps = np.where(has, last - first + 1 - n_obs, 0)
+    if freq is not None and len(r_idx) > 1:
+        missing = pd.date_range(r_idx[0], r_idx[-1], freq=freq).difference(r_idx).asi8
+        gaps += np.where(has, np.searchsorted(missing, r_idx.asi8[last]) - np.searchsorted(missing, r_idx.asi8[first]), 0)
+    stamps = r_idx.asi8 if len(r_idx) else np.zeros(1, dtype=np.int64)
+    report = pd.DataFrame({
+        "n_obs": n_obs,
+        "first": pd.to_datetime(np.where(has, stamps[first], np.iinfo(np.int64).min)),
+        "last": pd.to_datetime(np.where(has, stamps[last], np.iinfo(np.int64).min)),
+        "gaps": gaps,
+    }, index=df.columns)
+    for name, bit in FLAGS.items():
+        report[name] = ((flags & bit) > 0).sum(0)
+    report["bad"] = ((flags & HARD) > 0).sum(0)
+    report.index.name = "column"
+    return report, pd.DataFrame(flags, index=df.index, columns=df.columns)
+
+
+def summarize(report: pd.DataFrame, top: int = 20) -> str:
+    """Compact text of the columns with any issue, worst first."""
+    issues = report.drop(columns=["n_obs", "first", "last"])
+    hit = report[issues.sum(axis=1) > 0]
+    if hit.empty:
+        return f"all {len(report)} columns clean"
+    hit = hit.assign(_score=hit["bad"] * 1000 + issues.loc[hit.index].sum(axis=1))
+    hit = hit.sort_values("_score", ascending=False).drop(columns=["_score"])
+    cols = [c for c in issues.columns if hit[c].any()]
+    head = f"{len(hit)}/{len(report)} columns with issues"
+    return head + "\n" + hit[["n_obs"] + cols].head(top).to_string()
+
+
+def flag_cells(flags: pd.DataFrame) -> pd.DataFrame:
+    """Long form of the flagged cells only: date, column, flags (bits), names."""
+    f = flags.to_numpy()
+    r, c = np.nonzero(f)
+    bits = f[r, c]
+    names = np.full(len(bits), "", dtype=object)
+    for name, bit in FLAGS.items():
+        hit = (bits & bit) > 0
+        names[hit] = names[hit] + np.where(names[hit] == "", name, "," + name).astype(object)
+    return pd.DataFrame({"date": flags.index[r], "column": flags.columns[c], "flags": bits, "names": names})
@@ -0,0 +1,527 @@
+"""
+Size-capped raw cache: LRU eviction, small-file compaction, hit-rate stats.
+
+Entries are DataFrames under a key "<namespace>/<name>" (e.g. "poly_daily/AAPL")
+and start life as one loose Parquet file each:
+
+    <root>/<namespace>/<name>.parquet
+
+Thousands of tiny per-ticker files make directory scans and cold reads slow,
+so `compact` packs the small loose files of a namespace (same schema) into
+larger files, one row group per entry, sorted by key:
+
+    <root>/<namespace>/_packs/pack-<id>.parquet    (+ a __key column)
+
+A packed entry is read back with a key filter, so only its row group is
+decoded. Plain files written by other code (FRED CSVs, `*_prices.csv`, Yahoo
+CSV caches) can be registered with `track` / `touch`: they count against the
+budget and are evicted like entries, but never packed, because their readers
+open them by path. The per-ticker files the TechMonthly scripts wrote before
+this cache (`<T>_poly_monthly.parquet`, `<T>_daily.parquet`) are moved in by
+`adopt` on their first lookup, or all at once by `--scan`.
+
+The index (`<root>/_index.sqlite`) holds per entry its location, size, last
+access time and hit count, plus hit / miss counters per namespace. When the
+total on disk exceeds `budget` bytes, least-recently-used entries are dropped
+until it is back under `low_water` x budget; packs that lost entries are
+rewritten without them. `start_compactor` runs compaction and eviction on a
+daemon thread.
+
+Run:  python -m src.data.raw_cache --scan --compact --budget 2GB --stats
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DEFAULT_RAW_DIR = os.path.join("data_cache", "raw")
+# namespace -> files other modules cache by path; picked up by `scan`
+TRACKED_GLOBS = {
+    "fred": os.path.join("data_cache", "fred_*.csv"),
+    "prices": os.path.join("data_cache", "*_prices.csv"),
+    "yahoo": os.path.join("data_cache", "yahoo_*.csv"),
+    "legacy_raw": os.path.join(DEFAULT_RAW_DIR, "*.parquet"),     # per-ticker files from before this cache
+}
+# namespace -> file-name suffix of the per-ticker raw files the TechMonthly scripts
+# wrote before this cache (one column named after the ticker); see `adopt`
+LEGACY_SUFFIXES = {
+    "poly_monthly": "_poly_monthly.parquet",
+    "daily": "_daily.parquet",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key          TEXT PRIMARY KEY,
+    namespace    TEXT NOT NULL,
+    kind         TEXT NOT NULL,          -- loose | packed | file
+    path         TEXT NOT NULL,
+    pack_id      INTEGER,
+    size         INTEGER NOT NULL,
+    rows         INTEGER,
+    sig          TEXT,
+    meta         TEXT,
+    created_at   REAL NOT NULL,
+    last_access  REAL NOT NULL,
+    hits         INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_entries_lru ON entries(last_access);
+CREATE INDEX IF NOT EXISTS ix_entries_pack ON entries(pack_id);
+
+CREATE TABLE IF NOT EXISTS packs (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    namespace  TEXT NOT NULL,
+    path       TEXT NOT NULL,
+    size       INTEGER NOT NULL,
+    dead       INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS counters (
+    namespace  TEXT PRIMARY KEY,
+    hits       INTEGER NOT NULL DEFAULT 0,
+    misses     INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+_UNITS = {"": 1, "K": 1 << 10, "KB": 1 << 10, "M": 1 << 20, "MB": 1 << 20, "G": 1 << 30, "GB": 1 << 30}
+
+
+def parse_size(size) -> int | None:
+    """1000, "500MB", "2GB" -> bytes (None / "" -> no limit)."""
+    if size is None or size == "":
+        return None
+    if isinstance(size, (int, float)):
+        return int(size)
+    m = re.fullmatch(r"\s*([\d.]+)\s*([KMG]?B?)\s*", str(size).upper())
+    if not m:
+        raise ValueError(f"bad size {size!r}")
+    return int(float(m.group(1)) * _UNITS[m.group(2)])
+
+
+def _signature(df: pd.DataFrame) -> str:
+    """Column names + dtypes (index levels included): entries pack together only if equal."""
+    parts = [f"{n}:{df.index.get_level_values(i).dtype}" for i, n in enumerate(df.index.names)]
+    parts += [f"{c}:{t}" for c, t in df.dtypes.items()]
+    return "|".join(parts)
+
+
+def _split_key(key: str):
+    ns, sep, name = key.partition("/")
+    if not sep or not name or "/" in name or name.startswith("_"):
+        raise ValueError(f"cache key must look like 'namespace/name', got {key!r}")
+    return ns, name
+
+
+class RawCache:
+    """
+    Keyed DataFrame cache with a disk budget (safe to share between threads).
+
+    Args:
+        root (str): Cache directory; the index lives in `<root>/_index.sqlite`.
+        budget (int | str): Max bytes on disk ("2GB" works); None = unlimited.
+        small (int | str): Loose files below this size are packed by `compact`.
+        pack_target (int | str): Approximate size of one pack file.
+        low_water (float): Eviction stops at this fraction of the budget.
+    """
+
+    def __init__(self, root: str = DEFAULT_RAW_DIR, budget=None, small="256KB", pack_target="64MB",
+                 low_water: float = 0.9):
+        self.root = root
+        self.budget = parse_size(budget)
+        self.small = parse_size(small)
+        self.pack_target = parse_size(pack_target)
+        self.low_water = low_water
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(root, "_index.sqlite"), timeout=60, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(_SCHEMA)
+        self._stop = None
+
+    def close(self):
+        self.stop_compactor()
+        self._conn.close()
+
+    def _abs(self, rel: str) -> str:
+        return os.path.join(self.root, rel)
+
+    def _count(self, ns: str, hit: bool):
+        col = "hits" if hit else "misses"
+        self._conn.execute(f"INSERT INTO counters (namespace, {col}) VALUES (?, 1) "
+                           f"ON CONFLICT(namespace) DO UPDATE SET {col} = {col} + 1", (ns,))
+
+    # -------- entries --------
+    def get(self, key: str, max_age: float | None = None) -> pd.DataFrame | None:
+        """Cached frame or None (also when older than `max_age` seconds)."""
+        ns, _ = _split_key(key)
+        for _ in range(2):                          # a concurrent compaction may move the entry once
+            with self._lock, self._conn:
+                row = self._conn.execute("SELECT kind, path, meta, created_at FROM entries WHERE key = ?",
+                                         (key,)).fetchone()
+                if row is None or (max_age is not None and time.time() - row[3] > max_age):
+                    self._count(ns, False)
+                    return None
+            kind, path, meta, _ = row
+            try:
+                if kind == "loose":
+                    df = pd.read_parquet(self._abs(path))
+                else:
+                    df = self._read_packed(path, key, json.loads(meta))
+            except FileNotFoundError:
+                continue
+            with self._lock, self._conn:
+                self._conn.execute("UPDATE entries SET last_access = ?, hits = hits + 1 WHERE key = ?",
+                                   (time.time(), key))
+                self._count(ns, True)
+            return df
+        with self._lock, self._conn:
+            self._count(ns, False)
+        return None
+
+    def _read_packed(self, path: str, key: str, meta: dict) -> pd.DataFrame:
+        df = pd.read_parquet(self._abs(path), filters=[("__key", "==", key)]).drop(columns="__key")
+        idx = [f"__index_{i}" for i in range(len(meta["index"]))]
+        df = df.set_index(idx)
+        df.index.names = meta["index"]
+        return df[meta["columns"]]
+
+    def put(self, key: str, df: pd.DataFrame):
+        """Store `df` as a loose file (replacing any earlier version), then enforce the budget."""
+        ns, name = _split_key(key)
+        rel = os.path.join(ns, f"{name}.parquet")
+        os.makedirs(self._abs(ns), exist_ok=True)
+        tmp = f"{self._abs(rel)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        df.to_parquet(tmp)
+        os.replace(tmp, self._abs(rel))
+        now = time.time()
+        meta = json.dumps({"index": list(df.index.names), "columns": [str(c) for c in df.columns]})
+        with self._lock, self._conn:
+            self._drop_rows([key])
+            self._conn.execute(
+                "INSERT INTO entries (key, namespace, kind, path, size, rows, sig, meta, created_at, last_access)"
+                " VALUES (?, ?, 'loose', ?, ?, ?, ?, ?, ?, ?)",
+                (key, ns, rel, os.path.getsize(self._abs(rel)), len(df), _signature(df), meta, now, now))
+        self.evict(keep=key)
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            files = self._drop_rows([key])
+        self._remove(files)
+        self._rewrite_dirty_packs()
+
+    def _drop_rows(self, keys: Iterable[str]) -> List[str]:
+        """Remove index rows (caller holds the lock); returns files to delete, marks packs dirty."""
+        files = []
+        for key in keys:
+            row = self._conn.execute("SELECT kind, path, pack_id, size FROM entries WHERE key = ?",
+                                     (key,)).fetchone()
+            if row is None:
+                continue
+            kind, path, pack_id, size = row
+            if kind == "packed":
+                self._conn.execute("UPDATE packs SET dead = dead + ? WHERE id = ?", (size, pack_id))
+            elif kind == "loose":
+                files.append(self._abs(path))
+            else:
+                files.append(path)
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        return files
+
+    @staticmethod
+    def _remove(files: Iterable[str]):
+        for f in files:
+            try:
+                os.remove(f)
+            except FileNotFoundError:
+                pass
+
+    def adopt(self, key: str, path: str, column: str = "close") -> pd.DataFrame | None:
+        """
+        Move a pre-cache per-ticker Parquet file under `key` (its single column
+        renamed to `column`) and delete it, so upgrading does not refetch what is
+        already on disk. Returns the frame, or None when there is no usable file.
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            df = pd.read_parquet(path)
+        except (OSError, ValueError, pa.ArrowException) as e:
+            print(f"⚠️ legacy cache file {path} unreadable, ignored: {type(e).__name__}: {e}")
+            return None
+        if isinstance(df, pd.DataFrame) and df.shape[1] == 1:
+            df.columns = [column]
+        self.put(key, df)
+        with self._lock, self._conn:
+            self._drop_rows([f"file:{os.path.abspath(path)}"])     # was tracked as legacy_raw
+        self._remove([path])
+        return df
+
+    def migrate_legacy(self, suffixes: Dict[str, str] = LEGACY_SUFFIXES) -> int:
+        """`adopt` every <root>/<TICKER><suffix> file as "<namespace>/<TICKER>"; returns the count."""
+        n = 0
+        for ns, suffix in suffixes.items():
+            for f in sorted(glob.glob(os.path.join(self.root, f"*{suffix}"))):
+                ticker = os.path.basename(f)[:-len(suffix)]
+                n += self.adopt(f"{ns}/{ticker}", f) is not None
+        return n
+
+    # -------- plain files owned by other modules --------
+    def track(self, path: str, namespace: str = "files", last_access: float | None = None):
+        """Register (or re-size) a file that is read by path; it counts against the budget."""
+        path = os.path.abspath(path)
+        if not os.path.exists(path):
+            return
+        now = time.time() if last_access is None else last_access
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO entries (key, namespace, kind, path, size, created_at, last_access)"
+                " VALUES (?, ?, 'file', ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET size = excluded.size,"
+                " created_at = excluded.created_at, last_access = MAX(last_access, excluded.last_access)",
+                (f"file:{path}", namespace, path, os.path.getsize(path), os.path.getmtime(path), now))
+
+    def touch(self, path: str, hit: bool = True, namespace: str = "files"):
+        """Record a lookup of a tracked file (a miss when the caller had to fetch)."""
+        path = os.path.abspath(path)
+        with self._lock, self._conn:
+            self._count(namespace, hit)
+            if hit:
+                self._conn.execute("UPDATE entries SET last_access = ?, hits = hits + 1 WHERE key = ?",
+                                   (time.time(), f"file:{path}"))
+
+    def scan(self, patterns: Dict[str, str] = TRACKED_GLOBS):
+        """Track existing files matching {namespace: glob} (last access = their mtime); forget vanished ones."""
+        with self._lock:
+            known = {k for (k,) in self._conn.execute("SELECT key FROM entries WHERE kind = 'file'")}
+        for ns, pat in patterns.items():
+            for f in glob.glob(pat):
+                if f"file:{os.path.abspath(f)}" not in known:
+                    self.track(f, ns, last_access=os.path.getmtime(f))
+        with self._lock, self._conn:
+            for key in known:
+                if not os.path.exists(key[len("file:"):]):
+                    self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    # -------- budget --------
+    def disk_usage(self) -> int:
+        with self._lock:
+            a = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries WHERE kind != 'packed'").fetchone()[0]
+            b = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM packs").fetchone()[0]
+        return int(a + b)
+
+    def evict(self, budget=None, keep: str | None = None) -> List[str]:
+        """
+        Drop least-recently-used entries until usage <= low_water x budget
+        (never `keep`, the entry just written). Returns the evicted keys.
+        """
+        budget = self.budget if budget is None else parse_size(budget)
+        if budget is None:
+            return []
+        with self._lock:
+            used = self.disk_usage()
+            if used <= budget:
+                return []
+            target = budget * self.low_water
+            victims = []
+            for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY last_access, key"):
+                if used <= target:
+                    break
+                if key == keep:
+                    continue
+                victims.append(key)
+                used -= size
+            with self._conn:
+                files = self._drop_rows(victims)
+        self._remove(files)
+        self._rewrite_dirty_packs()
+        return victims
+
+    # -------- compaction --------
+    def _write_pack(self, ns: str, entries: List[tuple]) -> None:
+        """entries: (key, kind, path, meta) of one namespace + signature -> one new pack file."""
+        frames = []
+        for key, kind, path, meta in sorted(entries):
+            meta = json.loads(meta)
+            df = pd.read_parquet(self._abs(path)) if kind == "loose" else self._read_packed(path, key, meta)
+            df.index.names = [f"__index_{i}" for i in range(df.index.nlevels)]
+            frames.append(df.reset_index().assign(__key=key))
+        data = pd.concat(frames, ignore_index=True)
+        os.makedirs(self._abs(os.path.join(ns, "_packs")), exist_ok=True)
+        with self._lock, self._conn:
+            pack_id = self._conn.execute("INSERT INTO packs (namespace, path, size) VALUES (?, '', 0)",
+                                         (ns,)).lastrowid
+        rel = os.path.join(ns, "_packs", f"pack-{pack_id:06d}.parquet")
+        tmp = f"{self._abs(rel)}.tmp"
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        with pq.ParquetWriter(tmp, table.schema) as w:      # one row group per entry -> filtered reads
+            start = 0
+            for f in frames:
+                w.write_table(table.slice(start, len(f)))
+                start += len(f)
+        os.replace(tmp, self._abs(rel))
+        size = os.path.getsize(self._abs(rel))
+        total_rows = max(len(data), 1)
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE packs SET path = ?, size = ? WHERE id = ?", (rel, size, pack_id))
+            old = []
+            for (key, kind, path, _), f in zip(sorted(entries), frames):
+                cur = self._conn.execute("SELECT kind, path FROM entries WHERE key = ?", (key,)).fetchone()
+                if cur != (kind, path):
+                    continue                       # rewritten or evicted meanwhile: keep the newer state
+                if kind == "loose":
+                    old.append(self._abs(path))
+                else:
+                    self._conn.execute("UPDATE packs SET dead = dead + (SELECT size FROM entries WHERE key = ?)"
+                                       " WHERE path = ?", (key, path))
+                self._conn.execute("UPDATE entries SET kind = 'packed', path = ?, pack_id = ?, size = ?"
+                                   " WHERE key = ?", (rel, pack_id, max(size * len(f) // total_rows, 1), key))
+        self._remove(old)
+
+    def _rewrite_dirty_packs(self):
+        with self._lock:
+            dirty = self._conn.execute("SELECT id, namespace, path FROM packs WHERE dead > 0").fetchall()
+        for pack_id, ns, path in dirty:
+            with self._lock:
+                live = self._conn.execute("SELECT key, kind, path, meta FROM entries WHERE pack_id = ?"
+                                          " AND kind = 'packed'", (pack_id,)).fetchall()
+            if live:
+                self._write_pack(ns, live)
+            with self._lock, self._conn:
+                if self._conn.execute("SELECT COUNT(*) FROM entries WHERE pack_id = ? AND kind = 'packed'",
+                                      (pack_id,)).fetchone()[0]:
+                    continue                       # something still points at it; retry next time
+                self._conn.execute("DELETE FROM packs WHERE id = ?", (pack_id,))
+            self._remove([self._abs(path)])
+
+    def compact(self) -> int:
+        """Pack small loose entries (per namespace and schema), merging into undersized packs. Returns packs written."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT e.namespace, e.sig, e.key, e.kind, e.path, e.meta, e.size FROM entries e"
+                " LEFT JOIN packs p ON p.id = e.pack_id"
+                " WHERE (e.kind = 'loose' AND e.size < ?) OR (e.kind = 'packed' AND p.size < ?)",
+                (self.small, self.pack_target // 2)).fetchall()
+        groups: Dict[tuple, list] = {}
+        for ns, sig, key, kind, path, meta, size in rows:
+            groups.setdefault((ns, sig), []).append((key, kind, path, meta, size))
+        written = 0
+        for (ns, _), items in groups.items():
+            n_loose = sum(kind == "loose" for _, kind, _, _, _ in items)
+            n_packs = len({path for _, kind, path, _, _ in items if kind == "packed"})
+            if n_loose + n_packs < 2:
+                continue                           # one file already: nothing to merge
+            batch, size = [], 0
+            for key, kind, path, meta, s in sorted(items):
+                batch.append((key, kind, path, meta))
+                size += s
+                if size >= self.pack_target:
+                    self._write_pack(ns, batch)
+                    written += 1
+                    batch, size = [], 0
+            if batch:
+                self._write_pack(ns, batch)
+                written += 1
+        self._rewrite_dirty_packs()
+        return written
+
+    def start_compactor(self, interval: float = 600):
+        """Compact and enforce the budget every `interval` seconds on a daemon thread."""
+        if self._stop is not None:
+            return
+        self._stop = threading.Event()
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.compact()
+                    self.evict()
+                except Exception as e:           # keep the thread alive; next round retries
+                    print(f"⚠️ raw cache compaction failed: {type(e).__name__}: {e}")
+
+        threading.Thread(target=loop, daemon=True, name="raw-cache-compactor").start()
+
+    def stop_compactor(self):
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+
+    # -------- reporting --------
+    def stats(self) -> pd.DataFrame:
+        """Per namespace: entries, loose / packed / file counts, bytes, hits, misses, hit_rate (+ a total row)."""
+        with self._lock:
+            ent = pd.read_sql_query(
+                "SELECT namespace, COUNT(*) AS entries, SUM(kind = 'loose') AS loose, SUM(kind = 'packed') AS packed,"
+                " SUM(kind = 'file') AS files, SUM(CASE WHEN kind = 'packed' THEN 0 ELSE size END) AS bytes"
+                " FROM entries GROUP BY namespace", self._conn).set_index("namespace")
+            packs = pd.read_sql_query("SELECT namespace, SUM(size) AS pack_bytes FROM packs GROUP BY namespace",
+                                      self._conn).set_index("namespace")
+            cnt = pd.read_sql_query("SELECT namespace, hits, misses FROM counters", self._conn).set_index("namespace")
+        out = ent.join(packs, how="outer").join(cnt, how="outer").apply(pd.to_numeric).fillna(0).astype("int64")
+        out["bytes"] += out.pop("pack_bytes")
+        out.loc["total"] = out.sum()
+        looks = out["hits"] + out["misses"]
+        out["hit_rate"] = (out["hits"] / looks.where(looks > 0)).round(3)
+        return out
+
+
+_DEFAULT = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_cache() -> RawCache:
+    """Process-wide cache at data_cache/raw; budget from RAW_CACHE_BUDGET (e.g. "2GB", unset = unlimited)."""
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = RawCache(DEFAULT_RAW_DIR, budget=os.getenv("RAW_CACHE_BUDGET") or None)
+        return _DEFAULT
+
+
+def record_file(path: str, hit: bool, namespace: str) -> None:
+    """Best-effort access bookkeeping for path-based caches (never breaks the caller)."""
+    try:
+        cache = default_cache()
+        cache.touch(path, hit, namespace)
+        if not hit:                                 # the caller just (re)wrote the file
+            cache.track(path, namespace)
+            cache.evict(keep=f"file:{os.path.abspath(path)}")
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️ raw cache bookkeeping skipped: {type(e).__name__}: {e}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Raw cache maintenance: track, compact, evict, report")
+    ap.add_argument("--root", default=DEFAULT_RAW_DIR)
+    ap.add_argument("--budget", default=os.getenv("RAW_CACHE_BUDGET"), help='disk budget, e.g. "2GB"')
+    ap.add_argument("--scan", action="store_true",
+                    help="move legacy per-ticker raw files into the cache, track FRED / price / raw files")
+    ap.add_argument("--compact", action="store_true", help="pack small per-ticker files")
+    ap.add_argument("--evict", action="store_true", help="drop LRU entries beyond the budget")
+    ap.add_argument("--stats", action="store_true")
+    args = ap.parse_args(argv)
+
+    cache = RawCache(args.root, budget=args.budget)
+    if args.scan:
+        print(f"✅ migrated {cache.migrate_legacy()} legacy raw file(s)")
+        cache.scan()
+    if args.compact:
+        print(f"✅ wrote {cache.compact()} pack file(s)")
+    if args.evict:
+        print(f"✅ evicted {len(cache.evict())} entries")
+    if args.stats or not (args.scan or args.compact or args.evict):
+        print(cache.stats().to_string())
+        budget = "unlimited" if cache.budget is None else f"{cache.budget / 2**20:.1f} MB"
+        print(f"Disk: {cache.disk_usage() / 2**20:.1f} MB of {budget}")
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
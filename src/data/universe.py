@@ -0,0 +1,29 @@
+"""
+Ticker universe files.
+
+A universe is a CSV with a `ticker` column and optional `group` column
+(e.g. tech, ai_basket, benchmark), or a plain text file with one ticker per
+line ('#' starts a comment). The default is data_sources/universe.csv.
+"""
+
+import os
+from typing import Iterable, List
+
+import pandas as pd
+
+DEFAULT_UNIVERSE = os.path.join("data_sources", "universe.csv")
+
+
+def load_universe(path: str = DEFAULT_UNIVERSE, groups: Iterable[str] | None = None) -> List[str]:
+    """Unique upper-case tickers in file order, optionally only those in `groups`."""
+    if path.endswith(".csv"):
+        df = pd.read_csv(path, dtype=str, comment="#")
+        df.columns = [c.strip().lower() for c in df.columns]
+        if groups is not None and "group" in df.columns:
+            df = df[df["group"].str.strip().isin(set(groups))]
+        tickers = df["ticker"].dropna().tolist()
+    else:
+        with open(path) as f:
+            tickers = [line.split("#")[0] for line in f]
+    out = [t.strip().upper() for t in tickers if t and t.strip()]
+    return list(dict.fromkeys(out))
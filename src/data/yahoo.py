@@ -1,14 +1,40 @@
+import os
+import time
+
 import yfinance as yf
 import pandas as pd
 
-def get_stock_prices(ticker="AAPL", period="1y", interval="1d") -> pd.DataFrame:
+from .raw_cache import record_file
+
+def _cache_path(ticker: str, period: str, interval: str) -> str:
+    os.makedirs("data_cache", exist_ok=True)
+    return f"data_cache/yahoo_{ticker}_{period}_{interval}.csv"
+
+def get_stock_prices(ticker="AAPL", period="1y", interval="1d",
+                     use_cache: bool = False, max_age_hours: float = 12) -> pd.DataFrame:
     """
-    Fetch daily OHLCV history for a given ticker.
+    Fetch OHLCV history for a given ticker (daily by default; intraday intervals
+    such as 1m / 60m keep their bar timestamps in `date`).
     Columns: date, open, high, low, close, volume
+    With use_cache=True a CSV younger than max_age_hours is returned instead of calling Yahoo
+    (dates in America/New_York, as Yahoo returns them for US listings).
+    For long intraday histories use src.data.intraday (month-chunked, streamed).
     """
+    path = _cache_path(ticker, period, interval) if use_cache else None
+    if path and os.path.exists(path) and time.time() - os.path.getmtime(path) < max_age_hours * 3600:
+        df = pd.read_csv(path)
+        # the CSV holds UTC offsets only; give back the same exchange-local dates as a live fetch
+        df["date"] = pd.to_datetime(df["date"], utc=True).dt.tz_convert("America/New_York")
+        record_file(path, True, "yahoo")
+        return df
+
     df = yf.Ticker(ticker).history(period=period, interval=interval)
-    df = df.reset_index().rename(columns=str.lower)
-    return df[["date", "open", "high", "low", "close", "volume"]]
+    df = df.reset_index().rename(columns=str.lower).rename(columns={"datetime": "date"})
+    df = df[["date", "open", "high", "low", "close", "volume"]]
+    if path and not df.empty:
+        df.to_csv(path, index=False)
+        record_file(path, False, "yahoo")
+    return df
 
 
 def get_multiple_prices(tickers=None, period="1y", interval="1d"):
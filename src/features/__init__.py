@@ -0,0 +1,11 @@
+# Feature-engineering helpers shared by the monthly pipeline scripts.
+from .merge import merge_monthly, month_end_index
+from .corr import cross_corr
+from .asof import align_asof, infer_max_age
+from .baskets import basket_returns
+from .backtest import MacroTilt, performance, run_grid, simulate
+from .scenarios import FactorModel, macro_factors, risk_report, simulate_scenarios
+from .lags import lag_tensor, select_lags
+from .leadlag import lead_lag, lead_lag_cube
+from .ragged import (cummax, drawdown, log_returns, month_end_rows, month_end_sample, pct_change, rebase,
+                     rolling_std, rolling_vol, segment_offsets, sort_long, to_wide)
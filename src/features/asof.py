@@ -0,0 +1,95 @@
+"""
+As-of alignment of any number of (macro) series onto a price calendar.
+
+For every calendar date each series contributes its latest observation dated
+on or before that date (`searchsorted(side="right") - 1` on the sorted series
+dates), provided the observation is not older than the series' staleness
+limit; otherwise the cell is NaN. Unlike an exact-date left merge followed by
+`ffill()`:
+
+- monthly / weekly stamps (1st of month, Fridays, ...) match every later
+  trading day, not only days that happen to share the stamp
+- a gap in a series is not papered over indefinitely: values expire after
+  `max_age`
+- all series are written into one preallocated (dates x series) block; the
+  price frame is never merged or copied per series
+"""
+
+from typing import Mapping
+
+import numpy as np
+import pandas as pd
+
+MIN_AGE = pd.Timedelta(days=5)
+
+
+def _naive(values) -> np.ndarray:
+    """datetime64[ns] values (tz-aware input converted to UTC wall time)."""
+    idx = pd.DatetimeIndex(pd.to_datetime(values))
+    if idx.tz is not None:
+        idx = idx.tz_convert("UTC").tz_localize(None)
+    return idx.values.astype("datetime64[ns]")
+
+
+def infer_max_age(dates) -> pd.Timedelta:
+    """Default staleness limit: two typical observation spacings (one missed release), at least 5 days."""
+    d = np.unique(_naive(dates))
+    if len(d) < 2:
+        return MIN_AGE
+    return max(MIN_AGE, pd.Timedelta(np.median(np.diff(d))) * 2)
+
+
+def _series(obj) -> pd.Series:
+    """Accept a date-indexed Series / one-column frame, or a tidy frame with date + value columns."""
+    if isinstance(obj, pd.DataFrame):
+        if "date" in obj.columns:
+            value_cols = [c for c in obj.columns if c != "date"]
+            obj = obj.set_index("date")[value_cols[0]]
+        else:
+            obj = obj.iloc[:, 0]
+    return obj
+
+
+def align_asof(
+    calendar,
+    series: Mapping[str, pd.Series | pd.DataFrame],
+    max_age: str | pd.Timedelta | Mapping[str, str | pd.Timedelta] | None = None,
+) -> pd.DataFrame:
+    """
+    Align every series onto `calendar` (DatetimeIndex / dates) as of each date.
+
+    max_age -> staleness limit: one Timedelta-like for all series, a dict per
+               series name, or None to infer it per series (`infer_max_age`).
+    Returns a float frame indexed by the calendar (as given) with one column per series.
+    """
+    cal_index = calendar if isinstance(calendar, pd.Index) else pd.DatetimeIndex(pd.to_datetime(calendar))
+    cal = _naive(cal_index)
+    out = np.full((len(cal), len(series)), np.nan, dtype=np.float64, order="F")
+
+    for j, (name, obj) in enumerate(series.items()):
+        s = _series(obj)
+        if s is None or len(s) == 0:
+            continue
+        dates = _naive(s.index)
+        vals = pd.to_numeric(pd.Series(np.asarray(s)), errors="coerce").to_numpy(dtype=np.float64)
+        ok = ~np.isnan(vals) & ~np.isnat(dates)
+        dates, vals = dates[ok], vals[ok]
+        if len(dates) == 0:
+            continue
+        order = np.argsort(dates, kind="stable")   # equal dates: the last row wins
+        dates, vals = dates[order], vals[order]
+
+        if isinstance(max_age, Mapping):
+            limit = max_age.get(name)
+        else:
+            limit = max_age
+        limit = infer_max_age(dates) if limit is None else pd.Timedelta(limit)
+
+        pos = np.searchsorted(dates, cal, side="right") - 1
+        hit = pos >= 0
+        age = cal[hit] - dates[pos[hit]]
+        fresh = np.zeros(len(cal), dtype=bool)
+        fresh[hit] = age <= limit.to_timedelta64()
+        out[fresh, j] = vals[pos[fresh]]
+
+    return pd.DataFrame(out, index=cal_index, columns=list(series), copy=False)
@@ -0,0 +1,196 @@
+"""
+Vectorized backtests of many strategy variants over a monthly return panel.
+
+A strategy variant is a (months x assets) matrix of target weights; a grid of
+variants is one (variants x months x assets) block, and `simulate` evaluates
+the whole block with array operations (no per-variant or per-month loop):
+
+- weights in row t are decided with information up to the end of month t-1
+  and earn the returns of month t (strategies shift their own signals)
+- between rebalances holdings drift with prices (rebalance="Q", "Y" or every
+  k rows; None trades back to target every month), using the same
+  growth-since-rebalance factor as `baskets.py`
+- turnover on a rebalance is sum(|target - drifted weights|); costs of
+  `cost_bps` per unit of turnover are deducted from that month's return
+- weight not allocated to any asset is cash earning 0; NaN returns count as 0
+
+`run_grid` expands a parameter grid, builds the weights of a chunk of variants
+with one vectorized strategy call, simulates the chunk once per rebalance
+schedule, applies every cost level to the same gross returns and reduces each
+variant to `performance` statistics. Chunks run in worker processes.
+"""
+
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .baskets import _segment_starts
+
+ENGINE_KEYS = ("rebalance", "cost_bps")
+
+
+def simulate(
+    returns: pd.DataFrame,
+    weights: np.ndarray | pd.DataFrame,
+    rebalance: str | int | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Gross portfolio returns and turnover of every variant.
+
+    returns -> (months x assets) simple returns
+    weights -> (months x assets) or (variants x months x assets) target weights
+               aligned to `returns`; NaN = 0 (cash)
+    Returns (gross, turnover), both (variants x months).
+    """
+    R = np.nan_to_num(returns.to_numpy(dtype=np.float64, na_value=np.nan), nan=0.0)
+    W = np.asarray(weights, dtype=np.float64)
+    if W.ndim == 2:
+        W = W[None]
+    if W.shape[1:] != R.shape:
+        raise ValueError(f"weights shape {W.shape[1:]} does not match returns {R.shape}")
+    W = np.nan_to_num(W, nan=0.0)
+    n = len(R)
+
+    starts = _segment_starts(returns.index, rebalance)
+    g = np.vstack([np.ones((1, R.shape[1])), np.cumprod(1.0 + R, axis=0)])
+    F = g[np.arange(n)] / g[starts]            # growth since the holding period started
+
+    target = W[:, starts, :]                   # weights set at each row's rebalance
+    hold = target * F                          # holdings at the start of each month
+    value = (1.0 - target.sum(-1)) + hold.sum(-1)
+    end = hold * (1.0 + R)
+    end_value = (1.0 - target.sum(-1)) + end.sum(-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gross = (hold * R).sum(-1) / value
+        drifted = end / end_value[..., None]   # weights just before the next month's trade
+
+    turnover = np.zeros(gross.shape)
+    turnover[:, 0] = np.abs(W[:, 0]).sum(-1)
+    trade = np.flatnonzero(starts[1:] == np.arange(1, n)) + 1
+    turnover[:, trade] = np.abs(W[:, trade] - drifted[:, trade - 1]).sum(-1)
+    return gross, np.nan_to_num(turnover)
+
+
+def performance(net: np.ndarray, turnover: np.ndarray | None = None, periods_per_year: int = 12) -> pd.DataFrame:
+    """
+    Per-variant statistics of a (variants x months) return block.
+    Columns: cagr, ann_vol, sharpe (rf = 0), max_drawdown, hit_rate, ann_turnover.
+    """
+    net = np.atleast_2d(net)
+    n = net.shape[1]
+    wealth = np.cumprod(1.0 + net, axis=1)
+    peak = np.maximum.accumulate(np.maximum(wealth, 1.0), axis=1)
+    vol = net.std(axis=1, ddof=1) if n > 1 else np.full(len(net), np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cagr = np.where(wealth[:, -1] > 0, wealth[:, -1] ** (periods_per_year / n) - 1.0, -1.0)
+        sharpe = net.mean(axis=1) / vol * np.sqrt(periods_per_year)
+    out = {
+        "cagr": cagr,
+        "ann_vol": vol * np.sqrt(periods_per_year),
+        "sharpe": np.where(vol > 0, sharpe, np.nan),
+        "max_drawdown": (wealth / peak - 1.0).min(axis=1),
+        "hit_rate": (net > 0).mean(axis=1),
+    }
+    if turnover is not None:
+        out["ann_turnover"] = np.atleast_2d(turnover).sum(axis=1) * periods_per_year / n
+    return pd.DataFrame(out)
+
+
+def _expand(grid: Dict[str, Sequence]) -> List[dict]:
+    keys = list(grid)
+    return [dict(zip(keys, combo)) for combo in itertools.product(*(grid[k] for k in keys))]
+
+
+def _run_chunk(returns, strategy, params, rebalances, costs, periods_per_year):
+    W = strategy(params)
+    rows = []
+    for reb in rebalances:
+        gross, turnover = simulate(returns, W, reb)
+        for cost in costs:
+            net = gross - turnover * (cost / 1e4)
+            stats = performance(net, turnover, periods_per_year)
+            meta = pd.DataFrame(params)
+            meta["rebalance"] = "M" if reb is None else reb
+            meta["cost_bps"] = cost
+            rows.append(pd.concat([meta, stats], axis=1))
+    return pd.concat(rows, ignore_index=True)
+
+
+def run_grid(
+    returns: pd.DataFrame,
+    strategy: Callable[[List[dict]], np.ndarray],
+    grid: Dict[str, Sequence],
+    rebalance: str | int | None = None,
+    cost_bps: float = 0.0,
+    chunk_size: int = 1000,
+    workers: int | None = None,
+    periods_per_year: int = 12,
+) -> pd.DataFrame:
+    """
+    Backtest every combination in `grid`; one row per variant, best Sharpe first.
+
+    strategy -> callable(list of param dicts) -> (variants x months x assets) weights
+                aligned to `returns` (must be picklable when workers != 1)
+    grid     -> {param: values}; "rebalance" and "cost_bps" entries are handled by
+                the engine (otherwise the `rebalance` / `cost_bps` arguments apply)
+    workers  -> worker processes (None = one per CPU, 1 = run in this process)
+    """
+    grid = dict(grid)
+    rebalances = list(grid.pop("rebalance", [rebalance]))
+    costs = [float(c) for c in grid.pop("cost_bps", [cost_bps])]
+    variants = _expand(grid)
+    chunks = [variants[i:i + chunk_size] for i in range(0, len(variants), chunk_size)]
+    args = [(returns, strategy, chunk, rebalances, costs, periods_per_year) for chunk in chunks]
+
+    if workers == 1 or len(chunks) == 1:
+        parts = [_run_chunk(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            parts = list(ex.map(_run_chunk, *zip(*args)))
+    out = pd.concat(parts, ignore_index=True)
+    return out.sort_values("sharpe", ascending=False, kind="stable", na_position="last").reset_index(drop=True)
+
+
+class MacroTilt:
+    """
+    Two-asset tilt (returns columns: [risky, safe]) driven by a macro feature.
+
+    Each month the trailing `lookback`-month z-score of `signal` is compared
+    with `threshold`; above it the risky weight is base + direction * tilt,
+    below -threshold base - direction * tilt, otherwise base (also during the
+    warm-up). direction=-1 underweights the risky asset when the feature is
+    high (e.g. rising yields). The z-score of month t-1 sets month t's weights.
+
+    Grid params: signal, lookback, threshold, tilt, base (0.5), direction (-1).
+    """
+
+    def __init__(self, features: pd.DataFrame):
+        self.features = features
+
+    def _zscores(self, signal: str, lookback: int) -> np.ndarray:
+        x = pd.to_numeric(self.features[signal], errors="coerce")
+        roll = x.rolling(int(lookback), min_periods=max(3, int(lookback) // 2))
+        z = (x - roll.mean()) / roll.std()
+        return z.shift(1).to_numpy(dtype=np.float64, na_value=np.nan)
+
+    def __call__(self, params: List[dict]) -> np.ndarray:
+        cache = {}
+        Z = np.empty((len(params), len(self.features)))
+        for i, p in enumerate(params):
+            key = (p["signal"], int(p["lookback"]))
+            if key not in cache:
+                cache[key] = self._zscores(*key)
+            Z[i] = cache[key]
+
+        def col(name, default=None):
+            return np.array([p.get(name, default) for p in params], dtype=np.float64)[:, None]
+
+        thr, tilt = col("threshold"), col("tilt")
+        base, direction = col("base", 0.5), col("direction", -1.0)
+        with np.errstate(invalid="ignore"):
+            side = np.where(Z > thr, 1.0, np.where(Z < -thr, -1.0, 0.0))
+        risky = np.clip(base + direction * tilt * side, 0.0, 1.0)
+        return np.stack([risky, 1.0 - risky], axis=-1)
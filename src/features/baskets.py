@@ -0,0 +1,147 @@
+"""
+Many basket return series from one returns matrix.
+
+A basket is a set of weights over tickers. All baskets are stacked into one
+(baskets x tickers) weight matrix W, and every basket return series comes out
+of two matrix products over the (dates x tickers) returns R:
+
+    num = (F * R) @ W.T        den = (F * present) @ W.T        ret = num / den
+
+- `present` is the NaN mask. Missing tickers (not yet listed, halted, delisted)
+  drop out and the remaining weights are renormalised by `den`.
+- F is a per-ticker, per-date factor:
+  - with rebalance=None, baskets are reset to target weights every period and F = 1
+  - with scheduled rebalancing ("M", "Q", "Y" or every k rows), F is each
+    ticker's growth since the last rebalance, so weights drift with prices in between
+  - cap-weighted baskets use F * cap(at last rebalance)
+
+Because F only depends on the ticker, one product covers every basket. Adding
+a basket adds one row to W.
+
+Basket definitions:
+    ["NVDA", "AMD"]                           equal weight
+    {"NVDA": 0.6, "AMD": 0.4}                 custom weights
+    {"tickers": [...], "weights": "cap"}      cap weight (needs `caps`)
+"""
+
+from typing import List, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def _parse(spec) -> tuple[dict, str]:
+    """Basket definition -> ({ticker: weight}, 'static' | 'cap')."""
+    if isinstance(spec, Mapping) and "tickers" in spec:
+        weights = spec.get("weights", "equal")
+        tickers = list(spec["tickers"])
+        if weights == "cap":
+            return {t: 1.0 for t in tickers}, "cap"
+        if weights == "equal":
+            return {t: 1.0 for t in tickers}, "static"
+        return {t: float(weights[t]) for t in tickers}, "static"
+    if isinstance(spec, Mapping):
+        return {t: float(w) for t, w in spec.items()}, "static"
+    if isinstance(spec, str):
+        return {spec: 1.0}, "static"
+    return {t: 1.0 for t in spec}, "static"
+
+
+def weight_matrix(baskets: Mapping[str, object], tickers: Sequence[str]) -> tuple[np.ndarray, List[str]]:
+    """(baskets x tickers) raw weights and the weighting kind of each basket."""
+    col = {t: j for j, t in enumerate(tickers)}
+    W = np.zeros((len(baskets), len(tickers)))
+    kinds = []
+    for i, spec in enumerate(baskets.values()):
+        weights, kind = _parse(spec)
+        for t, w in weights.items():
+            if t in col:
+                W[i, col[t]] = w
+        kinds.append(kind)
+    return W, kinds
+
+
+def _segment_starts(index: pd.Index, rebalance) -> np.ndarray:
+    """Row number at which each row's holding period started."""
+    n = len(index)
+    rows = np.arange(n)
+    if rebalance is None:
+        return rows
+    if isinstance(rebalance, (int, np.integer)):
+        return rows - rows % int(rebalance)
+    freq = {"M": "M", "Q": "Q", "Y": "Y", "A": "Y"}.get(str(rebalance).upper())
+    if freq is None:
+        raise ValueError(f"rebalance must be None, an int or one of M/Q/Y, got {rebalance!r}")
+    idx = pd.DatetimeIndex(index)
+    if idx.tz is not None:
+        idx = idx.tz_localize(None)
+    period = idx.to_period(freq).asi8
+    new = np.r_[True, period[1:] != period[:-1]]
+    return np.maximum.accumulate(np.where(new, rows, 0))
+
+
+def basket_returns(
+    returns: pd.DataFrame,
+    baskets: Mapping[str, object],
+    rebalance: str | int | None = None,
+    caps: pd.DataFrame | None = None,
+    min_coverage: float = 0.0,
+) -> pd.DataFrame:
+    """
+    Period returns of every basket (columns) over the dates of `returns`.
+
+    returns      -> (dates x tickers) simple returns; NaN = not available that period
+    rebalance    -> None (reset to target weights every period), "M"/"Q"/"Y" or every k rows
+    caps         -> (dates x tickers) market caps for cap-weighted baskets (forward-filled)
+    min_coverage -> NaN when less than this share of a basket's target weight is present
+    An equal-weight basket with rebalance=None equals `returns[tickers].mean(axis=1)`.
+    """
+    tickers = list(returns.columns)
+    R = returns.to_numpy(dtype=np.float64, na_value=np.nan)
+    present = ~np.isnan(R)
+    R0 = np.where(present, R, 0.0)
+    W, kinds = weight_matrix(baskets, tickers)
+    n = len(R)
+
+    # growth of each holding since its period's rebalance (1 at the rebalance row)
+    starts = _segment_starts(returns.index, rebalance)
+    if rebalance is None:
+        F = np.ones_like(R0)
+    else:
+        # g[k] = growth over rows < k. A -100% return would zero the running product
+        # for good (0/0 later), so wipe-outs are counted in z instead: a holding that
+        # hit one since its rebalance is worth 0 until the next rebalance
+        gross = 1.0 + R0
+        dead = gross == 0.0
+        g = np.vstack([np.ones((1, R0.shape[1])), np.cumprod(np.where(dead, 1.0, gross), axis=0)])
+        z = np.vstack([np.zeros((1, R0.shape[1]), dtype=np.int64), np.cumsum(dead, axis=0)])
+        k = np.arange(n)
+        F = np.where(z[k] == z[starts], g[k] / g[starts], 0.0)
+
+    out = np.full((n, len(baskets)), np.nan)
+    groups = {"static": [i for i, k in enumerate(kinds) if k == "static"],
+              "cap": [i for i, k in enumerate(kinds) if k == "cap"]}
+    for kind, rows in groups.items():
+        if not rows:
+            continue
+        Fk = F
+        if kind == "cap":
+            if caps is None:
+                raise ValueError("cap-weighted baskets need `caps`")
+            C = caps.reindex(index=returns.index, columns=tickers).ffill().to_numpy(dtype=np.float64, na_value=np.nan)
+            # caps known at the close before each holding period started
+            C = C[np.maximum(starts - 1, 0)]
+            Fk = F * np.nan_to_num(C, nan=0.0)
+        Wk = W[rows].T
+        num = (Fk * R0) @ Wk
+        den = (Fk * present) @ Wk
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ret = num / den
+        ret[den <= 0] = np.nan
+        if min_coverage > 0:
+            target = Fk @ Wk
+            with np.errstate(invalid="ignore", divide="ignore"):
+                ret[(den / target) < min_coverage] = np.nan
+        out[:, rows] = ret
+
+    return pd.DataFrame(out, index=returns.index, columns=list(baskets))
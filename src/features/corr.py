@@ -0,0 +1,43 @@
+"""
+Pairwise-complete cross-correlation of two column sets in one pass.
+
+`cross_corr(left, right)` is the (left columns x right columns) table of
+Pearson correlations that `left[a].corr(right[b])` would give for every pair,
+each pair using only the rows where both values are present. Instead of
+N x M Series.corr calls it forms the five masked moment matrices (counts,
+sums, sums of squares, cross products) with matrix products, so 100 tickers
+x 4 indicators costs about the same as one pair.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def cross_corr(left: pd.DataFrame, right: pd.DataFrame, min_obs: int = 2) -> pd.DataFrame:
+    """
+    Pearson correlation of every left column with every right column.
+    Both frames must share the same row index (align them first).
+    Pairs with fewer than `min_obs` overlapping rows are NaN.
+    """
+    if not left.index.equals(right.index):
+        raise ValueError("left and right must share the same index")
+    x = left.to_numpy(dtype=np.float64, na_value=np.nan)
+    y = right.to_numpy(dtype=np.float64, na_value=np.nan)
+    mx, my = ~np.isnan(x), ~np.isnan(y)
+    fx, fy = mx.astype(np.float64), my.astype(np.float64)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # centre each column first so large price levels don't cancel out
+        x = np.where(mx, x - np.where(mx, x, 0.0).sum(0) / mx.sum(0), 0.0)
+        y = np.where(my, y - np.where(my, y, 0.0).sum(0) / my.sum(0), 0.0)
+
+        n = fx.T @ fy
+        sx, sy = x.T @ fy, fx.T @ y
+        sxx, syy = (x * x).T @ fy, fx.T @ (y * y)
+        sxy = x.T @ y
+        cov = sxy - sx * sy / n
+        var = (sxx - sx * sx / n) * (syy - sy * sy / n)
+        r = cov / np.sqrt(var)
+    r = np.clip(r, -1.0, 1.0)
+    r[(n < max(min_obs, 2)) | ~(var > 0)] = np.nan
+    return pd.DataFrame(r, index=left.columns, columns=right.columns)
@@ -0,0 +1,165 @@
+"""
+Lag-structure search for the monthly macro regressions.
+
+The TechMonthly scripts regress each ticker's monthly return on the macro
+columns plus `make_lags(..., lags=LAGS)` copies of them. `select_lags` picks
+LAGS per ticker by time-series cross-validation, without rebuilding a frame
+or refitting a model per candidate:
+
+- `lag_tensor` exposes lags 0..max_lag of every feature as one strided
+  (months x lags x features) view over the data (no copy per lag)
+- every candidate lag set is a subset of the columns of that tensor, so the
+  Gram matrices Z'Z, Z'y (and y'y, sum y, n) are computed once per
+  cross-validation block and per ticker
+- expanding-window folds train on the cumulative sums of the earlier blocks
+  and are scored on the next block. The test SSE also comes from that
+  block's Gram matrix:
+  SSE = y'y - 2 b'Z'y + b'Z'Zb
+- so a candidate costs one small (p x p) solve per fold. Candidates with the
+  same number of columns are solved as one batched np.linalg.solve
+
+Scores are out-of-sample R^2 against the training-mean forecast, pooled over
+folds. Tickers are scored in parallel worker processes.
+"""
+
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def lag_tensor(X: np.ndarray, max_lag: int) -> np.ndarray:
+    """(T x K) -> read-only (T x max_lag+1 x K) view with [t, L, k] = X[t - L, k]; NaN before the start."""
+    X = np.asarray(X, dtype=np.float64)
+    padded = np.vstack([np.full((max_lag, X.shape[1]), np.nan), X])
+    win = sliding_window_view(padded, max_lag + 1, axis=0)     # [t, k, j] = X[t + j - max_lag]
+    return win[:, :, ::-1].transpose(0, 2, 1)
+
+
+def candidate_sets(pool: Sequence[int], max_size: int, extra: Sequence[Sequence[int]] = ()) -> List[tuple]:
+    """All lag subsets of `pool` with 1..max_size elements, plus `extra` sets (e.g. the current LAGS)."""
+    pool = sorted(set(int(L) for L in pool))
+    sets = [c for k in range(1, max_size + 1) for c in itertools.combinations(pool, k)]
+    seen = set(sets)
+    for e in extra:
+        e = tuple(sorted(set(int(L) for L in e)))
+        if e not in seen:
+            seen.add(e)
+            sets.append(e)
+    return sets
+
+
+def _columns(lag_set: tuple, n_features: int, include_current: bool) -> np.ndarray:
+    """Design columns of a lag set: intercept, then (lag, feature) blocks at 1 + L*K + k."""
+    lags = ((0,) if include_current else ()) + tuple(L for L in lag_set if L != 0)
+    return np.r_[0, [1 + L * n_features + k for L in lags for k in range(n_features)]].astype(np.int64)
+
+
+def _score_ticker(Z: np.ndarray, y: np.ndarray, edges: Sequence[int], groups: Dict[int, np.ndarray],
+                  penalty: np.ndarray) -> Dict[int, np.ndarray]:
+    """Pooled out-of-sample R^2 for every candidate (grouped by column count) of one ticker."""
+    m = ~np.isnan(y)
+    y0 = np.where(m, y, 0.0)
+    Zm = Z * m[:, None]
+    stats = []
+    for a, b in zip(edges[:-1], edges[1:]):
+        stats.append((Zm[a:b].T @ Z[a:b], Zm[a:b].T @ y0[a:b], y0[a:b] @ y0[a:b], y0[a:b].sum(), m[a:b].sum()))
+
+    out = {}
+    for p, cols in groups.items():
+        sse = np.zeros(len(cols))
+        sst = 0.0
+        G = np.zeros_like(stats[0][0]); c = np.zeros_like(stats[0][1]); sy = 0.0; n = 0
+        for f in range(1, len(stats)):
+            Gb, cb, yyb, syb, nb = stats[f - 1]
+            G, c, sy, n = G + Gb, c + cb, sy + syb, n + nb
+            Gt, ct, yyt, syt, nt = stats[f]
+            if nt == 0:
+                continue
+            if n < p + 2:                       # too little training history yet (late listing)
+                continue
+            A = G[cols[:, :, None], cols[:, None, :]] + np.einsum("ck,kl->ckl", n * penalty[cols], np.eye(p))
+            beta = np.linalg.solve(A, c[cols][..., None])[..., 0]
+            Gtc = Gt[cols[:, :, None], cols[:, None, :]]
+            sse += yyt - 2 * (beta * ct[cols]).sum(1) + np.einsum("ck,ckl,cl->c", beta, Gtc, beta)
+            mean = sy / n
+            sst += yyt - 2 * mean * syt + nt * mean * mean
+        out[p] = 1.0 - sse / sst if sst > 0 else np.full(len(cols), np.nan)
+    return out
+
+
+def select_lags(
+    returns: pd.DataFrame,
+    features: pd.DataFrame,
+    pool: Sequence[int] = range(1, 25),
+    max_size: int = 3,
+    include_current: bool = True,
+    baseline: Sequence[int] | None = (1, 3, 6),
+    n_folds: int = 5,
+    min_train: int = 36,
+    ridge: float = 1e-6,
+    workers: int | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Best lag set per ticker by expanding-window time-series CV.
+
+    returns  -> (months x tickers) target returns; features -> (months x K) macro columns
+    pool     -> lags to choose from; candidates are all subsets of 1..max_size lags
+    include_current -> always include the lag-0 columns (as the TechMonthly frames do)
+    baseline -> lag set always scored for comparison (the scripts' current LAGS)
+    ridge    -> shrinkage as a fraction of each column's variance; the small default keeps
+                exactly collinear designs solvable (us10y lags vs us10y_chg)
+    Every candidate is fitted on the same months (those with all lags up to max(pool)).
+    Returns (best, scores): best has one row per ticker (lags, oos_r2, baseline_r2);
+    scores has every (ticker, lags) pair.
+    """
+    features = features.sort_index().apply(pd.to_numeric, errors="coerce")
+    sets = candidate_sets(pool, max_size, [baseline] if baseline else [])
+    max_lag = max(max(s) for s in sets)
+    K = features.shape[1]
+
+    tensor = lag_tensor(features.to_numpy(dtype=np.float64, na_value=np.nan), max_lag)
+    Z = np.column_stack([np.ones(len(features)), tensor.reshape(len(features), -1)])
+    rows = ~np.isnan(Z).any(axis=1)
+    Z = Z[rows]
+    Y = returns.reindex(features.index[rows]).to_numpy(dtype=np.float64, na_value=np.nan)
+    if len(Z) < min_train + n_folds:
+        raise ValueError(f"{len(Z)} complete months after lagging by {max_lag}; need at least {min_train + n_folds}")
+    edges = [0] + list(np.linspace(min_train, len(Z), n_folds + 1).astype(int))
+    penalty = np.r_[0.0, Z[:, 1:].var(axis=0)] * ridge
+
+    cols = [_columns(s, K, include_current) for s in sets]
+    sizes = np.array([len(c) for c in cols])
+    groups = {p: np.stack([c for c, n in zip(cols, sizes) if n == p]) for p in np.unique(sizes)}
+    position = {p: np.flatnonzero(sizes == p) for p in groups}
+
+    args = [(Z, Y[:, j], edges, groups, penalty) for j in range(Y.shape[1])]
+    if workers == 1 or len(args) <= 1:
+        results = [_score_ticker(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(_score_ticker, *zip(*args)))
+
+    names = [",".join(map(str, s)) for s in sets]
+    table = np.full((len(results), len(sets)), np.nan)
+    for j, res in enumerate(results):
+        for p, r2 in res.items():
+            table[j, position[p]] = r2
+    scores = pd.DataFrame(table, index=returns.columns, columns=names)
+
+    base = ",".join(map(str, sorted(set(baseline)))) if baseline else None
+    best = []
+    for t, row in scores.iterrows():
+        top = row.idxmax() if row.notna().any() else None
+        best.append({
+            "ticker": t,
+            "lags": [int(x) for x in top.split(",")] if top else None,
+            "oos_r2": row.get(top, np.nan) if top else np.nan,
+            "baseline_r2": row.get(base, np.nan) if base else np.nan,
+            "n_months": int((~np.isnan(Y[:, returns.columns.get_loc(t)])).sum()),
+        })
+    long = scores.rename_axis("ticker").reset_index().melt(id_vars="ticker", var_name="lags", value_name="oos_r2")
+    return pd.DataFrame(best).set_index("ticker"), long.sort_values(["ticker", "oos_r2"], ascending=[True, False])
@@ -0,0 +1,111 @@
+"""
+Lead-lag scan: which macro series lead which stocks, and by how much.
+
+For every (ticker, indicator) pair and every lag k in -max_lag..max_lag, the
+Pearson correlation of ticker[t] with indicator[t - k] over the months where
+both are present. k > 0 means the indicator leads the ticker by k periods,
+k < 0 means the ticker leads.
+
+All pairs and lags come from six masked cross-correlation sums (counts, sums,
+sums of squares, cross products), each computed for a whole chunk of tickers
+x all indicators with one FFT product:
+
+    sum_t u[t] * v[t - k]  =  irfft(rfft(u) * conj(rfft(v)))[k]
+
+The series are zero-padded to at least T + max_lag, so the circular
+correlation does not wrap. Missing values are zeros with a 0/1 mask, so
+every lag uses only its own overlapping rows (pairwise-complete, as
+`left[a].corr(right[b].shift(k))` would). Each column is centred first so
+price-level-sized means don't cancel out in the moment formula.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _fft_len(n: int) -> int:
+    return 1 << int(np.ceil(np.log2(max(n, 2))))
+
+
+def lead_lag_cube(
+    left: pd.DataFrame,
+    right: pd.DataFrame,
+    max_lag: int = 24,
+    min_obs: int = 24,
+    chunk_size: int = 200,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (left cols x right cols x 2*max_lag+1) correlations and overlap counts.
+    Axis 2 runs over lags -max_lag..max_lag. Both frames must share the same row
+    index (e.g. month-end returns and macro changes); pairs with fewer than
+    `min_obs` overlapping rows at a lag are NaN there.
+    """
+    if not left.index.equals(right.index):
+        raise ValueError("left and right must share the same index")
+    x = left.to_numpy(dtype=np.float64, na_value=np.nan)
+    y = right.to_numpy(dtype=np.float64, na_value=np.nan)
+    T = len(x)
+    L = _fft_len(T + max_lag)
+    lags = np.r_[np.arange(L - max_lag, L), np.arange(max_lag + 1)]    # -K..-1, 0..K
+
+    def prep(v):
+        m = ~np.isnan(v)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(m, v, 0.0).sum(0) / m.sum(0)
+        c = np.where(m, v - mean, 0.0)
+        return [np.fft.rfft(a.T, n=L) for a in (m.astype(np.float64), c, c * c)]
+
+    my, by, byy = (np.conj(a) for a in prep(y))
+    corr = np.full((x.shape[1], y.shape[1], len(lags)), np.nan)
+    count = np.zeros(corr.shape, dtype=np.int64)
+
+    for s in range(0, x.shape[1], chunk_size):
+        mx, ax, axx = prep(x[:, s:s + chunk_size])
+
+        def xc(u, v):
+            return np.fft.irfft(u[:, None, :] * v[None, :, :], n=L)[..., lags]
+
+        n = np.rint(xc(mx, my))
+        sx, sy = xc(ax, my), xc(mx, by)
+        sxx, syy = xc(axx, my), xc(mx, byy)
+        sxy = xc(ax, by)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            vx = sxx - sx * sx / n
+            vy = syy - sy * sy / n
+            r = (sxy - sx * sy / n) / np.sqrt(vx * vy)
+        bad = (n < max(min_obs, 3)) | ~(vx > 1e-12 * sxx) | ~(vy > 1e-12 * syy)
+        r[bad] = np.nan
+        corr[s:s + chunk_size] = np.clip(r, -1.0, 1.0)
+        count[s:s + chunk_size] = n.astype(np.int64)
+    return corr, count
+
+
+def lead_lag(
+    left: pd.DataFrame,
+    right: pd.DataFrame,
+    max_lag: int = 24,
+    min_obs: int = 24,
+    chunk_size: int = 200,
+) -> pd.DataFrame:
+    """
+    Peak lead-lag per (left column, right column) pair, strongest |corr| first.
+
+    Columns: ticker, indicator, lag (> 0: indicator leads), corr, n_obs,
+    corr_lag0 (the contemporaneous correlation, for comparison).
+    """
+    corr, count = lead_lag_cube(left, right, max_lag, min_obs, chunk_size)
+    N, M, _ = corr.shape
+    score = np.where(np.isnan(corr), -np.inf, np.abs(corr))
+    best = score.argmax(axis=2)
+    ii, jj = np.meshgrid(np.arange(N), np.arange(M), indexing="ij")
+    peak = corr[ii, jj, best]
+    out = pd.DataFrame({
+        "ticker": np.repeat(np.asarray(left.columns, dtype=object), M),
+        "indicator": np.tile(np.asarray(right.columns, dtype=object), N),
+        "lag": np.where(np.isnan(peak), 0, best - max_lag).ravel(),
+        "corr": peak.ravel(),
+        "n_obs": count[ii, jj, best].ravel(),
+        "corr_lag0": corr[:, :, max_lag].ravel(),
+    })
+    order = np.argsort(-np.nan_to_num(np.abs(out["corr"].to_numpy()), nan=-1.0), kind="stable")
+    return out.iloc[order].reset_index(drop=True)
@@ -0,0 +1,138 @@
+"""
+Outer/left join of many monthly frames into one preallocated matrix.
+
+Instead of `pd.concat(frames, axis=1)` or chained `.join()` calls (each of
+which re-aligns and copies everything merged so far), the engine:
+
+1. maps every frame's index to an integer month key (datetime64[M]),
+2. builds the union (or left) month-end index once,
+3. allocates the output block (months x total columns) once, and
+4. scatters each frame's values into its column slice by integer position.
+
+Duplicate months inside a frame (e.g. daily rows, or two stamps in the same
+month) are resolved here and only here, via `dupes="last"|"first"|"mean"`.
+Peak memory is roughly the size of the output plus one input frame.
+"""
+
+from typing import Iterable, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+_NAT = np.iinfo(np.int64).min
+
+
+def _month_keys(index: pd.Index) -> np.ndarray:
+    """Integer month keys (months since 1970-01) for any date-like index; NaT -> int64 min."""
+    dt = index if isinstance(index, pd.DatetimeIndex) else pd.DatetimeIndex(pd.to_datetime(index, errors="coerce"))
+    if dt.tz is not None:
+        dt = dt.tz_localize(None)
+    return dt.values.astype("datetime64[M]").astype(np.int64)
+
+
+def month_end_index(keys: np.ndarray) -> pd.DatetimeIndex:
+    """Month keys -> month-end DatetimeIndex (same stamps as to_period('M').to_timestamp('M'))."""
+    months = np.asarray(keys, dtype=np.int64).astype("datetime64[M]")
+    ends = (months + 1).astype("datetime64[D]") - np.timedelta64(1, "D")
+    return pd.DatetimeIndex(ends.astype("datetime64[ns]"))
+
+
+def _numeric_values(df: pd.DataFrame) -> np.ndarray:
+    try:
+        return df.to_numpy(dtype=np.float64, na_value=np.nan)
+    except (TypeError, ValueError):
+        pass
+    return df.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _resolve(keys: np.ndarray, vals: np.ndarray, dupes: str):
+    """Collapse rows that share a month key. Returns (unique keys, values)."""
+    order = np.argsort(keys, kind="stable")
+    k, v = keys[order], vals[order]
+    if len(k) == 0 or not (k[1:] == k[:-1]).any():
+        return k, v
+    if dupes == "last":
+        keep = np.r_[k[1:] != k[:-1], True]
+        return k[keep], v[keep]
+    if dupes == "first":
+        keep = np.r_[True, k[1:] != k[:-1]]
+        return k[keep], v[keep]
+    if dupes == "mean":
+        uk, inv = np.unique(k, return_inverse=True)
+        ok = ~np.isnan(v)
+        sums = np.zeros((len(uk), v.shape[1]))
+        cnts = np.zeros((len(uk), v.shape[1]))
+        np.add.at(sums, inv, np.where(ok, v, 0.0))
+        np.add.at(cnts, inv, ok)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return uk, np.where(cnts > 0, sums / cnts, np.nan)
+    raise ValueError(f"dupes must be 'last', 'first' or 'mean', got {dupes!r}")
+
+
+def merge_monthly(
+    frames: Iterable[pd.DataFrame | pd.Series],
+    how: str = "outer",
+    dupes: str = "last",
+    keys: Sequence | None = None,
+    dropna_rows: bool = False,
+) -> pd.DataFrame:
+    """
+    Merge date-indexed frames on a month-end index.
+
+    how="outer" -> union of all months; how="left" -> months of the first frame.
+    keys        -> optional labels, one per frame, giving MultiIndex columns (like pd.concat(keys=...)).
+    dropna_rows -> drop months where every column is NaN.
+    Values are returned as float64; non-numeric cells become NaN.
+    """
+    if how not in ("outer", "left"):
+        raise ValueError(f"how must be 'outer' or 'left', got {how!r}")
+
+    prepared = []
+    for f in frames:
+        if f is None:
+            continue
+        if isinstance(f, pd.Series):
+            f = f.to_frame()
+        k = _month_keys(f.index)
+        valid = k != _NAT
+        prepared.append((f, k, valid))
+    if keys is not None and len(keys) != len(prepared):
+        raise ValueError("keys must have one label per (non-None) frame")
+    if not prepared:
+        return pd.DataFrame()
+
+    # 1) the month index, built once
+    if how == "left":
+        _, k0, v0 = prepared[0]
+        months = np.unique(k0[v0])
+    else:
+        months = np.unique(np.concatenate([k[v] for _, k, v in prepared]))
+
+    # 2) one preallocated output block
+    ncols = sum(f.shape[1] for f, _, _ in prepared)
+    # Fortran order: each frame writes a contiguous column slice, and pandas
+    # can wrap the array as a single block without copying
+    out = np.full((len(months), ncols), np.nan, dtype=np.float64, order="F")
+
+    # 3) scatter every frame into its column slice by integer row position
+    columns: List = []
+    c0 = 0
+    for i, (f, k, valid) in enumerate(prepared):
+        w = f.shape[1]
+        if w:
+            uk, vals = _resolve(k[valid], _numeric_values(f)[valid], dupes)
+            pos = np.searchsorted(months, uk)
+            hit = pos < len(months)
+            hit[hit] = months[pos[hit]] == uk[hit]
+            out[pos[hit], c0:c0 + w] = vals[hit]
+        if keys is None:
+            columns.extend(f.columns)
+        else:
+            columns.extend((keys[i], c) for c in f.columns)
+        c0 += w
+
+    cols = pd.MultiIndex.from_tuples(columns) if keys is not None else pd.Index(columns)
+    merged = pd.DataFrame(out, index=month_end_index(months), columns=cols, copy=False)
+    if dropna_rows:
+        merged = merged.loc[~np.isnan(out).all(axis=1)]
+    return merged
@@ -0,0 +1,202 @@
+"""
+Per-ticker kernels on long-form panels, without pivoting to wide.
+
+A long-form panel sorted by (ticker, date) - e.g. tech_prices_merged.* from
+`merge_prices` - is a set of ragged segments: ticker k owns rows
+offsets[k]:offsets[k+1]. With thousands of tickers listed at different dates
+a date x ticker pivot is mostly NaN; these kernels work on the flat value
+arrays instead, each in a handful of whole-array numpy passes (no Python loop
+over tickers):
+
+    pct_change / log_returns   shifted copy, masked at segment starts
+    rolling_std                window sums from one cumulative sum, window
+                               clipped at the segment start
+    drawdown                   segment-restarting running max (rank trick)
+    rebase                     divide by the first valid value of the segment
+    month_end_rows             last (valid) row per (segment, calendar month)
+
+`to_wide` scatters a finished long column to date x ticker for the steps
+that genuinely need tickers aligned on dates (a correlation matrix).
+
+Returns are between consecutive rows of a ticker: a date on which a ticker
+has no row is simply skipped (a row whose value is NaN gives NaN, like
+`pct_change(fill_method=None)` on the wide frame).
+"""
+
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def sort_long(df: pd.DataFrame, key: str = "ticker", time: str = "date") -> pd.DataFrame:
+    """`df` ordered by (key, time); returned as-is when it already is (the usual case)."""
+    k = df[key].to_numpy()
+    t = df[time].to_numpy()
+    if len(df) < 2:
+        return df
+    same = k[1:] == k[:-1]
+    if (same & (t[1:] < t[:-1])).sum() == 0 and len(pd.unique(k)) == (~same).sum() + 1:
+        return df
+    return df.sort_values([key, time], kind="stable").reset_index(drop=True)
+
+
+def segment_offsets(keys) -> Tuple[np.ndarray, np.ndarray]:
+    """(segment keys, offsets) of a grouped key column; offsets has one more entry than keys."""
+    keys = np.asarray(keys)
+    if len(keys) == 0:
+        return keys[:0], np.zeros(1, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    if len(pd.unique(keys)) != len(starts):
+        raise ValueError("keys are not grouped; sort the panel by (key, time) first (see sort_long)")
+    return keys[starts], np.r_[starts, len(keys)].astype(np.int64)
+
+
+def segment_ids(offsets: np.ndarray) -> np.ndarray:
+    """Segment number of every row."""
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+
+def _position(offsets: np.ndarray) -> np.ndarray:
+    """Row number within its segment."""
+    return np.arange(offsets[-1]) - np.repeat(offsets[:-1], np.diff(offsets))
+
+
+def _lagged(x: np.ndarray, offsets: np.ndarray, periods: int) -> np.ndarray:
+    out = np.full(len(x), np.nan)
+    if periods < len(x):
+        out[periods:] = x[:len(x) - periods]
+    out[_position(offsets) < periods] = np.nan
+    return out
+
+
+def pct_change(values, offsets: np.ndarray, periods: int = 1) -> np.ndarray:
+    """x[t] / x[t - periods] - 1 within each segment (NaN for its first `periods` rows)."""
+    x = np.asarray(values, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return x / _lagged(x, offsets, periods) - 1.0
+
+
+def log_returns(values, offsets: np.ndarray, periods: int = 1) -> np.ndarray:
+    x = np.asarray(values, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.log(x / _lagged(x, offsets, periods))
+
+
+def rolling_std(values, offsets: np.ndarray, window: int, min_periods: int | None = None,
+                ddof: int = 1) -> np.ndarray:
+    """
+    Rolling sample std over the last `window` rows of the same segment (NaNs
+    skipped, like `groupby(key).rolling(window, min_periods).std()`).
+    """
+    x = np.asarray(values, dtype=np.float64)
+    min_periods = window if min_periods is None else min_periods
+    ok = ~np.isnan(x)
+    seg = segment_ids(offsets)
+    # centre per segment so the running sums don't cancel out on price-sized values
+    cnt_seg = np.add.reduceat(ok.astype(np.float64), offsets[:-1]) if len(x) else np.zeros(0)
+    sum_seg = np.add.reduceat(np.where(ok, x, 0.0), offsets[:-1]) if len(x) else np.zeros(0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(cnt_seg > 0, sum_seg / cnt_seg, 0.0)
+    z = np.where(ok, x - mean[seg], 0.0)
+
+    c0 = np.r_[0.0, np.cumsum(ok)]
+    c1 = np.r_[0.0, np.cumsum(z)]
+    c2 = np.r_[0.0, np.cumsum(z * z)]
+    i = np.arange(len(x))
+    lo = np.maximum(i - window + 1, offsets[:-1][seg])
+    n = c0[i + 1] - c0[lo]
+    s1 = c1[i + 1] - c1[lo]
+    s2 = c2[i + 1] - c2[lo]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = (s2 - s1 * s1 / n) / (n - ddof)
+    var = np.maximum(var, 0.0)
+    return np.where((n >= max(min_periods, ddof + 1)), np.sqrt(var), np.nan)
+
+
+def rolling_vol(returns, offsets: np.ndarray, window: int, min_periods: int | None = None,
+                periods_per_year: float | None = None) -> np.ndarray:
+    """Rolling std of returns, annualized by sqrt(periods_per_year) when given."""
+    sd = rolling_std(returns, offsets, window, min_periods)
+    return sd * np.sqrt(periods_per_year) if periods_per_year else sd
+
+
+def cummax(values, offsets: np.ndarray) -> np.ndarray:
+    """Running max restarting at every segment (NaN rows stay NaN, like Series.cummax)."""
+    x = np.asarray(values, dtype=np.float64)
+    if not len(x):
+        return x.copy()
+    # ranks are exact integers, so segments can be stacked by adding seg * (n + 1)
+    # and one global maximum.accumulate never carries a value across a boundary
+    order = np.argsort(x, kind="stable")                 # NaNs sort last
+    rank = np.empty(len(x), dtype=np.int64)
+    rank[order] = np.arange(len(x))
+    stride = len(x) + 1
+    seg = segment_ids(offsets).astype(np.int64)
+    keyed = np.where(np.isnan(x), -1, rank) + seg * stride
+    top = np.maximum.accumulate(keyed) - seg * stride
+    return np.where((top >= 0) & ~np.isnan(x), x[order][np.maximum(top, 0)], np.nan)
+
+
+def drawdown(values, offsets: np.ndarray) -> np.ndarray:
+    """values / running peak of the segment - 1 (<= 0)."""
+    x = np.asarray(values, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return x / cummax(x, offsets) - 1.0
+
+
+def first_valid(values, offsets: np.ndarray) -> np.ndarray:
+    """First non-NaN value of every segment (NaN if it has none)."""
+    x = np.asarray(values, dtype=np.float64)
+    if not len(x):
+        return np.zeros(0)
+    pos = np.where(np.isnan(x), len(x), np.arange(len(x)))
+    first = np.minimum.reduceat(pos, offsets[:-1])
+    return np.where(first < len(x), x[np.minimum(first, len(x) - 1)], np.nan)
+
+
+def rebase(values, offsets: np.ndarray, base: float = 100.0) -> np.ndarray:
+    """Each segment scaled so its first valid value equals `base`."""
+    x = np.asarray(values, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return x / first_valid(x, offsets)[segment_ids(offsets)] * base
+
+
+def month_end_rows(dates, offsets: np.ndarray, valid=None) -> np.ndarray:
+    """
+    Row numbers of the last row per (segment, calendar month), restricted to
+    `valid` rows when given (resample("ME").last() skips NaNs the same way).
+    """
+    d = pd.DatetimeIndex(dates)
+    if d.tz is not None:
+        d = d.tz_localize(None)
+    month = d.to_numpy().astype("datetime64[M]").astype(np.int64)
+    seg = segment_ids(offsets)
+    rows = np.arange(len(month)) if valid is None else np.flatnonzero(np.asarray(valid))
+    m, s = month[rows], seg[rows]
+    last = np.r_[(m[1:] != m[:-1]) | (s[1:] != s[:-1]), True] if len(rows) else np.zeros(0, dtype=bool)
+    return rows[last]
+
+
+def month_end_sample(df: pd.DataFrame, offsets: np.ndarray, value: str = "close",
+                     time: str = "date") -> pd.DataFrame:
+    """Last valid `value` row per (segment, month), `time` relabelled to the month end."""
+    rows = month_end_rows(df[time], offsets, valid=df[value].notna().to_numpy())
+    out = df.iloc[rows].reset_index(drop=True)
+    d = pd.DatetimeIndex(out[time])
+    if d.tz is not None:
+        d = d.tz_localize(None)
+    out[time] = d.to_period("M").to_timestamp("M")
+    return out
+
+
+def to_wide(values, dates, offsets: np.ndarray, keys) -> pd.DataFrame:
+    """
+    Scatter one long value column into a date x key frame. Only for the last
+    step of an analysis that needs tickers aligned on dates (a correlation
+    matrix, a plot with a shared axis) - compute everything else long.
+    """
+    d, row = np.unique(np.asarray(dates), return_inverse=True)
+    out = np.full((len(d), len(keys)), np.nan)
+    out[row, segment_ids(offsets)] = np.asarray(values, dtype=np.float64)
+    return pd.DataFrame(out, index=pd.Index(d, name="date"), columns=pd.Index(keys, name="ticker"))
@@ -0,0 +1,238 @@
+"""
+Monte Carlo macro-shock scenarios: return distributions, VaR and CVaR.
+
+1. `macro_factors` turns macro_monthly.csv into monthly factor changes
+   (DGS10, FEDFUNDS, CPI inflation, UNRATE).
+2. `FactorModel.fit` regresses every ticker's monthly return on those changes
+   at several lags. Each ticker uses its own available months. All tickers are
+   solved in one batch of masked normal equations. The residual covariance
+   is kept for correlated idiosyncratic noise.
+3. `simulate_scenarios` draws `horizon`-month macro paths, either as a block
+   bootstrap of historical factor rows (keeps the joint co-movement) or from a
+   multivariate normal fitted to them. Optional shocks are added to the first
+   month (e.g. {"us10y_chg": 1.0} = +100bp in DGS10). The paths go through the
+   betas with lags seeded from the last observed months, and the horizon
+   returns are compounded per ticker and per (monthly rebalanced) basket.
+4. `risk_report` reduces the simulated horizon returns to VaR / CVaR (losses
+   as positive numbers).
+
+Paths are simulated in vectorized chunks on a process pool. Chunk i always
+uses the i-th child of SeedSequence(seed), so a run is reproducible for a
+given seed and chunk_size whatever the number of workers.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .baskets import weight_matrix
+
+DEFAULT_FACTORS = ["us10y_chg", "fedfunds_chg", "inflation_chg", "unrate_chg"]
+
+
+def macro_factors(macro: pd.DataFrame) -> pd.DataFrame:
+    """Monthly changes of DGS10, FEDFUNDS, CPI inflation (YoY, pp) and UNRATE from macro_monthly columns."""
+    m = macro.apply(pd.to_numeric, errors="coerce")
+
+    def chg(name, level):
+        if name in m:
+            return m[name]
+        return m[level].diff() if level in m else pd.Series(np.nan, index=m.index)
+
+    if "inflation_yoy" not in m and "cpi_index" in m:
+        m["inflation_yoy"] = m["cpi_index"].pct_change(12, fill_method=None) * 100
+    return pd.DataFrame({
+        "us10y_chg": chg("us10y_chg", "us10y"),
+        "fedfunds_chg": chg("fedfunds_chg", "fed_funds_rate"),
+        "inflation_chg": chg("inflation_chg", "inflation_yoy"),
+        "unrate_chg": chg("unrate_chg", "unemployment_rate"),
+    }, index=m.index)
+
+
+def _lagged(X: np.ndarray, lags: Sequence[int]) -> np.ndarray:
+    """(T x K) -> (T x len(lags)*K) with column blocks X[t - lag]; leading rows NaN."""
+    T, K = X.shape
+    out = np.full((T, len(lags) * K), np.nan)
+    for i, L in enumerate(lags):
+        out[L:, i * K:(i + 1) * K] = X[:T - L]
+    return out
+
+
+def _nearest_psd(cov: np.ndarray) -> np.ndarray:
+    vals, vecs = np.linalg.eigh((cov + cov.T) / 2)
+    return (vecs * np.clip(vals, 0.0, None)) @ vecs.T
+
+
+class FactorModel:
+    """Per-ticker linear exposure of monthly returns to lagged macro factor changes."""
+
+    def __init__(self, tickers, factors, lags, alpha, beta, resid_cov, n_obs, history):
+        self.tickers = list(tickers)
+        self.factors = list(factors)
+        self.lags = tuple(lags)
+        self.alpha = alpha            # (N,)
+        self.beta = beta              # (N, len(lags) * K), lag-major blocks
+        self.resid_cov = resid_cov    # (N, N)
+        self.n_obs = n_obs            # (N,)
+        self.history = history        # (T x K) complete factor rows used for sampling / lag seeding
+
+    @classmethod
+    def fit(cls, returns: pd.DataFrame, factors: pd.DataFrame, lags: Sequence[int] = (0, 1),
+            min_obs: int = 24, ridge: float = 0.0) -> "FactorModel":
+        """
+        returns -> (months x tickers) simple returns; factors -> (months x K) factor changes.
+        ridge   -> shrinkage of the betas, as a fraction of each regressor's variance
+                   (guards against near-collinear factors / lags; 0 = plain OLS).
+        Tickers with fewer than `min_obs` usable months are dropped.
+        """
+        lags = tuple(sorted(set(int(L) for L in lags)))
+        factors = factors.apply(pd.to_numeric, errors="coerce").dropna(how="all")
+        idx = returns.index.intersection(factors.index)
+        F = factors.to_numpy(dtype=np.float64, na_value=np.nan)
+        D = pd.DataFrame(_lagged(F, lags), index=factors.index).reindex(idx).to_numpy()
+        Y = returns.reindex(idx).to_numpy(dtype=np.float64, na_value=np.nan)
+
+        X = np.column_stack([np.ones(len(idx)), D])
+        ok = ~np.isnan(X).any(axis=1)
+        X, Y = X[ok], Y[ok]
+        M = ~np.isnan(Y)
+        Y0 = np.where(M, Y, 0.0)
+        Mf = M.astype(np.float64)
+
+        # one masked normal-equation system per ticker, solved as a batch
+        XtX = np.einsum("tk,tn,tl->nkl", X, Mf, X)
+        if ridge > 0:
+            penalty = np.r_[0.0, X[:, 1:].var(axis=0)] * ridge
+            XtX += np.einsum("n,k,kl->nkl", Mf.sum(axis=0), penalty, np.eye(X.shape[1]))
+        Xty = np.einsum("tk,tn->nk", X, Y0)
+        n_obs = M.sum(axis=0)
+        keep = n_obs >= max(min_obs, X.shape[1] + 2)
+        coef = np.full((Y.shape[1], X.shape[1]), np.nan)
+        if keep.any():
+            coef[keep] = np.linalg.solve(XtX[keep] + 1e-12 * np.eye(X.shape[1]), Xty[keep][..., None])[..., 0]
+
+        resid = np.where(M, Y - X @ np.nan_to_num(coef).T, np.nan)[:, keep]
+        cov = pd.DataFrame(resid).cov(min_periods=max(min_obs // 2, 3)).to_numpy()
+        diag = np.diag(cov).copy()
+        cov = np.nan_to_num(cov, nan=0.0)
+        cov[np.diag_indices_from(cov)] = np.nan_to_num(diag, nan=0.0)
+
+        return cls(
+            tickers=returns.columns[keep], factors=factors.columns, lags=lags,
+            alpha=coef[keep, 0], beta=coef[keep, 1:], resid_cov=_nearest_psd(cov),
+            n_obs=n_obs[keep], history=factors.dropna(),
+        )
+
+    def table(self) -> pd.DataFrame:
+        """Alpha, betas (factor_lagL), residual vol and sample size per ticker."""
+        cols = [f"{f}_lag{L}" for L in self.lags for f in self.factors]
+        out = pd.DataFrame(self.beta, index=self.tickers, columns=cols)
+        out.insert(0, "alpha", self.alpha)
+        out["resid_vol"] = np.sqrt(np.diag(self.resid_cov))
+        out["n_obs"] = self.n_obs
+        return out
+
+
+def _draw_factors(rng, hist: np.ndarray, n: int, horizon: int, method: str, block: int) -> np.ndarray:
+    if method == "normal":
+        mu, cov = hist.mean(axis=0), np.cov(hist, rowvar=False)
+        L = np.linalg.cholesky(_nearest_psd(np.atleast_2d(cov)) + 1e-12 * np.eye(hist.shape[1]))
+        return mu + rng.standard_normal((n, horizon, hist.shape[1])) @ L.T
+    if method == "bootstrap":
+        block = max(1, min(int(block), len(hist)))
+        n_blocks = -(-horizon // block)
+        starts = rng.integers(0, len(hist) - block + 1, size=(n, n_blocks))
+        rows = (starts[..., None] + np.arange(block)).reshape(n, -1)[:, :horizon]
+        return hist[rows]
+    raise ValueError(f"method must be 'bootstrap' or 'normal', got {method!r}")
+
+
+def _simulate_chunk(model: FactorModel, W: np.ndarray, n: int, seed, horizon: int, method: str,
+                    block: int, shock: np.ndarray, idio: bool) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    hist = model.history.to_numpy(dtype=np.float64)
+    K, max_lag = hist.shape[1], max(model.lags)
+
+    X = _draw_factors(rng, hist, n, horizon, method, block)
+    X[:, 0, :] += shock
+    if max_lag:
+        seedrows = np.broadcast_to(hist[-max_lag:], (n, max_lag, K))
+        X = np.concatenate([seedrows, X], axis=1)
+    D = np.concatenate([X[:, max_lag - L:max_lag - L + horizon] for L in model.lags], axis=2)
+
+    N = len(model.tickers)
+    r = D.reshape(n * horizon, -1) @ model.beta.T + model.alpha         # (paths * months, tickers)
+    if idio:
+        vals, vecs = np.linalg.eigh(model.resid_cov)
+        r += rng.standard_normal((n * horizon, N)) @ (vecs * np.sqrt(np.clip(vals, 0.0, None))).T
+    np.clip(r, -1.0, None, out=r)
+    out = [np.prod((1.0 + r).reshape(n, horizon, N), axis=1) - 1.0]
+    if len(W):
+        rb = 1.0 + r @ W.T                                                # monthly rebalanced baskets
+        out.append(np.prod(rb.reshape(n, horizon, -1), axis=1) - 1.0)
+    return np.concatenate(out, axis=1).astype(np.float32)
+
+
+def simulate_scenarios(
+    model: FactorModel,
+    horizon: int = 12,
+    n_paths: int = 100_000,
+    method: str = "bootstrap",
+    block: int = 3,
+    shocks: Mapping[str, float] | None = None,
+    baskets: Mapping[str, object] | None = None,
+    idio: bool = True,
+    seed: int = 42,
+    chunk_size: int = 50_000,
+    workers: int | None = 1,
+) -> pd.DataFrame:
+    """
+    Simulated `horizon`-month returns: one row per path, one column per ticker and basket.
+
+    method  -> "bootstrap" (blocks of `block` historical months) or "normal"
+    shocks  -> {factor: change added to the first simulated month}
+    baskets -> {name: tickers | {ticker: weight}} as in `basket_returns` (equal/custom weights)
+    idio    -> add correlated residual noise from the fitted model
+    workers -> worker processes (None = one per CPU, 1 = run in this process)
+    """
+    unknown = set(shocks or {}) - set(model.factors)
+    if unknown:
+        raise ValueError(f"unknown shock factors {sorted(unknown)}; model factors are {model.factors}")
+    shock = np.array([float((shocks or {}).get(f, 0.0)) for f in model.factors])
+
+    names = list(baskets or {})
+    W, kinds = weight_matrix(baskets or {}, model.tickers)
+    if "cap" in kinds:
+        raise ValueError("cap-weighted baskets are not supported in scenarios")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        W = W / W.sum(axis=1, keepdims=True)
+    W = np.nan_to_num(W)
+
+    sizes = [min(chunk_size, n_paths - i) for i in range(0, n_paths, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(model, W, n, s, horizon, method, block, shock, idio) for n, s in zip(sizes, seeds)]
+    if workers == 1 or len(args) == 1:
+        parts = [_simulate_chunk(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            parts = list(ex.map(_simulate_chunk, *zip(*args)))
+    return pd.DataFrame(np.concatenate(parts), columns=model.tickers + names, copy=False)
+
+
+def risk_report(sims: pd.DataFrame, levels: Sequence[float] = (0.95, 0.99)) -> pd.DataFrame:
+    """Mean, vol, P(loss), VaR and CVaR (expected loss beyond VaR) per column; losses are positive."""
+    R = np.sort(sims.to_numpy(dtype=np.float64), axis=0)
+    n = len(R)
+    out: Dict[str, np.ndarray] = {
+        "mean": R.mean(axis=0),
+        "std": R.std(axis=0, ddof=1),
+        "p_loss": (R < 0).mean(axis=0),
+    }
+    for a in levels:
+        k = max(1, int(np.ceil(round(n * (1 - a), 9))))
+        tag = f"{round(a * 100, 1):g}"
+        out[f"VaR_{tag}"] = -R[k - 1]
+        out[f"CVaR_{tag}"] = -R[:k].mean(axis=0)
+    return pd.DataFrame(out, index=sims.columns)
@@ -0,0 +1,2 @@
+# Plotting helpers shared by the chart scripts in notebooks/.
+from .downsample import lttb_indices, downsample, plot_series
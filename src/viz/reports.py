@@ -0,0 +1,212 @@
+"""
+Batch chart + static HTML report generator.
+
+Renders (ticker x chart type) figures in parallel worker processes on the Agg
+backend, from the local caches written by the download scripts:
+
+    data_cache/<TICKER>_prices.csv   (download_prices.py)
+    data_cache/fred_<SERIES>.csv     (download_fred.py)
+
+Every figure is keyed by the content fingerprints of its input files plus the
+chart type and CHART_VERSION. A figure whose key is unchanged since the last
+run (and whose PNG still exists) is not re-rendered. Results are assembled into
+one HTML page per ticker plus an index page.
+
+Chart types: "price_history", "drawdown", "vs_<FRED_ID>" (e.g. "vs_DGS10").
+"""
+
+import hashlib
+import html
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+
+import pandas as pd
+
+from ..data.fingerprint import diff_fingerprints
+
+CHART_VERSION = "1"
+DEFAULT_CHARTS = ["price_history", "drawdown", "vs_DGS10"]
+
+_STYLE = """
+            body{font-family:Arial,sans-serif;line-height:1.6;}
+            h1,h2,h3{color:#333;}
+            img{border:1px solid #ddd;border-radius:5px;}
+            table{width:100%;border-collapse:collapse;margin-top:20px;}
+            th,td{padding:8px;text-align:left;border-bottom:1px solid #ddd;}
+            th{background-color:#f2f2f2;}
+            """
+
+
+# -------- inputs --------
+def chart_inputs(ticker: str, chart: str, data_dir: str = "data_cache") -> List[str]:
+    """Files a chart is rendered from."""
+    files = [os.path.join(data_dir, f"{ticker}_prices.csv")]
+    if chart.startswith("vs_"):
+        files.append(os.path.join(data_dir, f"fred_{chart[3:]}.csv"))
+    elif chart not in ("price_history", "drawdown"):
+        raise ValueError(f"Unknown chart type: {chart}")
+    return files
+
+
+def _load_prices(path: str) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    df["date"] = pd.to_datetime(df["date"], utc=True).dt.tz_localize(None)
+    return df.sort_values("date")
+
+
+# -------- rendering (runs in worker processes) --------
+def _init_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def render_chart(ticker: str, chart: str, inputs: List[str], out_path: str) -> str:
+    """Render one figure to `out_path` (PNG). Returns out_path."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from .downsample import plot_series
+
+    prices = _load_prices(inputs[0])
+    fig, ax = plt.subplots(figsize=(10, 5))
+    try:
+        if chart == "price_history":
+            plot_series(ax, prices["date"], prices["close"], label=f"{ticker} Close")
+            ax.set_title(f"{ticker} Closing Price")
+            ax.set_ylabel("Price (USD)")
+        elif chart == "drawdown":
+            close = prices["close"].astype(float)
+            dd = (close / close.cummax() - 1.0) * 100
+            plot_series(ax, prices["date"], dd, label=f"{ticker} Drawdown", color="tab:red")
+            ax.set_title(f"{ticker} Drawdown from Running Peak")
+            ax.set_ylabel("Drawdown (%)")
+        else:
+            series_id = chart[3:]
+            macro = pd.read_csv(inputs[1], parse_dates=["date"])
+            lo, hi = prices["date"].min(), prices["date"].max()
+            macro = macro[(macro["date"] >= lo) & (macro["date"] <= hi)]
+            plot_series(ax, prices["date"], prices["close"], label=f"{ticker} Close (USD)")
+            ax.set_ylabel(f"{ticker} Price (USD)")
+            ax2 = ax.twinx()
+            plot_series(ax2, macro["date"], macro["value"], label=series_id, linestyle="--", color="tab:orange")
+            ax2.set_ylabel(series_id)
+            ax2.legend(loc="upper left")
+            ax.set_title(f"{ticker} vs {series_id}")
+        ax.set_xlabel("Date")
+        ax.legend(loc="upper right")
+        ax.grid(True)
+        fig.tight_layout()
+        fig.savefig(out_path)
+    finally:
+        plt.close(fig)
+    return out_path
+
+
+# -------- HTML --------
+def _page(title: str, body: str) -> str:
+    return (f"<html><head><title>{html.escape(title)}</title><style>{_STYLE}</style></head>"
+            f"<body><h1>{html.escape(title)}</h1>{body}</body></html>")
+
+
+def write_pages(out_dir: str, images: Dict[str, Dict[str, str]]) -> List[str]:
+    """One page per ticker (images relative to out_dir) plus index.html."""
+    written = []
+    for ticker, charts in images.items():
+        body = "".join(
+            f"<h2>{html.escape(c)}</h2>"
+            f'<img src="{html.escape(rel)}" style="width:100%;height:auto;max-width:800px;">'
+            for c, rel in charts.items()
+        )
+        p = os.path.join(out_dir, f"{ticker}.html")
+        with open(p, "w", encoding="utf-8") as f:
+            f.write(_page(f"Research Report: {ticker}", body))
+        written.append(p)
+    rows = "".join(f'<tr><td><a href="{t}.html">{t}</a></td><td>{len(c)}</td></tr>' for t, c in images.items())
+    index = os.path.join(out_dir, "index.html")
+    with open(index, "w", encoding="utf-8") as f:
+        f.write(_page("Ticker Reports", f"<table><tr><th>Ticker</th><th>Charts</th></tr>{rows}</table>"))
+    written.append(index)
+    return written
+
+
+# -------- batch driver --------
+def _load_manifest(path: str) -> dict:
+    if os.path.exists(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except Exception:
+            pass
+    return {}
+
+
+def build_reports(
+    tickers: List[str],
+    charts: List[str] | None = None,
+    data_dir: str = "data_cache",
+    out_dir: str = "reports",
+    workers: int | None = None,
+    force: bool = False,
+) -> dict:
+    """
+    Render every (ticker, chart) whose inputs changed, then write the HTML pages.
+    Returns {'rendered': n, 'skipped': n, 'missing': [...], 'failed': [...]}.
+    """
+    charts = charts or DEFAULT_CHARTS
+    img_dir = os.path.join(out_dir, "images")
+    os.makedirs(img_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, ".render_manifest.json")
+    manifest = {} if force else _load_manifest(manifest_path)
+
+    # fingerprint every distinct input file once (stat shortcut for unchanged files)
+    jobs, missing, invalid = [], [], []
+    for t in tickers:
+        for c in charts:
+            try:
+                inputs = chart_inputs(t, c, data_dir)
+            except ValueError as e:                       # a bad chart name must not sink the batch
+                invalid.append(f"{t}:{c}")
+                print(f"⚠️ {t}:{c} skipped: {e}")
+                continue
+            if not all(os.path.exists(p) for p in inputs):
+                missing.append(f"{t}:{c}")
+                continue
+            jobs.append((t, c, inputs))
+    paths = {p: p for _, _, inputs in jobs for p in inputs}
+    files_fp, _ = diff_fingerprints(paths, manifest.get("files"))
+
+    done = manifest.get("charts", {})
+    todo, images, skipped = [], {}, 0
+    for t, c, inputs in jobs:
+        key = hashlib.sha256("|".join([CHART_VERSION, c] + [files_fp[p]["sha256"] for p in inputs]).encode()).hexdigest()
+        rel = f"images/{t}_{c}.png"
+        images.setdefault(t, {})[c] = rel
+        name = f"{t}:{c}"
+        if done.get(name) == key and os.path.exists(os.path.join(out_dir, rel)):
+            skipped += 1
+        else:
+            todo.append((name, key, t, c, inputs, os.path.join(out_dir, rel)))
+
+    failed = []
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as ex:
+            futs = {ex.submit(render_chart, t, c, inputs, out): (name, key) for name, key, t, c, inputs, out in todo}
+            for fut, (name, key) in futs.items():
+                try:
+                    fut.result()
+                    done[name] = key
+                except Exception as e:
+                    failed.append(name)
+                    done.pop(name, None)
+                    print(f"⚠️ {name} failed: {type(e).__name__}: {e}")
+    for name in failed:
+        t, c = name.split(":", 1)
+        images[t].pop(c, None)
+
+    write_pages(out_dir, images)
+    manifest = {"files": files_fp, "charts": done}
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return {"rendered": len(todo) - len(failed), "skipped": skipped, "missing": missing, "failed": invalid + failed}
@@ -0,0 +1,34 @@
+import pandas as pd
+
+from src.agent.memory import MemoryStore, analysis_key
+
+
+def test_find_roundtrip_and_retention(tmp_path):
+    store = MemoryStore(str(tmp_path / "mem.sqlite"), max_records=3)
+    table = pd.DataFrame({"DGS10": [0.5], "UNRATE": [float("nan")]}, index=["NVDA"])
+    keys = [analysis_key("1", ["NVDA"], ["DGS10", "UNRATE"], {"prices:NVDA": str(i)}) for i in range(5)]
+    for i, k in enumerate(keys):
+        store.add("single", ["NVDA"], k, {"ticker": "NVDA"}, {"i": i}, table, latest={"DGS10": 4.2},
+                  n_obs={"NVDA": 100}, insight=f"insight {i}")
+
+    assert len(store) == 3
+    assert store.find(keys[0]) is None           # dropped by retention
+    assert store.find(keys[4])["i"] == 4
+    hist = store.history("nvda", "DGS10")
+    assert len(hist) == 3 and hist["corr"].iloc[0] == 0.5 and hist["n_obs"].iloc[0] == 100
+
+    rid = store.reflect("NVDA", "insight 4", "COMPLETE", "success")
+    assert store.records("NVDA").set_index("id").loc[rid, "status"] == "success"
+    store.close()
+
+    reopened = MemoryStore(str(tmp_path / "mem.sqlite"))
+    assert reopened.find(keys[4])["i"] == 4
+
+
+def test_notes_are_capped_like_research_rows(tmp_path, capsys):
+    store = MemoryStore(str(tmp_path / "mem.sqlite"), max_records=3)
+    for i in range(5):
+        store.add_note("nvda", f"note {i}")
+    notes = store.get_notes("NVDA", last_n=10)
+    assert "note 1" not in notes and all(f"note {i}" in notes for i in (2, 3, 4))
+    store.close()
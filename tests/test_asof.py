@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+from src.features.asof import align_asof
+
+
+def test_matches_merge_asof_and_expires_stale_values():
+    cal = pd.bdate_range("2024-01-01", "2024-06-28")
+    monthly = pd.DataFrame({"date": pd.date_range("2024-01-01", periods=6, freq="MS"),
+                            "value": np.arange(6.0)})
+    monthly = monthly[monthly["date"] != "2024-04-01"]   # one missed release
+    daily = pd.Series(np.arange(len(cal), dtype=float), index=cal).drop(cal[50:60])
+
+    got = align_asof(cal, {"cpi": monthly, "dgs10": daily}, max_age={"cpi": "45D", "dgs10": "3D"})
+
+    left = pd.DataFrame({"date": cal})
+    exp = pd.merge_asof(left, monthly.rename(columns={"value": "cpi"}), on="date",
+                        tolerance=pd.Timedelta("45D"))
+    np.testing.assert_array_equal(got["cpi"].to_numpy(), exp["cpi"].to_numpy())
+    assert got.loc["2024-01-31", "cpi"] == 0.0          # monthly stamp reaches every later day
+    # the daily gap is bridged for at most 3 days, then NaN
+    gap = got["dgs10"].iloc[50:60]
+    assert gap.notna().sum() == 1 and gap.iloc[0] == daily.iloc[49]
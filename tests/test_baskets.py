@@ -0,0 +1,52 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from src.features.baskets import basket_returns
+
+
+def _returns():
+    rng = np.random.default_rng(3)
+    idx = pd.date_range("2020-01-31", periods=24, freq="ME")
+    r = pd.DataFrame(rng.normal(0.01, 0.05, (24, 4)), index=idx, columns=["A", "B", "C", "D"])
+    r.iloc[:5, 2] = np.nan       # C listed later
+    r.iloc[10, 0] = np.nan       # a missing print
+    return r
+
+
+def test_equal_weight_matches_row_mean_and_custom_renormalises():
+    r = _returns()
+    out = basket_returns(r, {"eq": ["A", "B", "C"], "custom": {"A": 3, "C": 1}})
+    pd.testing.assert_series_equal(out["eq"], r[["A", "B", "C"]].mean(axis=1), check_names=False)
+    exp = (3 * r["A"].fillna(0) + r["C"].fillna(0)) / (3 * r["A"].notna() + r["C"].notna())
+    exp[(r["A"].isna()) & (r["C"].isna())] = np.nan
+    pd.testing.assert_series_equal(out["custom"], exp, check_names=False)
+
+
+def test_quarterly_rebalance_drifts_like_buy_and_hold():
+    r = _returns()[["A", "B"]].fillna(0.0)
+    out = basket_returns(r, {"ab": {"A": 0.5, "B": 0.5}}, rebalance="Q")["ab"]
+    value, hold, q = 1.0, None, None
+    for t, row in r.fillna(0.0).iterrows():
+        if t.quarter != q:
+            q, hold = t.quarter, np.array([0.5, 0.5]) * value
+        new = hold * (1 + row.to_numpy())
+        assert abs(out[t] - (new.sum() / hold.sum() - 1)) < 1e-12
+        value, hold = new.sum(), new
+
+
+def test_wiped_out_holding_is_worth_zero_until_the_next_rebalance():
+    r = _returns()[["A", "B"]].fillna(0.0)
+    r.iloc[4, 0] = -1.0                          # A goes to zero mid-quarter
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")           # no 0/0 along the way
+        out = basket_returns(r, {"ab": {"A": 0.5, "B": 0.5}}, rebalance="Q")["ab"]
+    value, hold, q = 1.0, None, None
+    for t, row in r.iterrows():
+        if t.quarter != q:
+            q, hold = t.quarter, np.array([0.5, 0.5]) * value
+        new = hold * (1 + row.to_numpy())
+        assert abs(out[t] - (new.sum() / hold.sum() - 1)) < 1e-12
+        value, hold = new.sum(), new
+    assert out.notna().all()
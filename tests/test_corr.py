@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+from src.features.corr import cross_corr
+
+
+def test_matches_pairwise_series_corr_with_gaps():
+    rng = np.random.default_rng(0)
+    idx = pd.RangeIndex(300)
+    left = pd.DataFrame(rng.normal(500, 50, (300, 3)).cumsum(0), index=idx, columns=["A", "B", "C"])
+    right = pd.DataFrame(rng.normal(0, 1, (300, 2)).cumsum(0), index=idx, columns=["x", "y"])
+    left.iloc[:120, 0] = np.nan          # late listing
+    left.iloc[::7, 1] = np.nan           # scattered gaps
+    right.iloc[250:, 1] = np.nan         # series ends early
+    left["D"] = np.nan                   # no data at all
+
+    got = cross_corr(left, right)
+    for a in left.columns:
+        for b in right.columns:
+            exp = left[a].corr(right[b])
+            if np.isnan(exp):
+                assert np.isnan(got.loc[a, b])
+            else:
+                assert abs(got.loc[a, b] - exp) < 1e-10
@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+
+from src.viz.downsample import downsample, lttb_indices
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    y = np.zeros(10_000)
+    y[4321] = 50.0
+    idx = lttb_indices(np.arange(len(y)), y, 300)
+    assert len(idx) == 300
+    assert idx[0] == 0 and idx[-1] == len(y) - 1
+    assert 4321 in idx
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_downsample_drops_nan_and_keeps_datetimes():
+    x = pd.Series(pd.date_range("2005-01-03", periods=5000, freq="B", tz="America/New_York"))
+    y = np.cumsum(np.random.default_rng(0).standard_normal(5000))
+    y[:10] = np.nan
+    xs, ys = downsample(x, y, 500)
+    assert len(xs) == len(ys) == 500
+    assert str(xs.dtype) == "datetime64[ns, America/New_York]"
+    assert xs.iloc[0] == x.iloc[10]
+    assert not np.isnan(ys).any()
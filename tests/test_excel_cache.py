@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("openpyxl")
+pytest.importorskip("pyarrow")
+
+from src.data.excel_cache import load_sheets_cached
+
+
+def _write(path, a_vals, b_vals):
+    with pd.ExcelWriter(path) as xw:
+        pd.DataFrame({"x": a_vals}).to_excel(xw, sheet_name="A", index=False)
+        pd.DataFrame({"y": b_vals}).to_excel(xw, sheet_name="B", index=False)
+
+
+def test_only_modified_sheet_is_reparsed(tmp_path):
+    wb = tmp_path / "wb.xlsx"
+    cache = tmp_path / "cache"
+    _write(wb, [1, 2, 3], [4, 5, 6])
+
+    frames, reparsed = load_sheets_cached(str(wb), cache_dir=str(cache))
+    assert sorted(reparsed) == ["A", "B"]
+
+    frames, reparsed = load_sheets_cached(str(wb), cache_dir=str(cache))
+    assert reparsed == []
+    assert list(frames) == ["A", "B"]
+
+    _write(wb, [1, 2, 3], [4, 5, 7])
+    frames, reparsed = load_sheets_cached(str(wb), cache_dir=str(cache))
+    assert reparsed == ["B"]
+    assert frames["B"].iloc[-1, 0] == "7"
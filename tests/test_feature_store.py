@@ -0,0 +1,36 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from src.data.feature_store import FeatureStore
+
+
+def _macro():
+    idx = pd.date_range("2021-01-31", periods=36, freq="ME")
+    return pd.DataFrame({"us10y": np.linspace(1, 4, 36), "unemployment_rate": np.linspace(6, 4, 36)}, index=idx)
+
+
+def test_snapshots_share_unchanged_partitions_and_serve_as_of(tmp_path):
+    store = FeatureStore(str(tmp_path / "store"))
+    v1 = store.commit({"macro_monthly": _macro()}, known_at="2023-12-31", note="run 1")
+    n_objects = sum(len(f) for _, _, f in os.walk(tmp_path / "store" / "objects"))
+    assert n_objects == 3                                   # 2021, 2022, 2023
+
+    revised = _macro()
+    revised.loc["2022-06-30", "us10y"] = 9.9                # a revision to history
+    v2 = store.commit({"macro_monthly": revised}, known_at="2024-01-31", note="run 2")
+    assert sum(len(f) for _, _, f in os.walk(tmp_path / "store" / "objects")) == 4
+
+    pd.testing.assert_frame_equal(store.as_of("macro_monthly", "2024-01-15"), _macro(), check_freq=False)
+    pd.testing.assert_frame_equal(store.as_of("macro_monthly", "2024-06-30"), revised, check_freq=False)
+    with pytest.raises(KeyError):
+        store.as_of("macro_monthly", "2023-01-01")
+
+    d = store.diff(v1, v2)
+    assert d.to_dict("records") == [{"table": "macro_monthly", "partition": "2022", "status": "changed"}]
+    cells = FeatureStore(str(tmp_path / "store")).diff_cells(v1, v2, "macro_monthly")
+    assert len(cells) == 1 and cells.iloc[0]["column"] == "us10y" and cells.iloc[0]["new"] == 9.9
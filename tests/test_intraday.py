@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+from src.data.intraday import IntradayStore, daily_bars, monthly_bars
+
+
+def _bars(days=("2024-01-30", "2024-01-31", "2024-02-01"), seed=0):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for d in days:
+        # 04:00-19:59 New York minutes: pre-market, regular session and after-hours
+        ts = pd.date_range(f"{d} 04:00", f"{d} 19:59", freq="min", tz="America/New_York").tz_convert("UTC")
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 1e-3, len(ts))))
+        frames.append(pd.DataFrame({
+            "ts": ts, "open": close * 0.9995, "high": close * 1.001, "low": close * 0.999,
+            "close": close, "volume": rng.integers(1, 1000, len(ts)).astype(float), "vwap": close,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_streaming_matches_one_pass_and_reference():
+    bars = _bars()
+    one = daily_bars([bars])
+    # uneven chunks that split sessions mid-day
+    cuts = np.r_[0, np.sort(np.random.default_rng(1).choice(len(bars), 7, replace=False)), len(bars)]
+    streamed = daily_bars(bars.iloc[a:b] for a, b in zip(cuts[:-1], cuts[1:]))
+    pd.testing.assert_frame_equal(one, streamed, check_freq=False)
+
+    local = bars["ts"].dt.tz_convert("America/New_York")
+    reg = bars[(local.dt.strftime("%H:%M") >= "09:30") & (local.dt.strftime("%H:%M") < "16:00")]
+    day = reg["ts"].dt.tz_convert("America/New_York").dt.date
+    for d, g in reg.groupby(day):
+        row = one.loc[pd.Timestamp(d)]
+        assert row["bars"] == 390
+        assert row["open"] == g["open"].iloc[0] and row["close"] == g["close"].iloc[-1]
+        assert np.isclose(row["vwap"], (g["vwap"] * g["volume"]).sum() / g["volume"].sum())
+        assert np.isclose(row["realized_vol"], np.sqrt((np.log(g["close"]).diff() ** 2).sum()))
+
+    m = monthly_bars(one)
+    assert list(m.index) == [pd.Timestamp("2024-01-31"), pd.Timestamp("2024-02-29")]
+    jan = one.loc["2024-01"]
+    assert np.isclose(m["realized_vol"].iloc[0], np.sqrt((jan["realized_vol"] ** 2).sum()))
+    assert m["bars"].tolist() == [2, 1]
+
+
+def test_store_ingests_missing_months_only(tmp_path):
+    bars = _bars()
+    calls = []
+
+    def fetch(ticker, start, end):
+        calls.append(pd.Timestamp(start).to_period("M"))
+        for month, g in bars.groupby(bars["ts"].dt.tz_convert(None).dt.to_period("M")):
+            if pd.Timestamp(start).to_period("M") <= month <= pd.Timestamp(end).to_period("M"):
+                yield month, g
+
+    store = IntradayStore(str(tmp_path), "1m")
+    assert store.ingest("nvda", fetch, "2024-01-01", "2024-02-29") == [pd.Period("2024-01"), pd.Period("2024-02")]
+    calls.clear()
+    assert store.ingest("NVDA", fetch, "2024-01-01", "2024-02-29") == []
+    assert calls == []
+    pd.testing.assert_frame_equal(store.daily("NVDA"), daily_bars([bars]), check_freq=False)
+
+
+def test_store_refetches_months_written_while_open_or_cut_short(tmp_path):
+    bars = _bars(days=("2024-01-30", "2024-01-31", "2024-02-01", "2024-02-28", "2024-02-29"))
+    state = {"now": pd.Timestamp("2024-02-01 12:00", tz="America/New_York")}
+    calls = []
+
+    def fetch(ticker, start, end):
+        # what the API would have returned at state["now"]
+        calls.append(pd.Timestamp(start).to_period("M"))
+        local = bars["ts"].dt.tz_convert("America/New_York").dt.tz_localize(None)
+        seen = bars[(bars["ts"] <= state["now"]) & (local < pd.Timestamp(end) + pd.Timedelta(days=1))]
+        for month, g in seen.groupby(seen["ts"].dt.tz_convert(None).dt.to_period("M")):
+            if pd.Timestamp(start).to_period("M") <= month <= pd.Timestamp(end).to_period("M"):
+                yield month, g
+
+    store = IntradayStore(str(tmp_path), "1m")
+    # January cut short by `end`, February ingested mid-session on its first day
+    assert store.ingest("NVDA", fetch, "2024-01-01", "2024-01-30", now=state["now"]) == [pd.Period("2024-01")]
+    assert store.ingest("NVDA", fetch, "2024-02-01", "2024-02-29", now=state["now"]) == [pd.Period("2024-02")]
+    assert store.fetched_through("NVDA", "2024-02") == pd.Timestamp("2024-01-31")
+
+    state["now"] = pd.Timestamp("2024-03-04 09:00", tz="America/New_York")          # both months closed
+    calls.clear()
+    refetched = store.ingest("NVDA", fetch, "2024-01-01", "2024-02-29", now=state["now"])
+    assert refetched == [pd.Period("2024-01"), pd.Period("2024-02")]
+    pd.testing.assert_frame_equal(store.daily("NVDA"), daily_bars([bars]), check_freq=False)
+    calls.clear()
+    assert store.ingest("NVDA", fetch, "2024-01-01", "2024-02-29", now=state["now"]) == [] and calls == []
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from src.features.lags import lag_tensor, select_lags
+
+
+def _data():
+    rng = np.random.default_rng(11)
+    idx = pd.date_range("2005-01-31", periods=160, freq="ME")
+    feats = pd.DataFrame(rng.normal(0, 1, (160, 2)), index=idx, columns=["us10y_chg", "unrate_chg"])
+    rets = pd.DataFrame({
+        "AAA": 0.4 * feats["us10y_chg"].shift(4) - 0.3 * feats["unrate_chg"].shift(9) + rng.normal(0, 0.2, 160),
+        "BBB": rng.normal(0, 1, 160),
+    }, index=idx)
+    rets.iloc[:70, 1] = np.nan
+    return rets, feats
+
+
+def test_lag_tensor_is_a_view_of_shifted_columns():
+    X = np.arange(20, dtype=float).reshape(10, 2)
+    t = lag_tensor(X, 3)
+    assert t.shape == (10, 4, 2) and not t.flags.writeable
+    for L in range(4):
+        exp = pd.DataFrame(X).shift(L).to_numpy()
+        np.testing.assert_array_equal(t[:, L, :], exp)
+
+
+def test_gram_scores_match_refit_and_pick_true_lags():
+    rets, feats = _data()
+    best, scores = select_lags(rets, feats, pool=range(1, 13), max_size=2, n_folds=4, min_train=40, ridge=0.0, workers=1)
+    assert best.loc["AAA", "lags"] == [4, 9]
+
+    # brute force: rebuild the lagged frame and refit on each fold
+    def refit(lags, ticker):
+        cols = {f"{c}_lag{L}": feats[c].shift(L) for L in (0,) + lags for c in feats}
+        X = pd.DataFrame(cols).iloc[12:]
+        y = rets[ticker].iloc[12:]
+        edges = [0] + list(np.linspace(40, len(X), 5).astype(int))
+        sse = sst = 0.0
+        for a, b in zip(edges[1:-1], edges[2:]):
+            tr, te = y.iloc[:a].notna().to_numpy(), y.iloc[a:b].notna().to_numpy()
+            if tr.sum() < X.shape[1] + 3 or not te.any():
+                continue
+            A = np.column_stack([np.ones(tr.sum()), X.iloc[:a][tr]])
+            beta = np.linalg.lstsq(A, y.iloc[:a][tr], rcond=None)[0]
+            pred = np.column_stack([np.ones(te.sum()), X.iloc[a:b][te]]) @ beta
+            sse += ((y.iloc[a:b][te] - pred) ** 2).sum()
+            sst += ((y.iloc[a:b][te] - y.iloc[:a][tr].mean()) ** 2).sum()
+        return 1 - sse / sst
+
+    got = scores.set_index(["ticker", "lags"])["oos_r2"]
+    for lags in [(4, 9), (1, 3)]:
+        for t in ["AAA", "BBB"]:
+            assert abs(got[(t, ",".join(map(str, lags)))] - refit(lags, t)) < 1e-8
+    assert abs(got[("AAA", "1,3,6")] - refit((1, 3, 6), "AAA")) < 1e-8
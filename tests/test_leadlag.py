@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+from src.features.leadlag import lead_lag, lead_lag_cube
+
+
+def test_matches_shifted_pandas_corr_with_gaps_and_finds_lead():
+    rng = np.random.default_rng(2)
+    idx = pd.date_range("2000-01-31", periods=150, freq="ME")
+    macro = pd.DataFrame(rng.normal(0, 1, (150, 2)), index=idx, columns=["DGS10", "UNRATE"])
+    macro.iloc[::11, 1] = np.nan
+    rets = pd.DataFrame({
+        "AAA": 0.8 * macro["DGS10"].shift(3) + rng.normal(0, 0.5, 150),     # DGS10 leads by 3
+        "BBB": rng.normal(0, 1, 150) + 100.0,
+    }, index=idx)
+    rets.iloc[:40, 1] = np.nan
+
+    cube, count = lead_lag_cube(rets, macro, max_lag=6, min_obs=10)
+    for i, t in enumerate(rets):
+        for j, s in enumerate(macro):
+            for k in range(-6, 7):
+                exp = rets[t].corr(macro[s].shift(k))
+                assert abs(cube[i, j, k + 6] - exp) < 1e-9
+                assert count[i, j, k + 6] == (rets[t].notna() & macro[s].shift(k).notna()).sum()
+
+    peaks = lead_lag(rets, macro, max_lag=6, min_obs=10)
+    top = peaks.iloc[0]
+    assert (top["ticker"], top["indicator"], top["lag"]) == ("AAA", "DGS10", 3)
+    assert top["corr"] > 0.7 and abs(top["corr_lag0"]) < 0.3
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from src.features.merge import merge_monthly
+
+
+def test_matches_concat_on_month_end_frames():
+    idx = pd.date_range("2020-01-31", periods=12, freq="ME")
+    a = pd.DataFrame({"a": np.arange(12.0)}, index=idx)
+    b = pd.DataFrame({"b": np.arange(6.0)}, index=idx[4:10])
+    expected = pd.concat([a, b], axis=1)
+    got = merge_monthly([a, b])
+    pd.testing.assert_frame_equal(got, expected, check_freq=False)
+
+
+def test_duplicate_months_and_left_join():
+    a = pd.DataFrame({"x": [1.0, 2.0, 3.0]},
+                     index=pd.to_datetime(["2020-01-03", "2020-01-20", "2020-02-10"]))
+    b = pd.Series([5.0, 6.0], index=pd.to_datetime(["2020-02-29", "2020-03-31"]), name="y")
+
+    outer = merge_monthly([a, b])
+    assert list(outer.index.strftime("%Y-%m-%d")) == ["2020-01-31", "2020-02-29", "2020-03-31"]
+    assert outer.loc["2020-01-31", "x"] == 2.0  # last wins
+
+    left = merge_monthly([a, b], how="left", dupes="mean")
+    assert len(left) == 2
+    assert left.loc["2020-01-31", "x"] == 1.5
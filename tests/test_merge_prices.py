@@ -0,0 +1,36 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.data.merge_prices import merge_price_files
+
+
+def _prices(path, dates):
+    n = len(dates)
+    pd.DataFrame({"date": dates, "open": range(n), "high": range(n), "low": range(n),
+                  "close": [float(i) for i in range(n)], "volume": [100] * n}).to_csv(path, index=False)
+
+
+def test_merge_orders_by_ticker_date_and_keeps_csv_dates(tmp_path):
+    zzz = [f"2024-01-{d:02d} 00:00:00-05:00" for d in (4, 2, 3)]      # yfinance text, out of order
+    aaa = [f"2024-02-{d:02d}" for d in range(1, 6)]
+    _prices(tmp_path / "ZZZ_prices.csv", zzz)
+    _prices(tmp_path / "AAA_prices.csv", aaa)
+    out, csv = tmp_path / "merged.parquet", tmp_path / "merged.csv"
+
+    n = merge_price_files([str(tmp_path / "ZZZ_prices.csv"), str(tmp_path / "AAA_prices.csv")],
+                          str(out), csv_path=str(csv), batch_rows=3, workers=2)
+    assert n == 8
+
+    table = pq.read_table(out)
+    assert table.num_rows == 8 and pq.ParquetFile(out).num_row_groups > 1
+    assert pa.types.is_dictionary(table.schema.field("ticker").type)
+    df = table.to_pandas()
+    assert df["ticker"].astype(str).tolist() == ["AAA"] * 5 + ["ZZZ"] * 3
+    assert df.groupby("ticker", observed=True)["date"].apply(lambda d: d.is_monotonic_increasing).all()
+    assert df["date"].iloc[5] == pd.Timestamp("2024-01-02 05:00", tz="UTC")
+
+    text = pd.read_csv(csv, dtype={"date": str})
+    assert len(text) == 8
+    assert text["date"].tolist() == aaa + sorted(zzz)                 # source text, not UTC
+    assert text["ticker"].tolist() == ["AAA"] * 5 + ["ZZZ"] * 3
@@ -0,0 +1,65 @@
+import pandas as pd
+
+from src.data.polygon_daily import DailyBarStore, last_session_date, plan_fetch, refresh_daily
+
+
+def test_plan_picks_fewest_calls():
+    big = [f"T{i}" for i in range(500)]
+    through = {t: pd.Timestamp("2024-03-18") for t in big}
+    # tail refresh of a large universe: three grouped calls instead of 500
+    plan = plan_fetch(big, "2020-01-01", "2024-03-21", through)
+    assert plan.ticker_ranges == {} and len(plan.dates) == 3 and plan.calls == 3
+    # a ticker new to the universe gets its own history call, the rest stay date-major
+    plan = plan_fetch(big + ["NEW"], "2020-01-01", "2024-03-21", through)
+    assert list(plan.ticker_ranges) == ["NEW"] and len(plan.dates) == 3
+    # a few tickers over five years: one call per ticker
+    plan = plan_fetch(["AAPL", "MSFT"], "2019-01-01", "2024-03-21")
+    assert plan.dates == [] and plan.calls == 2
+    assert plan_fetch(["AAPL", "MSFT"], "2019-01-01", "2024-03-21", strategy="date").calls > 1000
+    assert plan_fetch(big, "2020-01-01", "2024-03-18", through).calls == 0
+    assert last_session_date("2024-03-25 09:00") == pd.Timestamp("2024-03-22")
+
+
+def _fake_market(tickers, split=None):
+    days = pd.bdate_range("2024-01-01", "2024-03-29")
+    full = pd.DataFrame([(t, d, 10.0 + i) for t in tickers for i, d in enumerate(days)],
+                        columns=["ticker", "date", "close"])
+    for c in ("open", "high", "low", "vwap"):
+        full[c] = full["close"]
+    full["volume"], full["trades"] = 1000.0, 10.0
+    calls = {"grouped": 0, "ticker": 0}
+
+    def grouped(d):
+        calls["grouped"] += 1
+        return full[full["date"] == d]
+
+    def ticker(t, a, b):
+        calls["ticker"] += 1
+        g = full[(full["ticker"] == t) & full["date"].between(a, b)]
+        return g.drop(columns="ticker")
+
+    def splits(a, b):
+        return pd.DataFrame({"ticker": [split] if split else [], "date": [pd.Timestamp("2024-03-27")] if split else []})
+
+    return full, calls, grouped, ticker, splits
+
+
+def test_refresh_backfills_then_tails_date_major(tmp_path):
+    tickers = [f"T{i}" for i in range(80)]
+    full, calls, grouped, ticker, splits = _fake_market(tickers, split="T3")
+    store = DailyBarStore(str(tmp_path))
+    kw = dict(fetch_grouped=grouped, fetch_ticker=ticker, fetch_splits=splits, log=lambda _: None)
+
+    # 80 tickers x 60 sessions: grouped wins; flushed in pieces
+    out = refresh_daily(store, tickers, "2024-01-01", "2024-03-22", flush_every=25, **kw)
+    assert out["date_calls"] == 60 and out["ticker_calls"] == 0
+    assert store.read("T5")["date"].max() == pd.Timestamp("2024-03-22")
+
+    # tail refresh: 5 grouped calls + the split ticker refetched in full
+    calls.update(grouped=0, ticker=0)
+    out = refresh_daily(store, tickers, "2024-01-01", "2024-03-29", **kw)
+    assert calls == {"grouped": 5, "ticker": 1} and out["split_refetch"] == ["T3"]
+    got = store.closes(tickers)
+    want = full.pivot(index="date", columns="ticker", values="close")[tickers]
+    pd.testing.assert_frame_equal(got, want, check_names=False, check_freq=False)
+    assert store.through()["T3"] == pd.Timestamp("2024-03-29")
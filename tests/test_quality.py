@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+from src.data.quality import FLAGS, hard_mask, validate_panel
+
+
+def _prices(n_days=600, n=6, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2022-01-03", periods=n_days)
+    vals = 50 * np.exp(np.cumsum(rng.normal(0, 0.015, (n_days, n)), axis=0))
+    return pd.DataFrame(vals, index=idx, columns=[f"T{i}" for i in range(n)])
+
+
+def test_price_checks_flag_the_planted_defects():
+    p = _prices()
+    p.iloc[300:, 0] /= 2                       # unadjusted 2:1 split
+    p.iloc[100, 1] = 0.0                       # zero price
+    p.iloc[400:, 2] *= 100                     # cents instead of dollars
+    p.iloc[200:210, 3] = p.iloc[199, 3]        # stale run
+    p.iloc[250, 4] *= 1.8                      # bad tick, undone next day
+    p.iloc[50:60, 5] = np.nan                  # interior gap
+    p = pd.concat([p, p.iloc[[10]] * 1.01])     # duplicate date (later row wins)
+
+    report, flags = validate_panel(p, kind="price", freq="B")
+    assert flags.shape == p.shape and flags.index.equals(p.index)
+
+    assert report.loc["T0", "split"] == 1 and flags.iloc[300, 0] & FLAGS["split"]
+    assert report.loc["T1", "nonpositive"] == 1
+    assert report.loc["T2", "unit"] == 1 and flags.iloc[400, 2] & FLAGS["unit"]
+    assert report.loc["T3", "stale"] == 10
+    assert report.loc["T4", "jump"] == 2 and report.loc["T4", ["split", "unit"]].sum() == 0
+    assert report.loc["T5", "gaps"] == 10
+    # the earlier copy of the duplicated date is flagged in every column, the appended one is kept
+    assert (flags.iloc[10] & FLAGS["duplicate"]).all() and not (flags.iloc[-1] & FLAGS["duplicate"]).any()
+    clean = report.drop(columns=["n_obs", "first", "last", "duplicate", "bad"])
+    assert clean.loc[["T0", "T1", "T2", "T3", "T4", "T5"]].sum(axis=1).gt(0).all()
+    assert hard_mask(flags).sum().sum() == report["bad"].sum()
+
+
+def test_return_checks_alignment_and_units():
+    r = _prices().resample("ME").last().pct_change(fill_method=None).iloc[1:]
+    r["T1"] *= 100                               # percent instead of fraction
+    r.index = r.index.where(r.index != r.index[5], r.index[5] - pd.Timedelta(days=1))   # not a month-end
+    report, flags = validate_panel(r, kind="return", freq="ME")
+    assert report.loc["T1", "unit"] == report.loc["T1", "n_obs"]
+    assert (flags.iloc[5] & FLAGS["misaligned"]).all()
+    assert report.loc["T0", "gaps"] == 1
+    assert report.drop(index="T1")[["nonpositive", "unit", "split", "stale"]].to_numpy().sum() == 0
+
+
+def test_real_crash_is_reported_not_masked_unless_a_split_is_confirmed():
+    p = _prices()
+    p.iloc[300:, 0] *= 0.65                      # -35% earnings gap: lands near the 3:2 ratio
+    p.iloc[300:, 1] /= 2                         # real 2:1 split, missing from the history
+    vol = pd.DataFrame(1e6, index=p.index, columns=p.columns)
+    vol.iloc[300:, 1] *= 2                       # ... and the volume doubles with it
+    r = _prices().resample("ME").last().pct_change(fill_method=None).iloc[1:] * 0.3   # calm months
+    crash = 12
+    r.iloc[crash, :2] = [-0.34, -0.5]            # a -34% month and a missing 2:1 split
+
+    report, flags = validate_panel(p, kind="price", freq="B", volume=vol)
+    assert flags.iloc[300, 0] & FLAGS["split"] and not hard_mask(flags).iloc[300, 0]
+    assert flags.iloc[300, 1] & FLAGS["split_confirmed"] and hard_mask(flags).iloc[300, 1]
+    assert report.loc["T0", "bad"] == 0 and report.loc["T1", "bad"] == 1
+
+    report, flags = validate_panel(r, kind="return", freq="ME")
+    assert report.loc[["T0", "T1"], "split"].tolist() == [1, 1]
+    assert not hard_mask(flags).iloc[crash].any()   # reported, but both months stay in the data
+    _, flags = validate_panel(r, kind="return", freq="ME", known_splits=[(r.index[crash], "T1")])
+    assert hard_mask(flags).iloc[crash].tolist() == [False, True] + [False] * 4
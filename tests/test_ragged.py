@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.features.ragged import (drawdown, month_end_sample, pct_change, rebase, rolling_vol,
+                                 segment_offsets, sort_long, to_wide)
+
+
+def _long(n_tickers=40, seed=0):
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range("2018-01-01", periods=1500)
+    parts = []
+    for i in range(n_tickers):
+        d = days[rng.integers(0, 1000):][:rng.integers(5, 600)]     # ragged listing dates / lengths
+        p = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, len(d))))
+        p[rng.random(len(d)) < 0.03] = np.nan
+        parts.append(pd.DataFrame({"ticker": f"T{i:02d}", "date": d, "close": p}))
+    return pd.concat(parts, ignore_index=True)
+
+
+def test_kernels_match_groupby_without_pivot():
+    df = _long()
+    shuffled = df.sample(frac=1, random_state=0)
+    df = sort_long(shuffled)
+    tickers, off = segment_offsets(df["ticker"].to_numpy())
+    assert len(tickers) == 40 and off[-1] == len(df)
+    g = df.groupby("ticker", sort=False)["close"]
+
+    r = pct_change(df["close"], off)
+    np.testing.assert_allclose(r, g.pct_change(fill_method=None), equal_nan=True)
+    want = pd.Series(r, index=df.index).groupby(df["ticker"], sort=False).rolling(21, min_periods=10).std()
+    np.testing.assert_allclose(rolling_vol(r, off, 21, 10), want.to_numpy(), equal_nan=True, rtol=1e-9)
+    np.testing.assert_allclose(drawdown(df["close"], off), df["close"] / g.cummax() - 1, equal_nan=True)
+    first = g.transform(lambda s: s.dropna().iloc[0])
+    np.testing.assert_allclose(rebase(df["close"], off), df["close"] / first * 100, equal_nan=True)
+
+    me = month_end_sample(df, off)
+    ref = df.set_index("date").groupby("ticker")["close"].resample("ME").last().dropna().reset_index()
+    assert (me["date"].to_numpy() == ref["date"].to_numpy()).all()
+    np.testing.assert_allclose(me["close"], ref["close"])
+
+    wide = to_wide(r, df["date"], off, tickers)
+    assert wide.shape == (df["date"].nunique(), 40) and wide.notna().sum().sum() == np.isfinite(r).sum()
+
+
+def test_ungrouped_keys_are_rejected():
+    with pytest.raises(ValueError):
+        segment_offsets(np.array(["A", "B", "A"]))
@@ -0,0 +1,74 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data.raw_cache import RawCache
+
+
+def _monthly(i, n=60):
+    idx = pd.date_range("2020-01-31", periods=n, freq="ME", name="date")
+    return pd.DataFrame({"close": np.arange(n, dtype=float) + i}, index=idx)
+
+
+def test_compaction_round_trips_and_counts_hits(tmp_path):
+    cache = RawCache(str(tmp_path), small="64KB")
+    for i in range(30):
+        cache.put(f"poly_monthly/T{i}", _monthly(i))
+    cache.put("fred/DGS10", pd.DataFrame({"date": pd.to_datetime(["2024-01-02"]), "value": [4.0]}))
+
+    assert cache.compact() == 1                       # the lone fred entry stays loose
+    assert os.listdir(tmp_path / "poly_monthly") == ["_packs"]
+    pd.testing.assert_frame_equal(cache.get("poly_monthly/T7"), _monthly(7), check_freq=False)
+    assert cache.get("fred/DGS10")["value"].tolist() == [4.0]
+    # a rewrite goes back to a loose file and wins over the packed copy
+    cache.put("poly_monthly/T7", _monthly(100, n=3))
+    assert cache.get("poly_monthly/T7")["close"].iloc[0] == 100
+    assert cache.get("poly_monthly/missing") is None
+
+    stats = cache.stats()
+    assert stats.loc["poly_monthly", ["entries", "loose", "packed", "hits", "misses"]].tolist() == [30, 1, 29, 2, 1]
+    assert stats.loc["total", "hit_rate"] == 0.75
+    cache.close()
+
+
+def test_lru_eviction_within_budget(tmp_path):
+    big = pd.DataFrame(np.random.default_rng(0).random((20000, 2)), columns=["a", "b"])
+    probe = RawCache(str(tmp_path / "probe"))
+    probe.put("x/probe", big)
+    size = probe.disk_usage()
+    probe.close()
+
+    cache = RawCache(str(tmp_path / "c"), budget=int(size * 3.5), small=0)
+    for name in ("A", "B", "C"):
+        cache.put(f"big/{name}", big)
+        time.sleep(0.01)
+    cache.get("big/A")                                # A is now the most recently used
+    extra = tmp_path / "fred_X.csv"
+    extra.write_text("date,value\n2024-01-01,1\n")
+    cache.track(str(extra), "fred", last_access=0)    # tracked file, oldest access
+    cache.put("big/D", big)
+    assert cache.get("big/B") is None and not extra.exists()
+    assert all(cache.get(f"big/{k}") is not None for k in "ACD")
+    assert cache.disk_usage() <= 3.5 * size
+    cache.close()
+
+
+def test_legacy_per_ticker_files_are_adopted_not_refetched(tmp_path):
+    cache = RawCache(str(tmp_path))
+    _monthly(1).rename(columns={"close": "AAPL"}).to_parquet(tmp_path / "AAPL_poly_monthly.parquet")
+    _monthly(2).rename(columns={"close": "MSFT"}).to_parquet(tmp_path / "MSFT_daily.parquet")
+    _monthly(3).rename(columns={"close": "NVDA"}).to_parquet(tmp_path / "NVDA_daily.parquet")
+
+    assert cache.get("poly_monthly/AAPL") is None
+    got = cache.adopt("poly_monthly/AAPL", str(tmp_path / "AAPL_poly_monthly.parquet"))
+    pd.testing.assert_frame_equal(got, _monthly(1), check_freq=False)
+    assert not (tmp_path / "AAPL_poly_monthly.parquet").exists()
+    assert cache.adopt("poly_monthly/AAPL", str(tmp_path / "AAPL_poly_monthly.parquet")) is None
+
+    assert cache.migrate_legacy() == 2                # what `--scan` does for the rest
+    assert cache.get("daily/MSFT")["close"].iloc[0] == 2
+    assert not list(tmp_path.glob("*.parquet"))
+    pd.testing.assert_frame_equal(cache.get("poly_monthly/AAPL"), _monthly(1), check_freq=False)
+    cache.close()
@@ -0,0 +1,75 @@
+import importlib.util
+import os
+
+import pandas as pd
+import pytest
+
+_PATH = os.path.join(os.path.dirname(__file__), "..", "notebooks", "Rebuild_combined_from_features.py")
+
+
+@pytest.fixture
+def rebuild(tmp_path, monkeypatch):
+    spec = importlib.util.spec_from_file_location("rebuild_combined", _PATH)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    monkeypatch.setattr(mod, "MONTHLY", str(tmp_path))
+    monkeypatch.setattr(mod, "OUT_CSV", str(tmp_path / "tech_features_combined.csv"))
+    monkeypatch.setattr(mod, "STATE_DIR", str(tmp_path / ".rebuild_state"))
+    monkeypatch.setattr(mod, "STATE_JSON", str(tmp_path / ".rebuild_state" / "state.json"))
+    monkeypatch.setattr(mod, "COMBINED_STATE", str(tmp_path / ".rebuild_state" / "combined.parquet"))
+    return mod
+
+
+def _source(path, col, months, bump=0.0):
+    idx = pd.date_range("2023-01-31", periods=months, freq="ME", name="date")
+    pd.DataFrame({col: [0.01 * (i + 1) + bump for i in range(months)]}, index=idx).to_csv(path)
+
+
+def _full(rebuild):
+    blocks = [rebuild.load_source(n) for n in rebuild.source_paths()]
+    return rebuild.combine([b for b in blocks if b is not None])
+
+
+def test_incremental_rebuild_appends_or_rewrites(rebuild, tmp_path, capsys, monkeypatch):
+    ixic, aapl = tmp_path / "ixic_rets.csv", tmp_path / "AAPL_features_enriched.csv"
+    out = tmp_path / "tech_features_combined.csv"
+    _source(ixic, "ixic_ret", 6)
+    _source(aapl, "AAPL_ret", 6)
+    _source(tmp_path / "xlk_rets.csv", "xlk_ret", 4)     # never changes below
+    rebuild.main([])
+    first = out.read_text()
+    assert len(pd.read_csv(out, index_col=0)) == 6
+
+    capsys.readouterr()
+    rebuild.main([])                                       # nothing changed: no-op
+    assert "Up to date" in capsys.readouterr().out and out.read_text() == first
+
+    _source(ixic, "ixic_ret", 8)
+    _source(aapl, "AAPL_ret", 8)
+    read = []
+    load_block, load_source = rebuild.load_block, rebuild.load_source
+    monkeypatch.setattr(rebuild, "load_block", lambda n: read.append(n) or load_block(n))
+    monkeypatch.setattr(rebuild, "load_source", lambda n: read.append(n) or load_source(n))
+    rebuild.main([])                                       # two new months: rows appended only
+    assert "xlk_rets.csv" not in read                      # unchanged sources are not touched
+    monkeypatch.setattr(rebuild, "load_block", load_block)
+    monkeypatch.setattr(rebuild, "load_source", load_source)
+    assert "Appended 2 new month(s)" in capsys.readouterr().out
+    appended = out.read_text()
+    assert appended.startswith(first)
+    pd.testing.assert_frame_equal(pd.read_csv(out, index_col=0, parse_dates=True), _full(rebuild),
+                                  check_names=False, check_freq=False)
+
+    _source(ixic, "ixic_ret", 8, bump=1.0)                 # a revision to past months
+    rebuild.main([])
+    assert "Saved →" in capsys.readouterr().out
+    df = pd.read_csv(out, index_col=0, parse_dates=True)
+    pd.testing.assert_frame_equal(df, _full(rebuild), check_names=False, check_freq=False)
+    assert df["ixic_ret"].iloc[0] == pytest.approx(1.01) and len(df) == 8
+
+    os.remove(aapl)                                        # a removed source
+    rebuild.main([])
+    assert "removed: 1" in capsys.readouterr().out
+    df = pd.read_csv(out, index_col=0, parse_dates=True)
+    assert list(df.columns) == ["ixic_ret", "xlk_ret"]
+    pd.testing.assert_frame_equal(df, _full(rebuild), check_names=False, check_freq=False)
@@ -0,0 +1,35 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.viz.reports import build_reports
+
+
+def _write_prices(path, n=60, bump=0.0):
+    dates = pd.bdate_range("2024-01-02", periods=n, tz="America/New_York")
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(0, 1, n)) + bump
+    pd.DataFrame({"date": dates, "close": close}).to_csv(path, index=False)
+
+
+def test_build_reports_skips_unchanged_and_rerenders_changed_inputs(tmp_path):
+    data, out = tmp_path / "data", tmp_path / "reports"
+    data.mkdir()
+    _write_prices(data / "AAA_prices.csv")
+    _write_prices(data / "BBB_prices.csv")
+    pd.DataFrame({"date": pd.date_range("2024-01-01", periods=4, freq="MS"), "value": [4.0, 4.1, 4.2, 4.3]}) \
+        .to_csv(data / "fred_DGS10.csv", index=False)
+    charts = ["price_history", "vs_DGS10", "vs_CPIAUCSL", "bogus"]
+
+    res = build_reports(["AAA", "BBB"], charts, data_dir=str(data), out_dir=str(out), workers=1)
+    assert (res["rendered"], res["skipped"]) == (4, 0)
+    assert res["missing"] == ["AAA:vs_CPIAUCSL", "BBB:vs_CPIAUCSL"]        # no fred_CPIAUCSL.csv cached
+    assert res["failed"] == ["AAA:bogus", "BBB:bogus"]                    # unknown chart, batch carries on
+    assert os.path.exists(out / "images" / "AAA_vs_DGS10.png") and os.path.exists(out / "index.html")
+
+    res = build_reports(["AAA", "BBB"], charts, data_dir=str(data), out_dir=str(out), workers=1)
+    assert (res["rendered"], res["skipped"]) == (0, 4)
+
+    _write_prices(data / "AAA_prices.csv", bump=5.0)
+    res = build_reports(["AAA", "BBB"], charts, data_dir=str(data), out_dir=str(out), workers=1)
+    assert (res["rendered"], res["skipped"]) == (2, 2)
@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pandas as pd
+
+from src.agent.scheduler import Job, Scheduler, period_boundary
+
+
+def _writer(path, content, calls, name):
+    def run():
+        calls.append(name)
+        with open(path, "w") as f:
+            f.write(content[name])
+    return run
+
+
+def test_cadences_restart_and_change_propagation(tmp_path):
+    content = {"daily": "d1", "monthly": "m1", "stage": "s"}
+    calls = []
+    paths = {k: str(tmp_path / f"{k}.csv") for k in content}
+
+    def jobs():
+        return [
+            Job("daily", _writer(paths["daily"], content, calls, "daily"), [paths["daily"]], "fred", "B",
+                pd.Timedelta(hours=18)),
+            Job("monthly", _writer(paths["monthly"], content, calls, "monthly"), [paths["monthly"]], "fred", "M",
+                pd.Timedelta(days=14)),
+            Job("stage", _writer(paths["stage"], content, calls, "stage"), [paths["stage"]], deps=["daily", "monthly"]),
+        ]
+
+    db = str(tmp_path / "state.sqlite")
+    s = Scheduler(jobs(), db_path=db, log=lambda _: None)
+    assert s.tick("2024-03-20 19:00") == {"daily": "ok", "monthly": "ok", "stage": "ok"}
+    assert s.tick("2024-03-20 20:00") == {}
+    s.close()
+
+    # restart: state comes from disk, nothing is redone
+    s = Scheduler(jobs(), db_path=db, log=lambda _: None)
+    assert s.due("2024-03-20 23:00") == []
+    calls.clear()
+    # next business day after 18:00: only the daily source; same content -> stage stays put
+    assert s.tick("2024-03-21 18:30") == {"daily": "ok"}
+    # new content -> the stage reruns in the same tick
+    content["daily"] = "d2"
+    assert s.tick("2024-03-22 18:30") == {"daily": "ok", "stage": "ok"}
+    # weekend: no business-day period starts; mid-April the monthly one is due again
+    assert s.due("2024-03-24 12:00") == []
+    assert s.due("2024-04-15 00:00") == ["daily", "monthly"]
+    assert calls == ["daily", "daily", "stage"]
+    s.close()
+
+
+def test_provider_limits_and_failures(tmp_path):
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def slow():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+
+    def boom():
+        raise RuntimeError("rate limited")
+
+    jobs = [Job(f"p{i}", slow, provider="polygon", cadence="D") for i in range(4)]
+    jobs.append(Job("bad", boom, provider="fred", cadence="D", retry=3600))
+    s = Scheduler(jobs, db_path=":memory:", limits={"polygon": 1}, log=lambda _: None)
+    res = s.tick("2024-03-20 12:00")
+    assert peak[0] == 1 and res["bad"] == "error"
+    assert s.due("2024-03-20 12:30") == []           # failed job waits for its retry delay
+    assert s.due("2024-03-20 13:30") == ["bad"]
+    assert s.status().set_index("name").loc["bad", "error"] == "RuntimeError: rate limited"
+    assert period_boundary(pd.Timestamp("2024-03-02 10:00"), "M", pd.Timedelta(days=14)) == pd.Timestamp("2024-02-15")
+    s.close()
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from src.agent import sentiment
+from src.agent.sentiment import SentimentStore, score_texts
+
+
+def _news(lo, hi):
+    t0 = pd.Timestamp("2024-01-01", tz="UTC")
+    idx = range(lo, hi)
+    return pd.DataFrame({
+        "published_at": [t0 + pd.Timedelta(hours=6 * i) for i in idx],
+        "source": "wire",
+        "title": [f"NVDA {'strong rally' if i % 3 else 'lawsuit and decline'} {i}" for i in idx],
+        "description": "",
+        "url": [f"https://example.com/{i}" for i in idx],
+    })
+
+
+def test_incremental_matches_one_shot_and_skips_seen_articles():
+    inc = SentimentStore(":memory:")
+    first = inc.ingest({"NVDA": _news(0, 10)})
+    second = inc.ingest({"NVDA": _news(5, 20)})
+    assert first["scored"] == 10
+    assert second["scored"] == 10 and second["linked"] == 10   # 5..9 were already cached
+    assert inc.ingest({"NVDA": _news(0, 20)})["scored"] == 0
+
+    once = SentimentStore(":memory:")
+    once.ingest({"NVDA": _news(0, 20)})
+    a, b = inc.summary(["NVDA"]).iloc[0], once.summary(["NVDA"]).iloc[0]
+    assert a["n_articles"] == b["n_articles"] == 20
+    assert abs(a["sentiment"] - b["sentiment"]) < 1e-12
+
+
+def test_keyword_fallback_stays_in_compound_range(monkeypatch):
+    monkeypatch.setattr(sentiment, "_ANALYZER", None)
+    monkeypatch.setattr(sentiment, "_SCORER", "keywords")
+    bull = " ".join(sentiment._POS)
+    bear = " ".join(sentiment._NEG)
+    assert score_texts([bull, bear, "strong rally", "", "flat day"]) == [1.0, -1.0, 2 / 6, 0.0, 0.0]
@@ -0,0 +1,70 @@
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from src.agent.service import BoundedExecutor, QueueFull, SingleFlight, WarmCache, make_handler
+
+
+def test_single_flight_coalesces_and_executor_applies_backpressure():
+    ex = BoundedExecutor(workers=1, queue_size=1)
+    flight = SingleFlight()
+    gate = threading.Event()
+    runs = []
+
+    def work(tag):
+        runs.append(tag)
+        gate.wait(5)
+        return tag
+
+    a = flight.submit("NVDA", lambda: ex.submit(work, "NVDA"))
+    b = flight.submit("NVDA", lambda: ex.submit(work, "NVDA"))   # joins a
+    c = flight.submit("AMD", lambda: ex.submit(work, "AMD"))     # queued
+    with pytest.raises(QueueFull):
+        flight.submit("JPM", lambda: ex.submit(work, "JPM"))
+    gate.set()
+    assert a.result(5) == b.result(5) == "NVDA" and c.result(5) == "AMD"
+    assert runs == ["NVDA", "AMD"] and flight.coalesced == 1
+
+    time.sleep(0.05)  # slots are released in done-callbacks
+    assert flight.submit("JPM", lambda: ex.submit(work, "JPM")).result(5) == "JPM"
+    ex.shutdown()
+
+
+def test_timeout_is_504_and_only_real_data_stays_warm():
+    class Slow:
+        def research(self, topic):
+            return Future().result(timeout=0.01)        # concurrent.futures.TimeoutError
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(Slow()))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with pytest.raises(urllib.error.HTTPError) as err:
+            urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/research?ticker=NVDA", timeout=5)
+        assert err.value.code == 504
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    cache, loads = WarmCache(ttl=60), []
+
+    def loader(value):
+        def load():
+            loads.append(value)
+            if isinstance(value, Exception):
+                raise value
+            return value
+        return load
+
+    with pytest.raises(ValueError):
+        cache.get("prices:NVDA", loader(ValueError("rate limited")))
+    assert cache.get("prices:NVDA", loader(pd.DataFrame())).empty
+    full = pd.DataFrame({"close": [1.0]})
+    assert cache.get("prices:NVDA", loader(full)) is full
+    assert cache.get("prices:NVDA", loader(pd.DataFrame())) is full     # warm now
+    assert len(loads) == 3 and len(cache) == 1
@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+
+from src.agent.workqueue import make_shards, open_queue, run_worker
+
+
+@pytest.fixture(params=["queue.sqlite", "queue"])
+def queue(request, tmp_path):
+    q = open_queue(str(tmp_path / request.param), max_attempts=2)
+    yield q
+    q.close()
+
+
+def test_claims_are_exclusive_and_drain(queue):
+    assert queue.seed(make_shards([f"T{i}" for i in range(23)], 5)) == 5
+    assert queue.seed(make_shards(["X"], 5)) == 0           # resume: already seeded
+
+    seen, lock = [], threading.Lock()
+
+    def process(shard, tickers):
+        with lock:
+            seen.append(shard)
+
+    threads = [threading.Thread(target=run_worker, args=(queue, process),
+                                kwargs={"worker": f"w{i}", "log": lambda _: None}) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(seen) == [0, 1, 2, 3, 4]
+    assert queue.counts() == {"done": 5}
+
+
+def test_expired_lease_is_reclaimed_and_failures_park(queue):
+    queue.seed([["A"], ["B"]])
+    shard, tickers = queue.claim("crashed", lease=0)
+    assert (shard, tickers) == (0, ["A"])
+    # the lease ran out: another worker gets shard 0 again, the dead one can't complete it
+    assert queue.claim("w2", lease=60)[0] == 0
+    assert not queue.complete(0, "crashed")
+    assert queue.complete(0, "w2")
+
+    def boom(shard, tickers):
+        raise ValueError("bad ticker")
+
+    assert run_worker(queue, boom, worker="w3", log=lambda _: None) == 0
+    assert queue.counts() == {"done": 1, "failed": 1}
+    assert queue.failures() == [(1, "ValueError: bad ticker")]
+
+
+def test_file_claims_race_with_reclaim_passes(tmp_path):
+    # every claim runs a reclaim pass over running/, including files other workers are mid-claim on
+    queue = open_queue(str(tmp_path / "queue"), max_attempts=5)
+    queue.seed(make_shards([f"T{i}" for i in range(40)], 1))
+    assert queue.claim("crashed", lease=0)[0] == 0       # orphaned; must be redone exactly once more
+    done, errors, lock = [], [], threading.Lock()
+
+    def work(i):
+        try:
+            n = run_worker(queue, lambda s, t: time.sleep(0.005), worker=f"w{i}", lease=5, log=lambda _: None)
+            with lock:
+                done.append(n)
+        except Exception as e:                              # a crashed claim ends the worker; surface it
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == [] and sum(done) == 40
+    assert queue.counts() == {"done": 40}
@@ -0,0 +1,32 @@
+import pandas as pd
+
+from src.data import yahoo
+
+
+class _Ticker:
+    calls = 0
+
+    def __init__(self, ticker):
+        pass
+
+    def history(self, period, interval):
+        _Ticker.calls += 1
+        idx = pd.DatetimeIndex(pd.bdate_range("2024-01-02", periods=3), name="Date").tz_localize("America/New_York")
+        return pd.DataFrame({"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": [1.0, 1.5, 2.0],
+                             "Volume": 100, "Dividends": 0.0}, index=idx)
+
+
+def test_use_cache_returns_the_live_frame(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(yahoo.yf, "Ticker", _Ticker)
+    hits = []
+    monkeypatch.setattr(yahoo, "record_file", lambda path, hit, source: hits.append(hit))
+
+    live = yahoo.get_stock_prices("NVDA", use_cache=True)
+    cached = yahoo.get_stock_prices("NVDA", use_cache=True)
+    assert _Ticker.calls == 1 and hits == [False, True]
+    assert str(cached["date"].dt.tz) == str(live["date"].dt.tz) == "America/New_York"
+    pd.testing.assert_frame_equal(cached, live, check_dtype=False)
+
+    stale = yahoo.get_stock_prices("NVDA", use_cache=True, max_age_hours=0)
+    assert _Ticker.calls == 2 and len(stale) == 3